@@ -10,46 +10,186 @@ How to run
 from flask import Flask, render_template_string, request, jsonify
 import sqlite3
 
+import archive
+import schema
+
 from flask import session, redirect
 
 DB_NAME = "abet_data.db"
 
+# --------------------------------------------------------------------------- #
+# Course / PI catalogue – rendered into the page (COURSE_MAP, PI_MAP) and used
+# to validate bulk imports (ingest.py)
+# --------------------------------------------------------------------------- #
+COURSE_MAP = {
+    "MECE 1101": "Intro to ME",
+    "MECE 1221": "Engineering Graphics",
+    "MECE 2140": "Engineering Materials Lab",
+    "MECE 2302": "Dynamics",
+    "MECE 2340": "Engineering Materials",
+    "MECE 3170": "Thermal Fluids Laboratory",
+    "MECE 3315": "Fluid Mechanics",
+    "MECE 3320": "Measurements & Instrumentation",
+    "MECE 3336": "Thermodynamics II",
+    "MECE 3360": "Heat Transfer",
+    "MECE 3380": "Kinematics & Dynamics of Machines",
+    "MECE 3450": "Mechanical Engineering Analysis II",
+    "MECE 4350": "Machine Elements",
+    "MECE 4361": "Senior Design‑I",
+    "MECE 4362": "Senior Design‑II",
+    "PHIL 2393": "Philosophy",
+}
+
+PI_MAP = {
+    "SLO1": ["PI‑1: Able to Identify engineering problem",
+             "PI‑2: Able to formulate a problem",
+             "PI‑3: Able to solve Problem"],
+    "SLO2": ["PI‑1: Able to design a system, component, or process",
+             "PI‑2: Able to design to meet desired needs",
+             "PI‑3: Able to design within realistic constraints"],
+    "SLO3": ["PI‑1: Generate appropriate graphics",
+             "PI‑2: Demonstrates adequate presentation skills",
+             "PI‑3: Applies technical writing skills",
+             "PI‑4: Contextualizes communication for intended audience"],
+    "SLO4": ["PI‑1: Recognize ethical and professional responsibilities in engineering situations",
+             "PI‑2: Make informed ethical and professional judgments",
+             "PI‑3: Consider the impact of engineering solutions in global, economic, environmental, and societal contexts"],
+    "SLO5": ["PI‑1: Establish goals",
+             "PI‑2: Plan tasks & meet deadlines",
+             "PI‑3: Fulfill duties of team roles",
+             "PI‑4: Shares work equally",
+             "PI‑5: Communicates effectively in a team setting",
+             "PI‑6: Proficient in all aspects of the project"],
+    "SLO6": ["PI‑1: Develops and conducts appropriate experimentation",
+             "PI‑2: Analyzes and interprets data",
+             "PI‑3: Evaluates appropriate findings to draw conclusions"],
+    "SLO7": ["PI‑1: Recognize the ongoing need to acquire new knowledge",
+             "PI‑2: Choose appropriate learning strategies to acquire new knowledge",
+             "PI‑3: Apply new knowledge appropriately"],
+}
+
+BLOOM_LEVELS = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
+
+
 # --------------------------------------------------------------------------- #
 # Database helper
 # --------------------------------------------------------------------------- #
-def init_db() -> None:
-    """Create the SQLite tables on first run."""
-    with sqlite3.connect(DB_NAME) as conn:
-        # -------- main production table --------
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS abet_entries (
-                id              INTEGER PRIMARY KEY AUTOINCREMENT,
-                course          TEXT,
-                course_name     TEXT,
-                slo             TEXT,
-                pi              TEXT,
-                assessment_tool TEXT,
-                explanation     TEXT,
-                semester        TEXT,
-                blooms_level    TEXT,
-                expert          REAL,
-                practitioner    REAL,
-                apprentice      REAL,
-                novice          REAL,
-                observations    TEXT
-            );
-        """)
-
-        # -------- per-user draft blob --------
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS user_drafts (
-                user  TEXT PRIMARY KEY,
-                blob  TEXT
-            );
-        """)
-
-# call it once at start-up
-init_db()
+# one submitted row per (course, semester, SLO, PI, Bloom level, tool)
+NATURAL_KEY = ("course", "semester", "slo", "pi", "blooms_level", "assessment_tool")
+NATURAL_KEY_INDEX = "ux_abet_entries_natural_key"
+
+# Re-submitting a key replaces the old row.  REPLACE deletes it and inserts
+# the new one under a fresh (larger) id, so rows are never edited in place
+# and (COUNT, MAX(id)) still identifies the data for the figure cache.
+UPSERT_SQL = """
+    INSERT OR REPLACE INTO abet_entries (
+        course, course_name, slo, pi,
+        assessment_tool, explanation,
+        semester, blooms_level,
+        expert, practitioner, apprentice, novice,
+        observations
+    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+# /submit mode "skip": a key that is already stored keeps its row.
+SKIP_SQL = """
+    INSERT OR IGNORE INTO abet_entries (
+        course, course_name, slo, pi,
+        assessment_tool, explanation,
+        semester, blooms_level,
+        expert, practitioner, apprentice, novice,
+        observations
+    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+# The unique index treats NULLs as distinct, so a NULL key column would let
+# duplicates in: these triggers make the key columns NOT NULL (SQLite
+# cannot add the constraint without rebuilding the table).
+NATURAL_KEY_NOT_NULL = " OR ".join(f"new.{c} IS NULL" for c in NATURAL_KEY)
+NATURAL_KEY_TRIGGERS = tuple(
+    f"""CREATE TRIGGER IF NOT EXISTS abet_entries_key_not_null_{op.lower()}
+        BEFORE {op} ON abet_entries WHEN {NATURAL_KEY_NOT_NULL} BEGIN
+            SELECT RAISE(ABORT, 'NOT NULL constraint failed: abet_entries natural key');
+        END"""
+    for op in ("INSERT", "UPDATE"))
+
+# Called after a /submit has committed, with the set of (course, slo) pairs
+# it wrote – main.py registers the analysis warm-up here.  A hook that
+# raises is logged; the rows are saved either way.
+after_submit = []
+
+# Set by main.py to its sharedcache.SharedCache: load_records keeps the
+# serialised submitted rows there, keyed on the data stamp of the courses.
+records_cache = None
+
+
+def dedupe_entries(conn) -> int:
+    """
+    Keep the newest row (largest id) per NATURAL_KEY and delete the rest;
+    NULL and '' count as the same value.  One grouped pass builds the set
+    of ids to keep; each row is then an indexed lookup against it.
+    Returns the number of rows deleted.
+    """
+    keys = ", ".join(f"COALESCE({c}, '')" for c in NATURAL_KEY)
+    return conn.execute(f"""
+        DELETE FROM abet_entries
+         WHERE id NOT IN (SELECT MAX(id) FROM abet_entries GROUP BY {keys})
+    """).rowcount
+
+
+def init_db(conn) -> None:
+    """Create the portal tables (migrate.py runs this once per deploy)."""
+    # -------- main production table --------
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS abet_entries (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            course          TEXT,
+            course_name     TEXT,
+            slo             TEXT,
+            pi              TEXT,
+            assessment_tool TEXT,
+            explanation     TEXT,
+            semester        TEXT,
+            blooms_level    TEXT,
+            expert          REAL,
+            practitioner    REAL,
+            apprentice      REAL,
+            novice          REAL,
+            observations    TEXT
+        );
+    """)
+
+    # -------- natural-key uniqueness: dedupe once, then enforce --------
+    have_key = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name=?",
+        (NATURAL_KEY_INDEX,)).fetchone()
+    if not have_key:
+        dedupe_entries(conn)
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {NATURAL_KEY_INDEX} "
+                     f"ON abet_entries ({', '.join(NATURAL_KEY)})")
+
+    # -------- per-user draft blob --------
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_drafts (
+            user  TEXT PRIMARY KEY,
+            blob  TEXT
+        );
+    """)
+
+def require_natural_key(conn) -> None:
+    """
+    Make the NATURAL_KEY columns NOT NULL: rows that only differ by NULL vs.
+    '' are deduped (newest wins), NULLs become '', and the triggers reject
+    new NULLs.
+    """
+    dedupe_entries(conn)
+    for c in NATURAL_KEY:
+        conn.execute(f"UPDATE abet_entries SET {c} = '' WHERE {c} IS NULL")
+    for sql in NATURAL_KEY_TRIGGERS:
+        conn.execute(sql)
+
+# no database I/O at import: `python migrate.py` (or gunicorn.conf.py, in
+# the master before the workers fork) creates and upgrades the tables
 
 # --------------------------------------------------------------------------- #
 # Flask application
@@ -222,6 +362,29 @@ footer.copyright{
 
 .tr-submitted{ background:#e8fbe8; }  /* soft green  */
 .tr-draft    { background:#fff8e6; }  /* soft amber */
+
+/* ----- submitted records: compact, windowed list --------------- */
+.sub{
+  width:100%;max-width:1800px;margin-top:2rem;background:#fff;
+  border-radius:12px;box-shadow:0 4px 10px rgba(0,0,0,.06);overflow:hidden;
+}
+.sub-bar{display:flex;gap:1rem;align-items:center;padding:.7rem 1rem;background:var(--hdr)}
+.sub-title{font-weight:600;white-space:nowrap}
+.sub-bar input{max-width:420px}
+.sub-viewport{position:relative;height:60vh;overflow-y:auto}
+.sub-window{position:absolute;top:0;left:0;right:0}
+.sub-row{
+  display:grid;height:34px;align-items:center;              /* = SUB_ROW_H */
+  grid-template-columns:90px 60px 2fr 100px 90px 1.2fr 48px 48px 48px 48px 3fr 60px;
+  border-top:1px solid #e5e5e5;background:#e8fbe8;font-size:.85rem;
+}
+.sub-row span{padding:0 .4rem;white-space:nowrap;overflow:hidden;text-overflow:ellipsis}
+.sub-row .n{text-align:right}
+.sub-head{background:#f0f0f0;font-weight:600;border-top:none}
+.sub-edit{
+  width:auto;padding:.15rem .5rem;font-size:.8rem;border:1px solid #bbb;
+  border-radius:6px;background:#fff;cursor:pointer;
+}
     
 </style>
 </head>
@@ -364,6 +527,24 @@ footer.copyright{
   <button class="btn save"   onclick="saveDraft()">💾 Save Draft</button>
   <button class="btn submit" onclick="submitForm()">📤 Submit</button>
 </div>
+
+<!-- submitted rows: read-only, windowed (only the rows in view exist) -->
+<section id="submitted" class="sub" hidden>
+  <div class="sub-bar">
+    <span class="sub-title">Submitted records (<span id="subCount">0</span>)</span>
+    <input id="subFilter" type="search" placeholder="Filter: course, SLO, semester, PI, tool…"
+           oninput="filterSubmitted()">
+  </div>
+  <div class="sub-row sub-head">
+    <span>Course</span><span>SLO</span><span>PI</span><span>Semester</span><span>Bloom</span>
+    <span>Tool</span><span class="n">E</span><span class="n">P</span><span class="n">A</span>
+    <span class="n">N</span><span>Observations</span><span></span>
+  </div>
+  <div id="subViewport" class="sub-viewport">
+    <div id="subSpacer"></div>
+    <div id="subWindow" class="sub-window"></div>
+  </div>
+</section>
 </main>
 
 <!-- put this immediately *after* </main> and before </body> -->
@@ -524,78 +705,16 @@ function updateDeleteButtons(){
 document.addEventListener('DOMContentLoaded', ()=>{
   document.querySelectorAll('select.course').forEach(filterCourses);
   updateDeleteButtons();                    // ← keep the delete rule
-
-  /* ──────────────────────────────────────────────────────────────────────────
-   * 2)  NEW  fetch BOTH submitted rows and drafts from /load_records
-   * ──────────────────────────────────────────────────────────────────────── */
-  fetch('load_records')                     // <-- endpoint in Flask
-    .then(r=>r.ok ? r.json() : Promise.reject(r.status))
-    .then(data=>renderRecords(data.rows || []))
-    .catch(()=>console.warn('No records found for this user.'));
 });
 
-/* ────────────────────────────────────────────────────────────────────────────────
- * 3)  renderRecords    – creates exactly N row-pairs and colours them
- * ────────────────────────────────────────────────────────────────────────────── */
-function ensurePairs(n){
-  const body = document.getElementById('body');
-  while(body.querySelectorAll('.input-row').length < n) addRow();
-  while(body.querySelectorAll('.input-row').length > n){
-    const ir = body.querySelector('.input-row:last-of-type');
-    ir.nextElementSibling.remove();
-    ir.remove();
-  }
-}
-
-function colourPair(ir, dr, status){
-  const clr = status === 'submitted' ? '#e8fbe8' :    /* green  */
-              status === 'draft'     ? '#fff8e6' :    /* amber  */
-                                        'transparent';
-  ir.style.backgroundColor = dr.style.backgroundColor = clr;
-}
-
-function renderRecords(records){
-  if(!records.length) return;
-  ensurePairs(records.length);
-
-  const inputRows = document.querySelectorAll('.input-row');
-  records.forEach((rec, i)=>{
-    const ir = inputRows[i];
-    const dr = ir.nextElementSibling;
-
-    /* selector row -------------------------------------------------------- */
-    ir.querySelector('.course').value      = rec.course;      syncCourse  (ir.querySelector('.course'));
-    ir.querySelector('.sloSel').value      = rec.slo;         syncSLO     (ir.querySelector('.sloSel'));
-    ir.querySelector('.semesterSel').value = rec.semester;    syncSemester(ir.querySelector('.semesterSel'));
-    ir.querySelector('.bloomSel').value    = rec.blooms_level;syncBloom   (ir.querySelector('.bloomSel'));
-
-    const piSel = ir.querySelector('.piSel');
-    if(piSel){ piSel.value = rec.pi; piChosen(piSel); }
-
-    /* data row ------------------------------------------------------------ */
-    dr.querySelector('.tool').value    = rec.assessment_tool;
-    dr.querySelector('.explan').value  = rec.explanation;
-    dr.querySelector('.obsTxt').value  = rec.observations;
-
-    const nums = dr.querySelectorAll('.inp');
-    nums[0].value = rec.expert;
-    nums[1].value = rec.practitioner;
-    nums[2].value = rec.apprentice;
-    nums[3].value = rec.novice;
-
-    colourPair(ir, dr, rec.status);
-  });
-
-  updateDeleteButtons();     // keep rule in sync after auto-load
-}
-
-/* add a new selector + data row pair */
-function addRow(){
+/* a blank selector + data row pair, not yet in the table */
+function newPair(){
   const body = document.getElementById('body');
   const ir   = body.querySelector('.input-row').cloneNode(true);
   const dr   = body.querySelector('.data-row').cloneNode(true);
 
   ir.querySelectorAll('select').forEach(s=>s.selectedIndex=0);
+  ir.querySelector('.pi-input').innerHTML = "";   // rebuilt by syncSLO
   dr.querySelectorAll('.sem-display').forEach(el=>el.textContent = "");
   dr.querySelector('.bloom-cell').textContent = "";
 
@@ -607,14 +726,17 @@ function addRow(){
   dr.querySelector('.sem-display').textContent = "";
   dr.querySelector('.cname-cell').textContent = "";
 
-  body.append(ir);
-  body.append(dr);
-  
   filterCourses(ir.querySelector('.course'));
-  
-  updateDeleteButtons();
   colourPair(ir, dr, 'new');   // remove any residual tint
-  
+  return [ir, dr];
+}
+
+/* add a new selector + data row pair */
+function addRow(){
+  const [ir, dr] = newPair();
+  document.getElementById('body').append(ir, dr);
+  updateDeleteButtons();
+  return [ir, dr];
 }
 
 /* validation helpers */
@@ -696,7 +818,8 @@ function saveDraft(){
     body   : JSON.stringify({rows: collect()})   // collect() already exists
   })
   .then(r=>r.json())
-  .then(js=>alert(`Draft saved on server (${js.saved} row${js.saved!==1?'s':''}).`))
+  .then(js=>alert(js.error ? `Draft not saved: ${js.error}`
+                           : `Draft saved on server (${js.saved} row${js.saved!==1?'s':''}).`))
   .catch(()=>alert('Unable to save draft right now.'));
 }
 
@@ -720,55 +843,135 @@ function colourPair(ir, dr, status){
 
 /* ================ build or reuse row pairs ========= */
 function ensurePairs(n){
-  const body = document.getElementById('body');
-  while(body.querySelectorAll('.input-row').length < n) addRow();
-  while(body.querySelectorAll('.input-row').length > n){
-    const ir = body.querySelector('.input-row:last-of-type');
-    ir.nextElementSibling.remove();
-    ir.remove();
+  const body  = document.getElementById('body');
+  const have  = body.querySelectorAll('.input-row').length;
+  const frag  = document.createDocumentFragment();   // one insertion for all
+  for(let i = have; i < n; i++) frag.append(...newPair());
+  body.append(frag);
+  const irs = body.querySelectorAll('.input-row');
+  for(let i = irs.length - 1; i >= Math.max(n, 1); i--){
+    irs[i].nextElementSibling.remove();
+    irs[i].remove();
   }
 }
 
-/* ================ populate all records ============= */
+/* ================ one record → one editable pair === */
+function fillPair(ir, dr, rec){
+  /* ---- selector row ---- */
+  ir.querySelector('.course').value      = rec.course;      syncCourse  (ir.querySelector('.course'));
+  ir.querySelector('.semesterSel').value = rec.semester;    syncSemester(ir.querySelector('.semesterSel'));
+  ir.querySelector('.sloSel').value      = rec.slo;         syncSLO     (ir.querySelector('.sloSel'));
+  ir.querySelector('.bloomSel').value    = rec.blooms_level;syncBloom   (ir.querySelector('.bloomSel'));
+
+  const piSel = ir.querySelector('.piSel');
+  if(piSel){ piSel.value = rec.pi; piChosen(piSel); }
+
+  /* ---- data row ---- */
+  dr.querySelector('.tool').value    = rec.assessment_tool;
+  dr.querySelector('.explan').value  = rec.explanation;
+  dr.querySelector('.obsTxt').value  = rec.observations;
+
+  const nums = dr.querySelectorAll('.inp');
+  nums[0].value = rec.expert;
+  nums[1].value = rec.practitioner;
+  nums[2].value = rec.apprentice;
+  nums[3].value = rec.novice;
+
+  /* ---- colour coding ---- */
+  colourPair(ir, dr, rec.status);
+}
+
+/* ================ populate all records ============= *
+ * drafts become editable pairs; submitted rows go to the read-only list
+ * below the buttons, which only ever builds the rows in view            */
 function renderRecords(records){
-  if(!records.length) return;
-  ensurePairs(records.length);
+  const drafts = records.filter(r => r.status !== 'submitted');
+  renderSubmitted(records.filter(r => r.status === 'submitted'));
+  if(!drafts.length) return;
+  ensurePairs(drafts.length);
 
   const inputRows = document.querySelectorAll('.input-row');
-  records.forEach((rec, idx)=>{
-    const ir = inputRows[idx];
-    const dr = ir.nextElementSibling;
-
-    /* ---- selector row ---- */
-    ir.querySelector('.course').value      = rec.course;      syncCourse  (ir.querySelector('.course'));
-    ir.querySelector('.semesterSel').value = rec.semester;    syncSemester(ir.querySelector('.semesterSel'));
-    ir.querySelector('.sloSel').value      = rec.slo;         syncSLO     (ir.querySelector('.sloSel'));
-    ir.querySelector('.bloomSel').value    = rec.blooms_level;syncBloom   (ir.querySelector('.bloomSel'));
-
-    const piSel = ir.querySelector('.piSel');
-    if(piSel){ piSel.value = rec.pi; piChosen(piSel); }
-
-    /* ---- data row ---- */
-    dr.querySelector('.tool').value    = rec.assessment_tool;
-    dr.querySelector('.explan').value  = rec.explanation;
-    dr.querySelector('.obsTxt').value  = rec.observations;
-
-    const nums = dr.querySelectorAll('.inp');
-    nums[0].value = rec.expert;
-    nums[1].value = rec.practitioner;
-    nums[2].value = rec.apprentice;
-    nums[3].value = rec.novice;
-
-    /* ---- colour coding ---- */
-    colourPair(ir, dr, rec.status);
-  });
+  drafts.forEach((rec, idx)=> fillPair(inputRows[idx], inputRows[idx].nextElementSibling, rec));
 
   updateDeleteButtons();          // keep last-row rule
 }
 
+/* ================ submitted rows: windowed list ==== */
+const SUB_ROW_H    = 34;          // px – must match .sub-row height
+const SUB_OVERSCAN = 8;           // rows drawn above/below the viewport
+let submitted = [];               // every submitted record, in order
+let shown     = [];               // indexes into `submitted` after the filter
+let drawQueued = false;
+
+function esc(v){
+  return String(v ?? '').replace(/[&<>"']/g,
+    c => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[c]));
+}
+
+function renderSubmitted(rows){
+  submitted = rows;
+  document.getElementById('submitted').hidden = !rows.length;
+  filterSubmitted();
+}
+
+function filterSubmitted(){
+  const q = norm(document.getElementById('subFilter').value);
+  shown = [];
+  submitted.forEach((r, i)=>{
+    if(!q || norm(`${r.course} ${r.slo} ${r.semester} ${r.pi} ${r.assessment_tool} ${r.blooms_level}`).includes(q))
+      shown.push(i);
+  });
+  document.getElementById('subCount').textContent =
+    q ? `${shown.length} of ${submitted.length}` : `${submitted.length}`;
+  document.getElementById('subSpacer').style.height = (shown.length * SUB_ROW_H) + 'px';
+  drawSubmitted();
+}
+
+/* rebuild just the visible slice – one innerHTML write per frame */
+function drawSubmitted(){
+  drawQueued = false;
+  const vp    = document.getElementById('subViewport');
+  const first = Math.max(0, Math.floor(vp.scrollTop / SUB_ROW_H) - SUB_OVERSCAN);
+  const last  = Math.min(shown.length,
+                         Math.ceil((vp.scrollTop + vp.clientHeight) / SUB_ROW_H) + SUB_OVERSCAN);
+  let html = '';
+  for(let k = first; k < last; k++){
+    const i = shown[k], r = submitted[i];
+    html += `<div class="sub-row">
+      <span>${esc(r.course)}</span><span>${esc(r.slo)}</span>
+      <span title="${esc(r.pi)}">${esc(r.pi)}</span><span>${esc(r.semester)}</span>
+      <span>${esc(r.blooms_level)}</span>
+      <span title="${esc(r.assessment_tool)}">${esc(r.assessment_tool)}</span>
+      <span class="n">${esc(r.expert)}</span><span class="n">${esc(r.practitioner)}</span>
+      <span class="n">${esc(r.apprentice)}</span><span class="n">${esc(r.novice)}</span>
+      <span title="${esc(r.observations)}">${esc(r.observations)}</span>
+      <span><button class="sub-edit" onclick="editSubmitted(${i})">Edit</button></span>
+    </div>`;
+  }
+  const win = document.getElementById('subWindow');
+  win.style.transform = `translateY(${first * SUB_ROW_H}px)`;
+  win.innerHTML = html;
+}
+
+function queueDraw(){
+  if(!drawQueued){ drawQueued = true; requestAnimationFrame(drawSubmitted); }
+}
+
+/* copy one submitted record into the editable grid (re-submitting it
+   replaces the stored row – same natural key) */
+function editSubmitted(i){
+  const irs = document.querySelectorAll('.input-row');
+  const last = irs[irs.length - 1];
+  const [ir, dr] = last.querySelector('.course').value ? addRow() : [last, last.nextElementSibling];
+  fillPair(ir, dr, submitted[i]);
+  ir.scrollIntoView({behavior:'smooth', block:'center'});
+}
+
 /* ================ page-load fetch ================== */
 document.addEventListener('DOMContentLoaded', ()=>{
   document.querySelectorAll('select.course').forEach(filterCourses);
+  document.getElementById('subViewport').addEventListener('scroll', queueDraw, {passive:true});
+  window.addEventListener('resize', queueDraw);
 
   fetch('load_records')
     .then(r=>r.json())
@@ -791,6 +994,7 @@ function submitForm(){
   body:JSON.stringify({rows: collect()})
 })
 .then(r=>{
+      if(r.status===400 || r.status===409) return r.json().then(js=>{ throw Error(js.error); });
       if(!r.ok) throw Error('Bad response');
       return r.json();
 })
@@ -804,37 +1008,11 @@ function submitForm(){
         alert('Submission finished, but row count not returned.');
       }
 })
-.catch(()=>alert('Submission error'));
+.catch(e=>alert(e.message==='Bad response' ? 'Submission error' : e.message));
 }
 
 /* --- SLO → PI list --- */
-const PI_MAP = {
-  SLO1: ["PI‑1: Able to Identify engineering problem",
-         "PI‑2: Able to formulate a problem",
-         "PI‑3: Able to solve Problem"],
-  SLO2: ["PI‑1: Able to design a system, component, or process",
-         "PI‑2: Able to design to meet desired needs",
-         "PI‑3: Able to design within realistic constraints"],
-  SLO3: ["PI‑1: Generate appropriate graphics",
-         "PI‑2: Demonstrates adequate presentation skills",
-         "PI‑3: Applies technical writing skills",
-         "PI‑4: Contextualizes communication for intended audience"],
-  SLO4: ["PI‑1: Recognize ethical and professional responsibilities in engineering situations",
-         "PI‑2: Make informed ethical and professional judgments",
-         "PI‑3: Consider the impact of engineering solutions in global, economic, environmental, and societal contexts"],
-  SLO5: ["PI‑1: Establish goals",
-         "PI‑2: Plan tasks & meet deadlines",
-         "PI‑3: Fulfill duties of team roles",
-         "PI‑4: Shares work equally",
-         "PI‑5: Communicates effectively in a team setting",
-         "PI‑6: Proficient in all aspects of the project"],
-  SLO6: ["PI‑1: Develops and conducts appropriate experimentation",
-         "PI‑2: Analyzes and interprets data",
-         "PI‑3: Evaluates appropriate findings to draw conclusions"],
-  SLO7: ["PI‑1: Recognize the ongoing need to acquire new knowledge",
-         "PI‑2: Choose appropriate learning strategies to acquire new knowledge",
-         "PI‑3: Apply new knowledge appropriately"]
-};
+const PI_MAP = {{ pi_map | tojson }};
 
 /* --- build a PI <select> --- */
 function makePiSelect(list){
@@ -889,24 +1067,7 @@ function syncSLO(sel){
   refreshPi(sel);                  // now also build PI dropdown
 }
 
-const COURSE_MAP = {
-  "MECE 1101": "Intro to ME",
-  "MECE 1221": "Engineering Graphics",
-  "MECE 2140": "Engineering Materials Lab",
-  "MECE 2302": "Dynamics",
-  "MECE 2340": "Engineering Materials",
-  "MECE 3170": "Thermal Fluids Laboratory",
-  "MECE 3315": "Fluid Mechanics",
-  "MECE 3320": "Measurements & Instrumentation",
-  "MECE 3336": "Thermodynamics II",
-  "MECE 3360": "Heat Transfer",
-  "MECE 3380": "Kinematics & Dynamics of Machines",
-  "MECE 3450": "Mechanical Engineering Analysis II",
-  "MECE 4350": "Machine Elements",
-  "MECE 4361": "Senior Design‑I",
-  "MECE 4362": "Senior Design‑II",
-  "PHIL 2393": "Philosophy"
-};
+const COURSE_MAP = {{ course_map | tojson }};
 
 </script>
 </body>
@@ -918,15 +1079,18 @@ const COURSE_MAP = {
 # --------------------------------------------------------------------------- #
 @app.route("/")
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    return render_template_string(HTML_TEMPLATE, course_map=COURSE_MAP, pi_map=PI_MAP)
 
 import json
 from flask import session
 # ---------- Save draft (overwrite any existing one) ---------- #
 @app.route("/save_draft", methods=["POST"])
 def save_draft():
-    rows  = request.get_json(force=True).get("rows", [])
-    blob  = json.dumps(rows)
+    try:
+        rows, _ = schema.decode(request.get_data(), schema.DraftRow)
+    except schema.SchemaError as exc:
+        return jsonify({"error": str(exc)}), 400
+    blob  = schema.encode(rows)
     user  = session["user"]            # set by the parent login app
     with sqlite3.connect(DB_NAME) as c:
         c.execute("INSERT OR REPLACE INTO user_drafts(user,blob) VALUES(?,?)",
@@ -940,7 +1104,9 @@ def load_draft():
     with sqlite3.connect(DB_NAME) as c:
         cur = c.execute("SELECT blob FROM user_drafts WHERE user=?", (user,))
         row = cur.fetchone()
-    return jsonify({"rows": json.loads(row[0]) if row else []})
+    # the blob is the JSON array save_draft stored – sent as it is
+    return app.response_class('{"rows":' + (row[0] if row else "[]") + "}\n",
+                              mimetype="application/json")
 
 @app.route("/load_records")
 def load_records():
@@ -975,64 +1141,77 @@ def load_records():
 
     with sqlite3.connect(DB_NAME) as conn:
         cur = conn.cursor()
-
-        # ---------- submitted rows --------------------------------------- #
-        if allowed:                               # faculty
-            placeholders = ",".join("?" * len(allowed))
-            sql = f"""
-                SELECT *, 'submitted' AS status
-                  FROM abet_entries
-                 WHERE course IN ({placeholders})
-            """
-            cur.execute(sql, allowed)
-        else:                                     # super-user
-            cur.execute("""
-                SELECT *, 'submitted' AS status
-                  FROM abet_entries
-              ORDER BY course ASC
-            """)
-
-        colnames   = [d[0] for d in cur.description]     # from the cursor
-        submitted  = [dict(zip(colnames, row)) for row in cur.fetchall()]
-
-        # ---------- draft blob ------------------------------------------- #
-        cur.execute("SELECT blob FROM user_drafts WHERE user=?", (user,))
-        row = cur.fetchone()
-        drafts = json.loads(row[0]) if row else []
-        for d in drafts:
-            d["status"] = "draft"
-
-    return jsonify({"rows": submitted + drafts})
+        placeholders = ",".join("?" * len(allowed))
+        where = f"WHERE course IN ({placeholders})" if allowed else ""   # [] → all
+
+        # ---------- submitted rows (cached as JSON per data stamp) ------- #
+        body, key = None, None
+        if records_cache is not None:
+            stamp = cur.execute(f"SELECT COUNT(*), MAX(id) FROM abet_entries {where}",
+                                allowed).fetchone()
+            key = json.dumps(["records", sorted(allowed), list(stamp)])
+            body = records_cache.get(key)
+
+        if body is None:
+            # one JSON object per row, written by SQLite (schema.EntryRow)
+            cur.execute(f"""
+                SELECT {schema.EntryRow.json_sql(status="'submitted'")}
+                  FROM abet_entries {where}
+                  {"" if allowed else "ORDER BY course ASC"}
+            """, allowed)
+            body = "[" + ",".join([r[0] for r in cur]) + "]"
+            if key is not None:
+                records_cache.put(key, body)
+
+        # ---------- draft rows, tagged status = 'draft' ------------------ #
+        drafts = [r[0] for r in cur.execute(
+            "SELECT json_set(d.value, '$.status', 'draft') "
+            "FROM user_drafts, json_each(user_drafts.blob) AS d WHERE user=?", (user,))]
+
+    # {"rows": submitted + drafts}, splicing the two JSON arrays
+    if drafts:
+        tail = "[" + ",".join(drafts) + "]"
+        body = (body[:-1] + "," + tail[1:]) if body != "[]" else tail
+    return app.response_class('{"rows":' + body + "}\n", mimetype="application/json")
 
 
 @app.route("/submit", methods=["POST"])
 def submit():
-    rows = request.get_json(force=True).get("rows", [])
+    """
+    Save the posted rows.  mode=upsert (default): a row whose natural key
+    is already stored replaces it.  mode=skip: such rows are left out and
+    counted as duplicates.  A body that does not fit schema.EntryRow is
+    refused whole with 400.
+    """
+    try:
+        rows, opts = schema.decode(request.get_data(), schema.EntryRow,
+                                   mode=("upsert", ("upsert", "skip")))
+    except schema.SchemaError as exc:
+        return jsonify({"error": str(exc)}), 400
+    mode = opts["mode"]
+
+    params = [r.astuple() for r in rows]         # UPSERT_SQL order, NBSP → space
+    sql = UPSERT_SQL if mode == "upsert" else SKIP_SQL
     with sqlite3.connect(DB_NAME) as conn:
-        for r in rows:
-            clean_course = r["course"].replace('\u00A0', ' ')  # NBSP → space
-            conn.execute(
-                """
-                INSERT INTO abet_entries (
-                    course, course_name, slo, pi,
-                    assessment_tool, explanation,
-                    semester, blooms_level,
-                    expert, practitioner, apprentice, novice,
-                    observations
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
-                """,
-                (
-                    clean_course,  # ← use the cleaned value here
-                    r["course_name"],
-                    r["slo"], r["pi"],
-                    r["assessment_tool"], r["explanation"],
-                    r["semester"], r["blooms_level"],
-                    r["expert"], r["practitioner"], r["apprentice"], r["novice"],
-                    r["observations"]
-                )
-            )
-            conn.commit()
-        return jsonify({"saved": len(rows)})
+        conn.execute("PRAGMA recursive_triggers = ON")   # REPLACE updates the search index
+        conn.execute("BEGIN IMMEDIATE")          # count and write as one unit
+        try:
+            archive.check_open(conn, {r.semester for r in rows})
+        except archive.ClosedTerm as exc:
+            conn.rollback()
+            return jsonify({"error": str(exc)}), 409
+        before = conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()[0]
+        conn.executemany(sql, params)
+        added = conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()[0] - before
+    touched = {(r.course, r.slo) for r in rows}
+    for hook in after_submit:
+        try:
+            hook(touched)
+        except Exception:
+            app.logger.exception("after_submit hook %r failed", hook)
+    if mode == "upsert":
+        return jsonify({"saved": len(rows), "replaced": len(rows) - added})
+    return jsonify({"saved": added, "duplicates": len(rows) - added})
 
 # --------------------------------------------------------------------------- #
 # Run the app
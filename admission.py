@@ -0,0 +1,136 @@
+# admission.py  – concurrency limit + load shedding for the analysis views
+"""
+A burst of analysis pop-ups must not pin every CPU with statsmodels and
+matplotlib while faculty are saving data.  `Gate` admits at most `limit`
+analysis computations at a time (cache hits never get here):
+
+  * up to `queue` more wait for a slot, each at most `max_wait` seconds;
+  * beyond that – or after waiting too long – `Overloaded` is raised and
+    the view answers with a stale chart or a fast 503 + Retry-After;
+  * while a write is running (`PriorityMiddleware`: /abet/submit,
+    /abet/save_draft, /admin/import) no new computation starts, so a save
+    is never queued behind a render; page loads, static files and
+    load_records / load_draft do not hold analyses off.
+
+Retry-After is estimated from the average computation time and the
+queue ahead.  Per process: with W workers up to W × limit computations
+run host-wide.
+
+Environment: ABET_ANALYSIS_LIMIT (2), ABET_ANALYSIS_QUEUE (4),
+ABET_ANALYSIS_MAX_WAIT (s, 10).
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from werkzeug.wrappers import Response
+
+
+class Overloaded(Exception):
+    """No slot for an analysis computation; `retry_after` in seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"analysis busy, retry after {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+class Gate:
+    def __init__(self, limit: int = 2, queue: int = 4, max_wait: float = 10.0):
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self._cv = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._priority = 0                # data-entry requests in progress
+        self._avg = 1.0                   # EWMA of computation seconds
+        self.counts = dict(admitted=0, queued=0, rejected=0, timed_out=0, stale_served=0)
+
+    def _free(self) -> bool:
+        return self._running < self.limit and not self._priority
+
+    def retry_after(self) -> float:
+        ahead = self._waiting + max(self._running - self.limit + 1, 1)
+        return min(max(math.ceil(self._avg * ahead / self.limit), 1), 30)
+
+    # ------------------------------------------------------------------ #
+    def run(self, fn, timeout: float = -1):
+        """
+        fn() once a slot is free.  `timeout` < 0 → max_wait with the queue
+        limit applied; None → wait as long as it takes (background work).
+        """
+        if timeout is not None and timeout < 0:
+            timeout = self.max_wait
+        with self._cv:
+            if not self._free():
+                if timeout is not None and self._waiting >= self.queue:
+                    self.counts["rejected"] += 1
+                    raise Overloaded(self.retry_after())
+                self._waiting += 1
+                self.counts["queued"] += 1
+                try:
+                    ok = self._cv.wait_for(self._free, timeout)
+                finally:
+                    self._waiting -= 1
+                if not ok:
+                    self.counts["timed_out"] += 1
+                    raise Overloaded(self.retry_after())
+            self._running += 1
+            self.counts["admitted"] += 1
+        t0 = time.monotonic()
+        try:
+            return fn()
+        finally:
+            with self._cv:
+                self._running -= 1
+                self._avg = 0.8 * self._avg + 0.2 * (time.monotonic() - t0)
+                self._cv.notify_all()
+
+    @contextmanager
+    def priority(self):
+        """Hold off new computations for the duration (a data-entry request)."""
+        with self._cv:
+            self._priority += 1
+        try:
+            yield
+        finally:
+            with self._cv:
+                self._priority -= 1
+                self._cv.notify_all()
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add to one of `counts` (e.g. stale_served, counted by the views)."""
+        with self._cv:
+            self.counts[name] += n
+
+    def stats(self) -> dict:
+        with self._cv:
+            return {"limit": self.limit, "running": self._running,
+                    "waiting": self._waiting, "priority_requests": self._priority,
+                    "avg_seconds": round(self._avg, 3), **self.counts}
+
+
+WRITE_PATHS = ("/abet/submit", "/abet/save_draft", "/admin/import")
+
+
+class PriorityMiddleware:
+    """Run the write requests (`paths`) inside gate.priority()."""
+
+    def __init__(self, app, gate: Gate, paths=WRITE_PATHS):
+        self.app = app
+        self.gate = gate
+        self.paths = frozenset(paths)
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").rstrip("/") not in self.paths:
+            return self.app(environ, start_response)
+        with self.gate.priority():        # Flask runs the view inside this call
+            return self.app(environ, start_response)
+
+
+def busy(retry_after: float):
+    return Response("The analysis server is busy – please try again in a few seconds.\n",
+                    status=503, headers={"Retry-After": str(int(retry_after))},
+                    mimetype="text/plain")
@@ -0,0 +1,382 @@
+# analysis.py  – estimators shared by the admin analysis views
+"""
+Trend estimation and Bloom-level summaries for the course-level analysis.
+
+The semester trend is normally a random-intercept mixed model
+(`attain ~ semester_idx`, one intercept per semester).  With only one or
+two semesters – or when every semester holds a single row – the
+random-intercept variance is not identifiable and `mixedlm` either warns,
+returns a singular covariance or just burns optimizer iterations.
+`fit_trend` checks the grouping first and falls back to a closed-form
+weighted least-squares line through the semester means in that case.
+
+The program-level trend (`fit_crossed`) pools every course of an SLO:
+`attain ~ semester_idx` with crossed random intercepts for course and
+semester, fitted by REML from sparse indicator design matrices.
+"""
+
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import scipy.stats as ss
+import statsmodels.formula.api as smf
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.stats import t as t_dist
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+# a random intercept needs a few groups, and some replication inside them
+MIN_GROUPS_FOR_LMM = 3
+MIN_ROWS_PER_GROUP = 2
+MAX_THETA = 1e3              # crossed fit: largest random sd / residual sd
+
+BLOOM_ORDER = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
+WHIS = 1.5                  # box-plot whisker reach, × IQR (matplotlib's default)
+
+
+class TrendFit:
+    """Result of `fit_trend` – the pieces the plots and annotations need."""
+
+    def __init__(self, estimator, intercept, slope, pvalue, cov, df_resid,
+                 random_effects, seconds, reason="", diagnostics=None):
+        self.estimator = estimator          # "lmm" | "wls"
+        self.intercept = intercept
+        self.slope = slope
+        self.pvalue = pvalue
+        self.cov = cov                      # 2×2 cov of (intercept, slope)
+        self.df_resid = df_resid
+        self.random_effects = random_effects  # pd.Series, index = sem_short
+                                              # ("crossed": (factor, level))
+        self.seconds = seconds
+        self.reason = reason                # why the fallback was chosen
+        self.diagnostics = diagnostics or {}  # optimizer state of the mixed model
+
+    @property
+    def label(self) -> str:
+        return {"lmm": "mixed-effects", "crossed": "crossed random effects"}.get(
+            self.estimator, "WLS")
+
+    def predict(self, x):
+        x = np.asarray(x, dtype=float)
+        return self.intercept + self.slope * x
+
+    def band(self, x, level: float = 0.95):
+        """Lower/upper confidence band of the fitted line at `x`."""
+        x = np.asarray(x, dtype=float)
+        X = np.column_stack([np.ones_like(x), x])
+        se = np.sqrt(np.einsum("ij,jk,ik->i", X, self.cov, X))
+        dof = self.df_resid if self.df_resid > 0 else np.nan
+        crit = t_dist.ppf(0.5 + level / 2, df=dof)
+        fit = self.predict(x)
+        return fit - crit * se, fit + crit * se
+
+    def __repr__(self):
+        return (f"TrendFit({self.estimator}, slope={self.slope:+.3f}, "
+                f"p={self.pvalue:.3f}, {self.seconds * 1e3:.1f} ms"
+                + (f", {self.reason}" if self.reason else "") + ")")
+
+
+# --------------------------------------------------------------------------- #
+# semesters
+# --------------------------------------------------------------------------- #
+def short_sem(sem: str) -> str:
+    """'Fall 2021' → 'F21', 'Spring 2022' → 'Sp22' (anything else unchanged)."""
+    try:
+        season, yr = sem.split()
+        tag = "F" if season.lower().startswith("f") else "Sp"
+        return f"{tag}{yr[-2:]}"
+    except ValueError:
+        return sem
+
+
+def sem_key(sem: str) -> int:
+    """Chronological sort key of a short semester tag."""
+    if sem.startswith("F"):
+        return int("20" + sem[1:]) * 2 + 1
+    elif sem.startswith("Sp"):
+        return int("20" + sem[2:]) * 2
+    return 10 ** 9
+
+
+# --------------------------------------------------------------------------- #
+# model selection
+# --------------------------------------------------------------------------- #
+def degenerate_reason(df: pd.DataFrame, groups: str = "sem_short") -> str:
+    """Return why a random-intercept fit is pointless here ('' if it isn't)."""
+    sizes = df.groupby(groups).size()
+    if len(sizes) < MIN_GROUPS_FOR_LMM:
+        return f"{len(sizes)} semester(s)"
+    if (sizes < MIN_ROWS_PER_GROUP).all():
+        return "one row per semester"
+    if df["attain"].nunique() < 2:
+        return "constant attainment"
+    return ""
+
+
+def fit_trend(df: pd.DataFrame, groups: str = "sem_short",
+              x: str = "semester_idx", y: str = "attain") -> TrendFit:
+    """
+    Fit `y ~ x` with a random intercept per `groups` when the data can
+    support it, otherwise (or if the optimizer fails) use closed-form WLS.
+    """
+    reason = degenerate_reason(df, groups)
+    if not reason:
+        t0 = time.perf_counter()
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")    # singular-cov chatter
+                warnings.simplefilter("error", ConvergenceWarning)
+                lmm = smf.mixedlm(f"{y} ~ {x}", data=df,
+                                  groups=groups).fit(method="lbfgs")
+                re = pd.Series({k: v.values[0]
+                                for k, v in lmm.random_effects.items()})
+            cov = lmm.cov_params().loc[["Intercept", x],
+                                       ["Intercept", x]].to_numpy()
+            return TrendFit(
+                "lmm",
+                intercept=float(lmm.params["Intercept"]),
+                slope=float(lmm.params[x]),
+                pvalue=float(lmm.pvalues[x]),
+                cov=cov,
+                df_resid=float(lmm.df_resid),
+                random_effects=re.sort_index(),
+                seconds=time.perf_counter() - t0,
+                diagnostics={"converged": bool(lmm.converged),
+                             "llf": float(lmm.llf),
+                             "re_var": float(lmm.cov_re.iloc[0, 0])},
+            )
+        except (ConvergenceWarning, ValueError, np.linalg.LinAlgError) as exc:
+            reason = f"mixedlm failed: {exc}"
+
+    return fit_wls(df, groups=groups, x=x, y=y, reason=reason)
+
+
+def fit_wls(df: pd.DataFrame, groups: str = "sem_short",
+            x: str = "semester_idx", y: str = "attain",
+            reason: str = "") -> TrendFit:
+    """
+    Weighted least squares of the semester means on `x`, weights = rows per
+    semester.  Same slope as row-level OLS, computed from the group sums.
+    """
+    t0 = time.perf_counter()
+    keys, first, codes = np.unique(df[groups].to_numpy(), return_index=True,
+                                   return_inverse=True)
+    yv = df[y].to_numpy(dtype=float)
+    fit = wls_from_sums(keys,
+                        x=df[x].to_numpy(dtype=float)[first],
+                        n=np.bincount(codes),
+                        ysum=np.bincount(codes, weights=yv),
+                        y2sum=np.bincount(codes, weights=yv * yv),
+                        reason=reason)
+    fit.seconds = time.perf_counter() - t0
+    return fit
+
+
+def wls_from_sums(keys, x, n, ysum, y2sum, reason: str = "") -> TrendFit:
+    """
+    The WLS fit from per-group sufficient statistics – row count, sum and
+    sum of squares of y – so SQL `GROUP BY` output can be fitted directly.
+    """
+    t0 = time.perf_counter()
+    xs = np.asarray(x, dtype=float)
+    w = np.asarray(n, dtype=float)
+    ysum = np.asarray(ysum, dtype=float)
+    y2sum = np.asarray(y2sum, dtype=float)
+    ybar = ysum / w
+    n_obs = w.sum()
+
+    X = np.column_stack([np.ones_like(xs), xs])
+    XtWX = X.T @ (X * w[:, None])
+    rank = np.linalg.matrix_rank(XtWX)
+    XtWX_inv = np.linalg.pinv(XtWX)
+    if rank < 2:                 # a single semester: no slope to speak of
+        beta = np.array([ysum.sum() / n_obs, 0.0])
+    else:
+        beta = XtWX_inv @ (X.T @ (w * ybar))
+
+    resid = ybar - X @ beta
+    df_resid = n_obs - rank
+    rss = (y2sum - ysum * ybar).sum() + (w * resid ** 2).sum()   # within + between
+    sigma2 = rss / df_resid if df_resid > 0 else np.nan
+    cov = sigma2 * XtWX_inv
+
+    pvalue = np.nan
+    if rank == 2 and df_resid > 0:
+        se = np.sqrt(cov[1, 1])
+        tstat = beta[1] / se if se > 0 else np.inf
+        pvalue = float(2 * t_dist.sf(abs(tstat), df=df_resid))
+
+    return TrendFit(
+        "wls",
+        intercept=float(beta[0]),
+        slope=float(beta[1]),
+        pvalue=pvalue,
+        cov=cov,
+        df_resid=float(df_resid),
+        # semester offsets from the line play the role of the random intercepts
+        random_effects=pd.Series(resid, index=keys),
+        seconds=time.perf_counter() - t0,
+        reason=reason,
+    )
+
+
+# --------------------------------------------------------------------------- #
+# crossed random effects
+# --------------------------------------------------------------------------- #
+def fit_crossed(df: pd.DataFrame, factors=("course", "sem_short"),
+                x: str = "semester_idx", y: str = "attain") -> TrendFit:
+    """
+    REML fit of `y ~ x` with one random intercept per level of each of the
+    crossed `factors`; the last factor is the grouping `x` varies over.
+
+    Z is a sparse 0/1 matrix with one column per factor level, so the only
+    pass over the rows builds the cross-products Z'Z, Z'X, Z'y, X'X, X'y,
+    y'y; every likelihood evaluation after that works on q×q matrices
+    (q = number of levels), whatever the row count.  The slope's t-test
+    uses the between-group df (levels of the last factor − 2), since `x`
+    is constant within them.  A factor with a single level (an SLO taught
+    in one course) is left out – its variance is the intercept's.  Too few
+    groups, an optimizer that does not converge or a singular system
+    (LinAlgError) → `fit_wls` with the reason, as in `fit_trend`.  The
+    relative sd's are bounded by MAX_THETA.
+    """
+    groups = factors[-1]
+    factors = [f for f in factors[:-1] if df[f].nunique() > 1] + [groups]
+    reason = degenerate_reason(df, groups)
+    if reason:
+        return fit_wls(df, groups=groups, x=x, y=y, reason=reason)
+
+    t0 = time.perf_counter()
+    n = len(df)
+    yv = df[y].to_numpy(dtype=float)
+    X = np.column_stack([np.ones(n), df[x].to_numpy(dtype=float)])
+    levels, blocks = [], []
+    for f in factors:
+        keys, codes = np.unique(df[f].to_numpy(), return_inverse=True)
+        levels.append(keys)
+        blocks.append(sp.csr_matrix((np.ones(n), (np.arange(n), codes)),
+                                    shape=(n, len(keys))))
+    Z = sp.hstack(blocks, format="csc")
+    sizes = [len(k) for k in levels]
+
+    ZtZ = (Z.T @ Z).toarray()
+    ZtX, Zty = Z.T @ X, Z.T @ yv
+    XtX, Xty, yty = X.T @ X, X.T @ yv, yv @ yv
+    p, q = X.shape[1], Z.shape[1]
+    eye = np.eye(q)
+
+    def solve(theta):
+        """Relative sd's θ (random sd / residual sd) → the profiled pieces."""
+        d = np.repeat(theta, sizes)
+        cho = cho_factor(eye + d[:, None] * ZtZ * d[None, :])
+        A, a = d[:, None] * ZtX, d * Zty
+        MA, Ma = cho_solve(cho, A), cho_solve(cho, a)
+        XHX, XHy = XtX - A.T @ MA, Xty - A.T @ Ma
+        beta = np.linalg.solve(XHX, XHy)
+        rss = (yty - a @ Ma) - beta @ XHy
+        return d, cho, XHX, beta, rss
+
+    def reml(theta):
+        _, cho, XHX, _, rss = solve(theta)
+        if rss <= 0:
+            return np.inf
+        return (2 * np.log(np.diag(cho[0])).sum() + np.linalg.slogdet(XHX)[1]
+                + (n - p) * (1 + np.log(2 * np.pi * rss / (n - p))))
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # inf steps at the bounds
+            opt = minimize(reml, np.ones(len(factors)), method="L-BFGS-B",
+                           bounds=[(0, MAX_THETA)] * len(factors))
+        if not opt.success or not np.isfinite(opt.fun):
+            raise ValueError(opt.message)
+        theta = opt.x
+        d, cho, XHX, beta, rss = solve(theta)
+        if rss <= 0:
+            raise ValueError("no residual variance")
+        sigma2 = rss / (n - p)
+        cov = sigma2 * np.linalg.inv(XHX)
+        b = d * cho_solve(cho, d * (Zty - ZtX @ beta))     # BLUPs
+    except (np.linalg.LinAlgError, ValueError) as exc:
+        return fit_wls(df, groups=groups, x=x, y=y, reason=f"crossed fit failed: {exc}")
+    df_resid = float(sizes[-1] - 2)
+    pvalue = np.nan
+    if df_resid > 0 and cov[1, 1] > 0:
+        pvalue = float(2 * t_dist.sf(abs(beta[1]) / np.sqrt(cov[1, 1]), df=df_resid))
+
+    index = pd.MultiIndex.from_tuples([(f, k) for f, keys in zip(factors, levels)
+                                       for k in keys])
+    return TrendFit(
+        "crossed",
+        intercept=float(beta[0]),
+        slope=float(beta[1]),
+        pvalue=pvalue,
+        cov=cov,
+        df_resid=df_resid,
+        random_effects=pd.Series(b, index=index),
+        seconds=time.perf_counter() - t0,
+        diagnostics={"converged": True, "reml": float(opt.fun),
+                     "iterations": int(opt.nit), "resid_var": float(sigma2),
+                     **{f"{f}_var": float(sigma2 * t * t) for f, t in zip(factors, theta)}},
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Bloom levels
+# --------------------------------------------------------------------------- #
+class BloomSummary:
+    """Result of `bloom_summary` – everything the Bloom box-plot panel draws."""
+
+    def __init__(self, boxes, kruskal_p, cliffs_delta):
+        self.boxes = boxes                  # ax.bxp stats dicts, BLOOM_ORDER
+        self.kruskal_p = kruskal_p          # None with fewer than two levels
+        self.cliffs_delta = cliffs_delta    # Analyze vs. the rest, or None
+
+    def __repr__(self):
+        levels = ", ".join(f"{b['label']}={b['n']}" for b in self.boxes)
+        return f"BloomSummary({levels}, kw_p={self.kruskal_p}, delta={self.cliffs_delta})"
+
+
+def box_stats(values, label: str = "") -> dict:
+    """
+    One box of `ax.bxp` – the same quartiles, whiskers and fliers as
+    `ax.boxplot` – plus n, mean and sd for the record.
+    """
+    x = np.asarray(values, dtype=float)
+    q1, med, q3 = np.percentile(x, [25, 50, 75])
+    iqr = q3 - q1
+    lo = x[x >= q1 - WHIS * iqr]
+    hi = x[x <= q3 + WHIS * iqr]
+    whislo = min(lo.min(), q1) if lo.size else q1
+    whishi = max(hi.max(), q3) if hi.size else q3
+    return {"label": label, "n": int(x.size), "mean": float(x.mean()),
+            "sd": float(x.std(ddof=1)) if x.size > 1 else float("nan"),
+            "q1": float(q1), "med": float(med), "q3": float(q3),
+            "whislo": float(whislo), "whishi": float(whishi),
+            "fliers": x[(x < whislo) | (x > whishi)]}
+
+
+def bloom_summary(attain, blooms_level) -> BloomSummary:
+    """
+    Per-Bloom-level box statistics of `attain`, Kruskal–Wallis across the
+    levels and Cliff's Δ (rank-biserial) of Analyze against all other rows.
+    Levels outside BLOOM_ORDER get no box but count as "others".
+    """
+    attain = np.asarray(attain, dtype=float)
+    level = pd.Series(blooms_level).astype(str).str.strip().to_numpy()
+    groups = [(lvl, attain[level == lvl]) for lvl in BLOOM_ORDER]
+    groups = [(lvl, g) for lvl, g in groups if g.size]
+
+    kw_p = (float(ss.kruskal(*(g for _, g in groups)).pvalue)
+            if len(groups) > 1 else None)
+
+    analyze, others = attain[level == "Analyze"], attain[level != "Analyze"]
+    delta = None
+    if analyze.size and others.size:
+        U = ss.mannwhitneyu(analyze, others, alternative="two-sided").statistic
+        delta = float(2 * U / (analyze.size * others.size) - 1)
+
+    return BloomSummary([box_stats(g, lvl) for lvl, g in groups], kw_p, delta)
@@ -0,0 +1,183 @@
+# archive.py  – closed semesters moved out of the live table
+"""
+Past terms never change, yet every /submit index update, every snapshot
+copy and every load_records stamp query ran over all of them.  Closing a
+semester moves its rows out of `abet_entries` into a per-year archive
+file (ABET_ARCHIVE_DIR/abet_<year>.db) and records it in `closed_terms`:
+
+  * the move is one transaction over the live database and the ATTACHed
+    archive, so a row is in exactly one of them at any time;
+  * rows keep their ids, so (COUNT, MAX(id)) data stamps – figure cache,
+    shared cache – are the same before and after;
+  * /submit and ingest refuse rows for a closed semester;
+  * each archive has its own full-text index (search.py), rebuilt when a
+    term is added to it.
+
+Readers that want every term (the columnar cache behind the analyses and
+/download) call `attach(conn)`: the archives are ATTACHed read-only and
+the returned FROM source is the live table UNION ALL the archived rows of
+the terms `conn`'s database lists as closed – so a snapshot taken before a
+close never sees a row twice.  The columnar cache behind the analyses uses
+`archived(conn)` instead: it reads the archived rows (and their ids) once
+per version of closed_terms, and each later sync queries only the live
+table.  load_records and the write path see only the open terms.
+
+    python archive.py close "Fall 2023"
+    python archive.py list
+"""
+
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from urllib.parse import quote
+
+import search
+ARCHIVE_DIR = os.environ.get("ABET_ARCHIVE_DIR", "archive")
+LIVE_TABLE = "abet_entries"
+
+CLOSED_TERMS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS closed_terms (
+        semester   TEXT PRIMARY KEY,
+        archive    TEXT NOT NULL,      -- file name in ARCHIVE_DIR
+        rows       INTEGER NOT NULL,
+        closed_at  REAL NOT NULL
+    );
+"""
+
+
+class ClosedTerm(ValueError):
+    """Rows were submitted for a semester that has been archived."""
+
+
+def archive_file(semester: str) -> str:
+    """'Fall 2023' → 'abet_2023.db' (one archive per calendar year)."""
+    m = re.search(r"(\d{4})$", semester.strip())
+    if not m:
+        raise ValueError(f"no year in semester {semester!r}")
+    return f"abet_{m.group(1)}.db"
+
+
+def closed_terms(conn) -> set:
+    return {r[0] for r in conn.execute("SELECT semester FROM closed_terms")}
+
+
+def check_open(conn, semesters) -> None:
+    """Raise ClosedTerm if any of `semesters` has been archived."""
+    shut = sorted(set(semesters) & closed_terms(conn))
+    if shut:
+        raise ClosedTerm(f"{', '.join(shut)} is closed – rows are archived")
+
+
+# --------------------------------------------------------------------------- #
+# close
+# --------------------------------------------------------------------------- #
+def close_semester(db: str, semester: str, archive_dir: str = ARCHIVE_DIR) -> int:
+    """Move every row of `semester` into its archive; returns the row count."""
+    name = archive_file(semester)
+    os.makedirs(archive_dir, exist_ok=True)
+    with closing(sqlite3.connect(db, isolation_level=None, timeout=30)) as conn:
+        conn.execute("ATTACH ? AS arch", (os.path.join(archive_dir, name),))
+        cols = _columns(conn)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS arch.{LIVE_TABLE} AS "
+                     f"SELECT {cols} FROM main.{LIVE_TABLE} WHERE 0")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS arch.ux_archive_id "
+                     f"ON {LIVE_TABLE} (id)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS arch.ix_archive_semester "
+                     f"ON {LIVE_TABLE} (semester)")
+
+        conn.execute("BEGIN IMMEDIATE")   # blocks /submit until the move is done
+        try:
+            if semester in closed_terms(conn):
+                raise ClosedTerm(f"{semester} is already closed")
+            n = conn.execute(f"INSERT INTO arch.{LIVE_TABLE} SELECT {cols} "
+                             f"FROM main.{LIVE_TABLE} WHERE semester = ?",
+                             (semester,)).rowcount
+            search.create(conn, "arch", triggers=False)   # a year is a few thousand rows
+            conn.execute(f"DELETE FROM main.{LIVE_TABLE} WHERE semester = ?", (semester,))
+            conn.execute("INSERT INTO main.closed_terms (semester, archive, rows, closed_at) "
+                         "VALUES (?,?,?,?)", (semester, name, n, time.time()))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    return n
+
+
+# --------------------------------------------------------------------------- #
+# read
+# --------------------------------------------------------------------------- #
+def attach(conn, archive_dir: str = ARCHIVE_DIR) -> str:
+    """
+    ATTACH (read-only) the archives `conn`'s closed_terms refers to; → the
+    FROM source of every row, live and archived, in the live column order.
+    """
+    parts = _archived_selects(conn, archive_dir)
+    if not parts:
+        return LIVE_TABLE
+    return ("(" + " UNION ALL ".join([f"SELECT {_columns(conn)} FROM main.{LIVE_TABLE}"] + parts)
+            + ")")
+
+
+def archived(conn, archive_dir: str = ARCHIVE_DIR) -> tuple:
+    """
+    (version, source): `version` identifies the closed terms (one small
+    query on main); `source()` ATTACHes the archives and returns the FROM
+    source of the archived rows alone, or None if no term is closed.
+    """
+    version = tuple(conn.execute(
+        "SELECT semester, archive, rows FROM closed_terms ORDER BY semester"))
+
+    def source():
+        parts = _archived_selects(conn, archive_dir)
+        return "(" + " UNION ALL ".join(parts) + ")" if parts else None
+    return version, source
+
+
+def _archived_selects(conn, archive_dir) -> list:
+    """ATTACH the archives; → one SELECT of the closed-term rows per file."""
+    files = [r[0] for r in conn.execute(
+        "SELECT DISTINCT archive FROM closed_terms ORDER BY archive")]
+    if not files:
+        return []
+    attached = {r[1] for r in conn.execute("PRAGMA database_list")}
+    cols = _columns(conn)
+    parts = []
+    for i, name in enumerate(files):
+        schema = f"archive_{i}"
+        if schema not in attached:
+            path = os.path.abspath(os.path.join(archive_dir, name))
+            conn.execute(f"ATTACH ? AS {schema}", (f"file:{quote(path)}?mode=ro",))
+        parts.append(f"SELECT {cols} FROM {schema}.{LIVE_TABLE} WHERE semester IN "
+                     f"(SELECT semester FROM main.closed_terms WHERE archive = "
+                     f"'{name.replace(chr(39), chr(39) * 2)}')")
+    return parts
+
+
+def _columns(conn) -> str:
+    return ", ".join(r[1] for r in conn.execute(f"PRAGMA main.table_info({LIVE_TABLE})"))
+
+
+if __name__ == "__main__":
+    import sys
+    from ABET_Data_Rev1 import DB_NAME
+
+    import migrate
+    migrate.run()
+    if sys.argv[1:2] == ["close"] and len(sys.argv) == 3:
+        t0 = time.perf_counter()
+        n = close_semester(DB_NAME, sys.argv[2])
+        print(f"{sys.argv[2]}: {n} rows → {os.path.join(ARCHIVE_DIR, archive_file(sys.argv[2]))}"
+              f" ({(time.perf_counter() - t0) * 1e3:.0f} ms)")
+    elif sys.argv[1:] == ["list"]:
+        with closing(sqlite3.connect(DB_NAME)) as conn:
+            for sem, name, n, at in conn.execute(
+                    "SELECT semester, archive, rows, closed_at FROM closed_terms "
+                    "ORDER BY closed_at"):
+                print(f"{sem:>12}  {n:>7} rows  {name}  closed "
+                      f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(at))}")
+            live = conn.execute(f"SELECT COUNT(*) FROM {LIVE_TABLE}").fetchone()[0]
+            print(f"{'open terms':>12}  {live:>7} rows  {DB_NAME}")
+    else:
+        sys.exit(__doc__)
@@ -0,0 +1,59 @@
+# asgi.py  – ASGI entry point for the portal (experimental)
+"""
+EXPERIMENTAL – not the deployment path.  Render (.render.yaml) and every
+production setup run `gunicorn main:app`.  Measured with
+`bench.py load`, this entry point was a regression, not a gain: 60 req/s
+at a p99 of 26.8 s, against 222 req/s at 2.7 s for gunicorn.  The threads
+of one process contend for the GIL, and renders queue for the pool.
+Concurrent misses on one chart are rendered once (singleflight in
+main.shared_figure), and the figure LRU is locked, but do not switch until
+`bench.py load` says otherwise.
+
+Run:
+    pip install asgiref uvicorn
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+One event loop per process accepts connections.  Each request runs the
+existing Flask/WSGI stack on a thread of a shared pool (ABET_DB_THREADS,
+default 32), so blocking SQLite reads wait on a thread, not on the loop.
+Matplotlib renders are CPU-bound and pyplot is not thread-safe, so they
+go to ABET_RENDER_PROCESSES worker processes through `main.run_render`.
+The default is ABET_ANALYSIS_LIMIT (2).  The gate never admits more
+renders than that per process, so a pool per CPU only held idle
+matplotlib imports.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("ABET_RENDER_PROCESSES", os.environ.get("ABET_ANALYSIS_LIMIT", "2"))
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance  # noqa: E402
+
+import migrate  # noqa: E402
+
+migrate.run()               # no gunicorn master here; the first worker migrates, the rest wait and skip
+
+import main  # noqa: E402
+
+DB_THREADS = int(os.environ.get("ABET_DB_THREADS", "32"))
+_wsgi_pool = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="wsgi")
+
+
+class _PooledInstance(WsgiToAsgiInstance):
+    # asgiref's default is thread_sensitive=True, which funnels every
+    # request through one thread; the Flask apps keep no thread state, so
+    # let them run concurrently on the pool instead.
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__["run_wsgi_app"].func,
+                                 thread_sensitive=False, executor=_wsgi_pool)
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _PooledInstance(self.wsgi_application,
+                              self.duplicate_header_limit)(scope, receive, send)
+
+
+app = PooledWsgiToAsgi(main.application)
+main.render_pool()          # spawn + warm the render workers before traffic
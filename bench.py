@@ -0,0 +1,860 @@
+# bench.py  – ad-hoc timings for the analysis / portal hot paths
+"""
+Run:
+    python bench.py trend          # mixed model vs. closed-form WLS
+    python bench.py panels         # PI / PI×Bloom bar panels, SLO5-sized
+    python bench.py bloom          # Bloom box panel: per-request vs. stored stats
+    python bench.py profiles       # analysis figure per output profile
+    python bench.py auth           # per-request session/auth overhead
+    python bench.py compress [MBIT]
+                                   # /download table: identity vs gzip vs br
+    python bench.py snapshot       # submit latency while reports read
+    python bench.py columnar [ROWS]
+                                   # analysis reads: SQL vs. columnar cache
+    python bench.py login [BUDGET_MS]
+                                   # password check latency per ABET_HASH_COST
+    python bench.py archive [ROWS]
+                                   # live table with every term vs. past terms archived
+    python bench.py search [ROWS]    # FTS5 queries on observations, index upkeep per submit
+    python bench.py rows [ROWS]      # JSON routes: dicts + jsonify vs. schema.py rows
+    python bench.py program [ROWS]   # one SLO, all courses: 16 course fits vs. the
+                                   # crossed model, dense statsmodels vs. sparse
+    python bench.py boot [WORKERS]
+                                   # worker start-up: DDL per worker vs. migrate.py
+    python bench.py load URL [USERS] [SECONDS]
+                                   # concurrent faculty/admin traffic against a
+                                   # running server (gunicorn, or the experimental
+                                   # uvicorn asgi:app)
+Each benchmark prints a small table; only `load` talks to a live server.
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def timeit(fn, repeat: int = 7) -> float:
+    """Best-of-`repeat` wall time of `fn()` in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def synthetic_course(n_sem: int, rows_per_sem: int, seed: int = 0) -> pd.DataFrame:
+    """Attainment rows shaped like one course/SLO after `analyze_course` prep."""
+    rng = np.random.default_rng(seed)
+    sem = np.repeat(np.arange(n_sem), rows_per_sem)
+    attain = 60 + 1.5 * sem + rng.normal(0, 8, sem.size) \
+        + np.repeat(rng.normal(0, 3, n_sem), rows_per_sem)
+    return pd.DataFrame({"semester_idx": sem,
+                         "sem_short": [f"S{i:02d}" for i in sem],
+                         "attain": attain})
+
+
+# --------------------------------------------------------------------------- #
+# benchmarks
+# --------------------------------------------------------------------------- #
+def bench_trend():
+    import warnings
+    import statsmodels.formula.api as smf
+    import analysis
+
+    def lmm(df):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            smf.mixedlm("attain ~ semester_idx", data=df,
+                        groups="sem_short").fit(method="lbfgs")
+
+    print(f"{'semesters':>9} {'rows/sem':>8} {'mixedlm ms':>11} "
+          f"{'WLS ms':>8} {'fit_trend':>10}")
+    for n_sem, per in [(1, 6), (2, 6), (4, 6), (8, 6), (8, 60), (16, 600)]:
+        df = synthetic_course(n_sem, per)
+        t_lmm = timeit(lambda: lmm(df)) if n_sem > 1 else float("nan")
+        t_wls = timeit(lambda: analysis.fit_wls(df))
+        chosen = analysis.fit_trend(df).estimator
+        print(f"{n_sem:>9} {per:>8} {t_lmm:>11.1f} {t_wls:>8.2f} {chosen:>10}")
+
+
+def synthetic_slo(n_pi: int = 6, n_sem: int = 8, rows_per_cell: int = 3,
+                  seed: int = 0) -> pd.DataFrame:
+    """Raw abet_entries-like rows for one course/SLO (SLO5 has six PIs)."""
+    rng = np.random.default_rng(seed)
+    blooms = ["Understand", "Apply", "Analyze", "Evaluate"]
+    rows = []
+    for p in range(n_pi):
+        for s in range(n_sem):
+            for r in range(rows_per_cell):
+                rows.append({
+                    "pi": f"PI-{p + 1}: Able to do thing {p + 1}",
+                    "semester": f"{'Fall' if s % 2 == 0 else 'Spring'} {2020 + (s + 1) // 2}",
+                    "sem_short": f"{'F' if s % 2 == 0 else 'Sp'}{20 + (s + 1) // 2}",
+                    "blooms_level": blooms[(p + r) % len(blooms)],
+                    "attain": float(rng.uniform(40, 95)),
+                })
+    return pd.DataFrame(rows)
+
+
+def _legacy_panels(ax1, ax2, df, pivot1, pivot2, pis, greens, reds):
+    """The pre-vectorisation panel code (list comprehensions + ax.text)."""
+    import plots
+
+    def short_pi(txt):
+        return txt.split(":")[0].strip()
+
+    combo_order = []
+    for pi_full in pis:
+        pi_tag = short_pi(pi_full)
+        seen = set()
+        for lvl in df.loc[df.pi == pi_full, "blooms_level"]:
+            if lvl not in seen:
+                combo_order.append(f"{pi_tag} ({lvl})")
+                seen.add(lvl)
+
+    semesters = pivot1.index.tolist()
+    x1 = np.arange(len(semesters))
+    bar_w1 = 0.8 / len(pis)
+    for i, pi in enumerate(pis):
+        vals = pivot1[pi].values
+        colours = [greens[i] if v >= 70 else reds[i] for v in vals]
+        bars = ax1.bar(x1 - 0.4 + (i + 0.5) * bar_w1, vals, width=bar_w1,
+                       color=colours, edgecolor="#333", linewidth=.5)
+        ax1.bar_label(bars, fmt="%.0f", padding=2, fontsize=9, color="#222")
+
+    x2 = np.arange(len(combo_order))
+    bar_w2 = 0.8 / len(semesters)
+    for j, sem in enumerate(semesters):
+        vals = pivot2[sem].values
+        pos = x2 - 0.4 + (j + 0.5) * bar_w2
+        pi_index = {short_pi(p): i for i, p in enumerate(pis)}
+        pi_tag_for_combo = [c.split(" (")[0] for c in combo_order]
+        colours = [greens[pi_index[tag]] if v >= 70 else reds[pi_index[tag]]
+                   for tag, v in zip(pi_tag_for_combo, vals)]
+        ax2.bar(pos, vals, width=bar_w2, color=colours,
+                edgecolor="#333", linewidth=.5)
+        for x, y in zip(pos, vals):
+            ax2.text(x, y + 1.2, f"{y:.0f}", ha="center",
+                     va="bottom", fontsize=9, color="#222")
+
+    for ax, ylim, labels in ((ax1, 110, semesters), (ax2, 95, combo_order)):
+        plots.style_pct_axis(ax, ylim)
+        ax.set_xticks(np.arange(len(labels)))
+        ax.set_xticklabels(labels, fontsize=9)
+
+
+def _legacy_prep(df, pis, pivot2, greens, reds):
+    """Old combo_order scan + per-value colour comprehension, no drawing."""
+    combo_order = []
+    for pi_full in pis:
+        pi_tag = pi_full.split(":")[0].strip()
+        seen = set()
+        for lvl in df.loc[df.pi == pi_full, "blooms_level"]:
+            if lvl not in seen:
+                combo_order.append(f"{pi_tag} ({lvl})")
+                seen.add(lvl)
+    pi_index = {p.split(":")[0].strip(): i for i, p in enumerate(pis)}
+    for sem in pivot2.columns:
+        tags = [c.split(" (")[0] for c in combo_order]
+        [greens[pi_index[t]] if v >= 70 else reds[pi_index[t]]
+         for t, v in zip(tags, pivot2[sem].values)]
+    return combo_order
+
+
+def _vector_prep(df, pis, pivot2, greens, reds):
+    import plots
+    combos = plots.combo_order(df, pis)
+    pi_index = {plots.short_pi(p): i for i, p in enumerate(pis)}
+    combo_pi = np.array([pi_index[c.split(" (")[0]] for c in combos])
+    _, vals, _ = plots.grouped_bars(np.arange(len(combos)), pivot2.to_numpy())
+    plots.target_colours(vals, np.repeat(combo_pi, pivot2.shape[1]), greens, reds)
+    return combos
+
+
+def bench_panels():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import plots
+
+    for rows_per_cell in (3, 30, 300):
+        df = synthetic_slo(rows_per_cell=rows_per_cell)
+        pis = sorted(df["pi"].unique())
+        combos = plots.combo_order(df, pis)
+        df["pi_bl"] = df["pi"].map(plots.short_pi) + " (" + df["blooms_level"] + ")"
+        pivot1 = df.groupby(["sem_short", "pi"])["attain"].mean().unstack(fill_value=0)
+        pivot2 = (df.groupby(["pi_bl", "sem_short"])["attain"].mean()
+                  .unstack(fill_value=0).reindex(index=combos, fill_value=0))
+        greens, reds = plots.pi_palettes(len(pis))
+        assert _legacy_prep(df, pis, pivot2, greens, reds) == combos
+
+        def render(draw):
+            fig, (ax1, ax2) = plt.subplots(2, figsize=(8.5, 8), dpi=150)
+            draw(ax1, ax2)
+            fig.canvas.draw()
+            n_artists = len(ax1.get_children()) + len(ax2.get_children())
+            plt.close(fig)
+            return n_artists
+
+        def legacy(ax1, ax2):
+            _legacy_panels(ax1, ax2, df, pivot1, pivot2, pis, greens, reds)
+
+        def current(ax1, ax2):
+            plots.combo_order(df, pis)
+            plots.draw_semester_panel(ax1, pivot1, greens, reds, "")
+            plots.draw_pi_bloom_panel(ax2, pivot2, pis, greens, reds, "")
+
+        p_old = timeit(lambda: _legacy_prep(df, pis, pivot2, greens, reds))
+        p_new = timeit(lambda: _vector_prep(df, pis, pivot2, greens, reds))
+        r_old, r_new = timeit(lambda: render(legacy)), timeit(lambda: render(current))
+        print(f"{len(df):>6} rows {len(combos):>3} combos | prep legacy {p_old:6.2f} ms"
+              f"  vectorised {p_new:6.2f} ms | render legacy {r_old:6.1f} ms"
+              f"  vectorised {r_new:6.1f} ms | artists {render(legacy)} → {render(current)}")
+
+
+def bench_bloom():
+    """Bloom panel: box stats + tests per request vs. ax.bxp from stored stats."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import analysis
+    import plots
+
+    def draw(fn):
+        fig, ax = plt.subplots(figsize=(8.5, 4), dpi=100)
+        fn(ax)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    for rows_per_cell in (3, 30, 300):
+        df = synthetic_slo(rows_per_cell=rows_per_cell)
+        stored = analysis.bloom_summary(df["attain"], df["blooms_level"])
+
+        def per_request(ax):
+            plots.draw_bloom_panel(ax, analysis.bloom_summary(df["attain"],
+                                                              df["blooms_level"]))
+
+        t_stats = timeit(lambda: analysis.bloom_summary(df["attain"], df["blooms_level"]))
+        t_req = timeit(lambda: draw(per_request))
+        t_stored = timeit(lambda: draw(lambda ax: plots.draw_bloom_panel(ax, stored)))
+        print(f"{len(df):>6} rows | stats per request {t_req:6.1f} ms"
+              f" | stored stats {t_stored:6.1f} ms | summary alone {t_stats:5.2f} ms")
+
+
+def bench_profiles():
+    import warnings
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import plots
+    import render
+    warnings.simplefilter("ignore")
+
+    df = synthetic_slo(rows_per_cell=2)
+    df = df.assign(expert=df["attain"] / 2, practitioner=df["attain"] / 2,
+                   apprentice=0.0, novice=0.0).drop(columns=["attain", "sem_short"])
+
+    def legacy():                         # old path: figure dpi, default PNG
+        from io import BytesIO
+        fig = render.course_figure(df.copy(), "MECE 0000", "SLO5")
+        fig.savefig(BytesIO(), format="png")
+        plt.close(fig)
+
+    def profile_bytes(profile):
+        return render.render_course(df.copy(), "MECE 0000", "SLO5", profile)[0]
+
+    profile_bytes("screen")               # font cache / import warm-up
+    print(f"{'profile':>10} {'ms':>8} {'bytes':>9}")
+    for profile in plots.PROFILES:
+        ms = timeit(lambda: profile_bytes(profile), repeat=3)
+        print(f"{profile:>10} {ms:>8.0f} {len(profile_bytes(profile)):>9}")
+    print(f"{'legacy':>10} {timeit(lambda: legacy(), repeat=3):>8.0f}")
+    payload = lambda: render.render_course_json(df.copy(), "MECE 0000", "SLO5").encode()
+    print(f"{'json':>10} {timeit(payload, repeat=3):>8.0f} {len(payload()):>9}"
+          "   (/api/analysis, drawn by the browser)")
+
+
+def bench_auth():
+    """Signed-cookie sessions in both apps vs. server-side store + AuthMiddleware."""
+    import tempfile
+    from flask.sessions import SecureCookieSessionInterface
+    from werkzeug.middleware.dispatcher import DispatcherMiddleware
+    from werkzeug.test import EnvironBuilder
+    import main
+    import migrate
+    import sessions
+
+    def drain(app, env):
+        it = app(dict(env), lambda status, headers, exc_info=None: None)
+        for _ in it:
+            pass
+        getattr(it, "close", lambda: None)()
+
+    def per_request_us(app, cookie, path, n=500):
+        env = EnvironBuilder(path=path, base_url="https://localhost",
+                             headers={"Cookie": f"session={cookie}"}).get_environ()
+        return timeit(lambda: [drain(app, env) for _ in range(n)]) / n * 1e3
+
+    user = {"user": "Robert Freeman"}
+    legacy = SecureCookieSessionInterface()
+    signed = legacy.get_signing_serializer(main.parent).dumps(user)
+    setups = [("signed cookie", legacy, signed, DispatcherMiddleware(
+        main.parent.wsgi_app, {"/abet": main.abet_app}))]
+
+    tmp = tempfile.mkdtemp()
+    migrate.migrate_db(f"{tmp}/s.db", migrate.SESSION_STEPS, wal=True)
+    for name, store in [("server/memory", sessions.MemoryStore()),
+                        ("server/sqlite", sessions.SqliteStore(f"{tmp}/s.db"))]:
+        store.save("bench", user, time.time() + 3600)
+        setups.append((name, sessions.ServerSessionInterface(store), "bench",
+                       sessions.AuthMiddleware(DispatcherMiddleware(
+                           main.parent.wsgi_app, {"/abet": main.abet_app}), store)))
+
+    # unknown paths: session + auth + routing, no view work
+    print(f"{'sessions':>14} {'/abet/… µs':>11} {'/… µs':>8}")
+    for name, iface, cookie, app in setups:
+        main.parent.session_interface = main.abet_app.session_interface = iface
+        print(f"{name:>14} {per_request_us(app, cookie, '/abet/__bench__'):>11.0f} "
+              f"{per_request_us(app, cookie, '/__bench__'):>8.0f}")
+
+
+def bench_compress(mbit="10"):
+    """Admin full-table view through CompressionMiddleware, real rows tiled."""
+    import sqlite3
+    from flask import Flask, render_template_string
+    from werkzeug.test import EnvironBuilder
+    import compression
+    import main
+
+    with sqlite3.connect(main.DB_NAME) as conn:
+        base = pd.read_sql_query("SELECT * FROM abet_entries", conn)
+    app = Flask("bench")
+    table = {}
+
+    @app.route("/download")
+    def download():
+        df = table["df"]
+        return render_template_string(main.DATA_HTML, columns=df.columns,
+                                      rows=df.to_dict(orient="records"))
+
+    wsgi = compression.CompressionMiddleware(app.wsgi_app)
+    link = float(mbit) * 1e6 / 8                  # bytes/s
+
+    def fetch(enc):
+        env = EnvironBuilder("/download", headers={"Accept-Encoding": enc}).get_environ()
+        return b"".join(wsgi(env, lambda *a: None))
+
+    print(f"{'rows':>6} {'coding':>8} {'bytes':>9} {'server ms':>10} "
+          f"{'+ {:g} Mbit/s ms'.format(float(mbit)):>16}")
+    for n in (64, 1000, 5000):
+        reps = -(-n // len(base))
+        table["df"] = pd.concat([base] * reps, ignore_index=True).iloc[:n]
+        for enc in ("identity", "gzip", "br"):
+            size = len(fetch(enc))
+            ms = timeit(lambda: fetch(enc), repeat=5)
+            print(f"{n:>6} {enc:>8} {size:>9} {ms:>10.1f} {ms + size / link * 1e3:>16.0f}")
+
+
+def tiled_db(rows: int) -> str:
+    """Temp copy of the portal database with its real rows tiled up to `rows`."""
+    import shutil
+    import sqlite3
+    import tempfile
+    import main
+
+    db = f"{tempfile.mkdtemp()}/abet.db"
+    shutil.copy(main.DB_NAME, db)
+    with sqlite3.connect(db) as conn:
+        n = conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()[0]
+        while n < rows:
+            conn.execute("""
+                INSERT INTO abet_entries (course, course_name, slo, pi, assessment_tool,
+                       explanation, semester, blooms_level, expert, practitioner,
+                       apprentice, novice, observations)
+                SELECT course, course_name, slo, pi, assessment_tool || ' #' || abs(random()),
+                       explanation, semester, blooms_level, expert, practitioner,
+                       apprentice, novice, observations
+                  FROM abet_entries LIMIT ?""", (rows - n,))
+            n = conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()[0]
+    return db
+
+
+def bench_snapshot(rows="100000", writes="200"):
+    """Single-row submits while a reporting loop reads the whole table."""
+    import sqlite3
+    import threading
+    import snapshot
+
+    db = tiled_db(int(rows))
+    n = int(rows)
+
+    def run(source):
+        stop, reads, lat = threading.Event(), [0], []
+
+        def reporter():
+            while not stop.is_set():
+                conn, _ = source()
+                pd.read_sql_query("SELECT * FROM abet_entries", conn)
+                conn.close()
+                reads[0] += 1
+
+        t = threading.Thread(target=reporter)
+        t.start()
+        time.sleep(0.5)
+        start = time.perf_counter()
+        for i in range(int(writes)):
+            t0 = time.perf_counter()
+            with sqlite3.connect(db, timeout=30) as conn:
+                conn.execute("INSERT INTO abet_entries (course, slo, assessment_tool) "
+                             "VALUES ('MECE 0000', 'SLO1', ?)", (f"w{time.time()}",))
+            lat.append((time.perf_counter() - t0) * 1e3)
+            time.sleep(0.005)
+        stop.set()
+        t.join()
+        lat.sort()
+        rate = reads[0] / (time.perf_counter() - start + 0.5)
+        return lat[len(lat) // 2], lat[int(.99 * len(lat))], lat[-1], rate
+
+    snap = snapshot.Snapshot(db, mode="file", max_age=5)
+    print(f"{n} rows; {writes} submits while a reporter loops over SELECT *")
+    print(f"{'reads from':>10} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} {'reports/s':>10}")
+    for name, source in [("live", lambda: (sqlite3.connect(db), time.time())),
+                         ("snapshot", snap.connect)]:
+        p50, p99, worst, reads = run(source)
+        print(f"{name:>10} {p50:>7.1f} {p99:>7.1f} {worst:>7.1f} {reads:>10.1f}")
+
+
+def bench_login(budget_ms="100"):
+    """scrypt verify time per cost; the default cost should sit inside the budget."""
+    import credentials
+
+    budget = float(budget_ms)
+    print(f"{'cost':>5} {'N':>8} {'MiB':>5} {'verify ms':>10}")
+    for cost in range(10, 18):
+        stored = credentials.hash_password("correct horse", cost)
+        ms = timeit(lambda: credentials.verify_password("wrong", stored), repeat=3)
+        mark = "  <- default" if cost == credentials.HASH_COST else ""
+        over = "  over budget" if ms > budget else ""
+        print(f"{cost:>5} {1 << cost:>8} {128 * 8 * (1 << cost) >> 20:>5} "
+              f"{ms:>10.1f}{over}{mark}")
+
+
+def bench_load(base="http://127.0.0.1:8000", users="50", seconds="20"):
+    """Closed-loop load: each user logs in, then loops over a request mix."""
+    import random
+    import threading
+    import urllib.error
+    import urllib.parse
+    import urllib.request
+
+    users, seconds = int(users), float(seconds)
+    mix = (["/abet/load_records"] * 4 + ["/download"] +
+           [f"/analyze_course?course=MECE+3380&slo=SLO{s}&profile={p}"
+            for s in (1, 2) for p in ("screen", "thumbnail")])
+
+    class NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *a, **kw):
+            return None
+
+    opener = urllib.request.build_opener(NoRedirect)
+
+    def login():
+        # the session cookie is Secure, so carry it by hand over plain http
+        body = urllib.parse.urlencode({"user": "MECE Admin",
+                                       "password": "admin230"}).encode()
+        try:
+            opener.open(base + "/login", body, timeout=30)
+        except urllib.error.HTTPError as exc:
+            return exc.headers["Set-Cookie"].split(";")[0]
+        raise RuntimeError("login did not redirect")
+
+    lat, errors, lock = [], [0], threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def user(seed):
+        rng, cookie = random.Random(seed), login()
+        while time.perf_counter() < stop:
+            req = urllib.request.Request(base + rng.choice(mix),
+                                         headers={"Cookie": cookie})
+            t0 = time.perf_counter()
+            try:
+                opener.open(req, timeout=120).read()
+                ok = True
+            except Exception:
+                ok = False
+            with lock:
+                if ok:
+                    lat.append(time.perf_counter() - t0)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    lat.sort()
+    pct = lambda q: lat[min(int(q * len(lat)), len(lat) - 1)] * 1e3 if lat else float("nan")
+    print(f"{users} users, {wall:.0f} s: {len(lat) / wall:6.1f} req/s  "
+          f"p50 {pct(.5):6.0f} ms  p95 {pct(.95):6.0f} ms  "
+          f"p99 {pct(.99):6.0f} ms  errors {errors[0]}")
+
+
+def bench_columnar(rows="100000"):
+    """Analysis-view reads: SQL + DataFrame per request vs. the columnar cache."""
+    import sqlite3
+    import columnar
+
+    conn = sqlite3.connect(tiled_db(int(rows)))
+    cols = "pi, semester, blooms_level, expert, practitioner, apprentice, novice"
+    slo_sql = """SELECT course, semester, COUNT(*) AS n,
+                        SUM(expert + practitioner) AS attain_sum,
+                        SUM((expert + practitioner) * (expert + practitioner)) AS attain_sq
+                   FROM abet_entries WHERE slo = ? GROUP BY course, semester"""
+    cache = columnar.EntryColumns()
+    t_load = timeit(lambda: columnar.EntryColumns().sync(conn), repeat=3)
+    table = cache.sync(conn)
+
+    def course_view():
+        m = table.mask(course="MECE 3380", slo="SLO1")
+        return table.stamp(m), table.frame(m, cols.split(", "))
+
+    def tail():                      # one submitted row, then the next read
+        conn.execute("INSERT INTO abet_entries (course, slo, assessment_tool) "
+                     "VALUES ('MECE 0000', 'SLO1', ?)", (f"t{time.perf_counter()}",))
+        cache.sync(conn)
+
+    print(f"{rows} rows; full load into columns {t_load:.0f} ms")
+    print(f"{'view':>22} {'SQL ms':>8} {'columnar ms':>12}")
+    for name, sql, col in [
+        ("analyze_course", lambda: pd.read_sql_query(
+            f"SELECT {cols} FROM abet_entries WHERE course = ? AND slo = ?",
+            conn, params=("MECE 3380", "SLO1")), course_view),
+        ("analyze_slo", lambda: pd.read_sql_query(slo_sql, conn, params=("SLO1",)),
+         lambda: table.attain_sums(table.mask(slo="SLO1"))),
+        ("download (all rows)", lambda: pd.read_sql_query(
+            "SELECT * FROM abet_entries", conn), table.frame),
+        ("sync after 1 submit", lambda: None, tail),
+    ]:
+        print(f"{name:>22} {timeit(sql):>8.1f} {timeit(col):>12.1f}")
+
+
+def bench_archive(rows="100000"):
+    """Write / read paths with every term live vs. all but the newest archived."""
+    import os
+    import sqlite3
+    import archive
+    import columnar
+    import migrate
+    import snapshot
+
+    db = tiled_db(int(rows))
+    migrate.migrate_db(db, migrate.PORTAL_STEPS)
+    arch_dir = os.path.join(os.path.dirname(db), "archive")
+    snap = snapshot.Snapshot(db, mode="file")
+    seq = iter(range(10 ** 9))
+
+    def submit():                    # what /submit does for one row
+        with sqlite3.connect(db) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()
+            conn.execute("INSERT OR REPLACE INTO abet_entries (course, slo, pi, semester, "
+                         "blooms_level, assessment_tool) VALUES ('MECE 3380', 'SLO1', "
+                         "'PI', 'Spring 2024', 'Apply', ?)", (f"b{next(seq)}",))
+            conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()
+
+    def records():                   # load_records for one faculty member, uncached
+        with sqlite3.connect(db) as conn:
+            conn.execute("SELECT COUNT(*), MAX(id) FROM abet_entries "
+                         "WHERE course IN ('MECE 3380')").fetchone()
+            conn.execute("SELECT * FROM abet_entries WHERE course IN ('MECE 3380')").fetchall()
+
+    def columns():                   # a worker's first analysis read: every term
+        with sqlite3.connect(db) as conn:
+            return columnar.EntryColumns().sync(
+                conn, source=lambda: archive.attach(conn, arch_dir))
+
+    def measure():
+        return {"submit": timeit(submit), "load_records": timeit(records),
+                "snapshot refresh": timeit(snap.refresh, repeat=3),
+                "columnar load": timeit(columns, repeat=3)}, len(columns())
+
+    before, n_before = measure()
+    with sqlite3.connect(db) as conn:
+        terms = sorted({r[0] for r in conn.execute("SELECT semester FROM abet_entries")},
+                       key=lambda s: (s[-4:], s.startswith("F")))
+    t0 = time.perf_counter()
+    moved = sum(archive.close_semester(db, s, arch_dir) for s in terms[:-1])
+    t_close = (time.perf_counter() - t0) * 1e3
+    after, n_after = measure()
+
+    print(f"{n_before} rows; closed {len(terms) - 1} of {len(terms)} terms "
+          f"({moved} rows) in {t_close:.0f} ms; columnar still sees {n_after}")
+    print(f"{'path':>18} {'all live ms':>12} {'archived ms':>12}")
+    for k in before:
+        print(f"{k:>18} {before[k]:>12.1f} {after[k]:>12.1f}")
+
+
+def bench_search(rows="100000"):
+    """Full-text queries over synthetic observations; index cost on writes."""
+    import random
+    import sqlite3
+    import migrate
+    import search
+
+    # a Zipf-ish vocabulary: a few words in most notes, a long tail in few
+    words = ("students the of and lab project design homework team exams data report "
+             "analysis writing feedback equipment safety rubric tutoring calibration "
+             "ethics software attendance prerequisite").split()
+    words += [f"term{i}" for i in range(5000)]
+    weights = [1 / (i + 1) for i in range(len(words))]
+    rng = random.Random(0)
+    note = lambda: " ".join(rng.choices(words, weights, k=24))
+    db = tiled_db(int(rows))
+    with sqlite3.connect(db) as conn:
+        conn.create_function("note", 1, lambda _: note())
+        conn.execute("UPDATE abet_entries SET observations = note(id), "
+                     "explanation = note(id + 1)")
+    t0 = time.perf_counter()
+    migrate.migrate_db(db, migrate.PORTAL_STEPS)          # v3 builds the index
+    t_build = (time.perf_counter() - t0) * 1e3
+
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA recursive_triggers = ON")
+    n = conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()[0]
+    print(f"{n} rows; index built in {t_build:.0f} ms")
+    print(f"{'query':>42} {'matches':>8} {'order':>7} {'top 50 ms':>10} {'LIKE ms':>8}")
+    for q, kw in [('"lab equipment"', {}), ("calibration tutoring", {}),
+                  ("term2000", {}), ("calib*", {}), ("students", {}),
+                  ("equipment", dict(course="MECE 3380", slo="SLO2", semester="Fall 2023"))]:
+        found = search.search(conn, q, limit=50, **kw)
+        ms = timeit(lambda: search.search(conn, q, limit=50, **kw))
+        like = "%" + q.strip('"*').split()[0] + "%"
+        ms_like = timeit(lambda: conn.execute(      # what scanning /download amounts to
+            "SELECT COUNT(*) FROM abet_entries WHERE observations LIKE ? "
+            "OR explanation LIKE ?", (like, like)).fetchall(), repeat=3)
+        label = q + (" + course/slo/semester" if kw else "")
+        print(f"{label:>42} {found['matches']:>8} "
+              f"{'bm25' if found['ranked'] else 'newest':>7} {ms:>10.2f} {ms_like:>8.2f}")
+
+    seq = iter(range(10 ** 9))
+
+    def submit():                    # one upserted row, as /submit writes it
+        conn.execute("INSERT OR REPLACE INTO abet_entries (course, slo, pi, semester, "
+                     "blooms_level, assessment_tool, observations) VALUES ('MECE 3380', "
+                     "'SLO1', 'PI', 'Spring 2024', 'Apply', ?, ?)",
+                     (f"b{next(seq) % 20}", note()))
+        conn.commit()
+
+    with_index = timeit(submit, repeat=50)
+    for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+    print(f"submit of one row: {with_index:.2f} ms with index upkeep, "
+          f"{timeit(submit, repeat=50):.2f} ms without")
+
+
+def bench_rows(rows="10000"):
+    """/submit, drafts and load_records bodies: the old dict path vs. schema.py."""
+    import json
+    import sqlite3
+    import schema
+    import ABET_Data_Rev1 as abet
+
+    conn = sqlite3.connect(tiled_db(int(rows)))
+    sql_old = "SELECT *, 'submitted' AS status FROM abet_entries ORDER BY course ASC"
+    sql_new = ("SELECT " + schema.EntryRow.json_sql(status="'submitted'") +
+               " FROM abet_entries ORDER BY course ASC")
+
+    def records_old():
+        cur = conn.execute(sql_old)
+        colnames = [d[0] for d in cur.description]
+        return abet.app.json.dumps([dict(zip(colnames, row)) for row in cur.fetchall()])
+
+    def records_new():
+        return "[" + ",".join([r[0] for r in conn.execute(sql_new)]) + "]"
+
+    # what the form posts: every value a string, numbers included
+    posted = [{k: (str(v) if k in ("expert", "practitioner", "apprentice", "novice") else v)
+               for k, v in row.items() if k not in ("id", "status")}
+              for row in json.loads(records_new())]
+    body = json.dumps({"rows": posted}).encode()
+    blob = schema.encode(schema.decode(body, schema.DraftRow)[0])
+
+    def submit_old():                # request.get_json + key lookups, no checks
+        return [(r["course"].replace("\u00A0", " "), r["course_name"], r["slo"], r["pi"],
+                 r["assessment_tool"], r["explanation"], r["semester"], r["blooms_level"],
+                 r["expert"], r["practitioner"], r["apprentice"], r["novice"],
+                 r["observations"]) for r in json.loads(body)["rows"]]
+
+    def submit_new():
+        rows, _ = schema.decode(body, schema.EntryRow, mode=("upsert", ("upsert", "skip")))
+        return [r.astuple() for r in rows]
+
+    assert [p[:8] for p in submit_old()] == [p[:8] for p in submit_new()]
+    assert json.loads(records_old()) == json.loads(records_new())
+    cases = [
+        ("load_records", records_old, records_new),
+        ("submit decode", submit_old, submit_new),
+        ("save_draft", lambda: json.dumps(json.loads(body)["rows"]),
+                       lambda: schema.encode(schema.decode(body, schema.DraftRow)[0])),
+        ("load_draft", lambda: abet.app.json.dumps({"rows": json.loads(blob)}),
+                       lambda: '{"rows":' + blob + "}"),
+    ]
+    print(f"{len(posted)} rows, {len(body) / 1e6:.1f} MB posted")
+    print(f"{'path':>14} {'old ms':>8} {'schema ms':>10} {'old bytes':>10} {'new bytes':>10}")
+    for name, old, new in cases:
+        size = lambda out: len(out.encode()) if isinstance(out, str) else "-"
+        print(f"{name:>14} {timeit(old, 5):>8.1f} {timeit(new, 5):>10.1f} "
+              f"{size(old()):>10} {size(new()):>10}")
+    print("submit decode / save_draft: the old paths only look the keys up; the "
+          "schema paths also validate every value (drafts are then stored as posted)")
+
+
+def _boot_ddl(start):
+    """One worker booting the old way: every schema statement, autocommit."""
+    import sqlite3
+    import credentials
+    import migrate
+
+    start.wait()
+    t0 = time.perf_counter()
+    for path, steps, wal in migrate.databases():
+        with sqlite3.connect(path, timeout=60) as conn:
+            if wal:
+                conn.execute("PRAGMA journal_mode=WAL")
+            for step in steps:
+                step(conn)
+            if steps is migrate.PORTAL_STEPS:
+                credentials.seed_users(conn)
+    return time.perf_counter() - t0
+
+
+def _boot_migrate(start):
+    """One worker calling migrate.run() (the uvicorn path, no master)."""
+    import migrate
+
+    start.wait()
+    t0 = time.perf_counter()
+    migrate.run()
+    return time.perf_counter() - t0
+
+
+def bench_program(rows="20000"):
+    """
+    One SLO over 16 courses × 12 semesters: the per-course mixed models the
+    course views fit, statsmodels' crossed model (dense variance-component
+    design) and analysis.fit_crossed (sparse), with the slopes compared.
+    """
+    import warnings
+    import statsmodels.formula.api as smf
+    import analysis
+
+    rng = np.random.default_rng(0)
+    n, n_course, n_sem = int(rows), 16, 12
+    course = rng.integers(0, n_course, n)
+    sem = rng.integers(0, n_sem, n)
+    attain = (60 + 0.8 * sem + rng.normal(0, 6, n_course)[course]
+              + rng.normal(0, 3, n_sem)[sem] + rng.normal(0, 10, n))
+    df = pd.DataFrame({"course": [f"MECE {3000 + c}" for c in course],
+                       "sem_short": [f"S{s:02d}" for s in sem],
+                       "semester_idx": sem, "attain": attain, "one": 1})
+
+    def per_course():
+        for _, part in df.groupby("course"):
+            analysis.fit_trend(part)
+
+    def dense():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return smf.mixedlm("attain ~ semester_idx", df, groups="one", re_formula="0",
+                               vc_formula={"course": "0 + C(course)",
+                                           "sem": "0 + C(sem_short)"}).fit(reml=True)
+
+    sparse = analysis.fit_crossed(df)
+    ref = dense()
+    print(f"{'':>22} {'ms':>9} {'slope':>8} {'se':>7}")
+    print(f"{'16 course fits':>22} {timeit(per_course, 3):>9.1f} {'':>8} {'':>7}")
+    print(f"{'statsmodels crossed':>22} {timeit(dense, 3):>9.1f} "
+          f"{ref.params['semester_idx']:>8.4f} {ref.bse['semester_idx']:>7.4f}")
+    print(f"{'fit_crossed (sparse)':>22} {timeit(lambda: analysis.fit_crossed(df), 3):>9.1f} "
+          f"{sparse.slope:>8.4f} {np.sqrt(sparse.cov[1, 1]):>7.4f}")
+
+
+def bench_boot(workers="8"):
+    """
+    WORKERS processes starting at once: schema DDL in each (as before) vs.
+    migrate.py once, then a check that `import main` opens no database.
+    """
+    import multiprocessing
+    import os
+    import shutil
+    import subprocess
+    import tempfile
+    import main
+    import migrate
+
+    n = int(workers)
+    ctx = multiprocessing.get_context("spawn")
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def boot(fn, state):
+        tmp = tempfile.mkdtemp()
+        if state != "new":
+            shutil.copy(main.DB_NAME, tmp)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            if state == "migrated":
+                migrate.run()
+            with ctx.Manager() as mgr, ctx.Pool(n) as pool:
+                start = mgr.Event()
+                res = pool.map_async(fn, [start] * n)
+                time.sleep(1.0)           # let every worker import first
+                start.set()
+                secs = sorted(res.get())
+        finally:
+            os.chdir(cwd)
+        return secs[n // 2] * 1e3, secs[-1] * 1e3
+
+    print(f"{n} workers booting at once (schema work only)")
+    print(f"{'databases':>9} {'start-up':>22} {'p50 ms':>7} {'max ms':>7}")
+    for state in ("new", "existing", "migrated"):
+        for name, fn in [("DDL in every worker", _boot_ddl),
+                         ("migrate.run() in each", _boot_migrate)]:
+            p50, worst = boot(fn, state)
+            print(f"{state:>9} {name:>22} {p50:>7.1f} {worst:>7.1f}")
+    print(f"{'':>9} {'gunicorn master once':>22}   – then 0 ms per worker")
+
+    probe = ("import sys, time\n"
+             "seen = []\n"
+             "sys.addaudithook(lambda ev, a: ev == 'sqlite3.connect' and seen.append(a[0]))\n"
+             "t0 = time.perf_counter()\n"
+             "import main\n"
+             "print(f'import main: {(time.perf_counter() - t0) * 1e3:.0f} ms, '\n"
+             "      f'{len(seen)} sqlite3.connect call(s) {seen}')\n")
+    tmp = tempfile.mkdtemp()
+    print(subprocess.run([sys.executable, "-c", probe], cwd=tmp, capture_output=True,
+                         text=True, env={**os.environ, "PYTHONPATH": here}).stdout.strip())
+
+
+BENCHES = {"trend": bench_trend, "panels": bench_panels, "bloom": bench_bloom,
+           "profiles": bench_profiles, "auth": bench_auth,
+           "compress": bench_compress, "snapshot": bench_snapshot,
+           "columnar": bench_columnar, "login": bench_login,
+           "archive": bench_archive, "search": bench_search, "rows": bench_rows,
+           "program": bench_program, "boot": bench_boot,
+           "load": bench_load}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:                 # one benchmark with arguments
+        print(f"== {sys.argv[1]} ==")
+        BENCHES[sys.argv[1]](*sys.argv[2:])
+    else:
+        for name in sys.argv[1:] or [n for n in BENCHES if n != "load"]:
+            print(f"== {name} ==")
+            BENCHES[name]()
@@ -0,0 +1,174 @@
+# columnar.py  – process-wide columnar copy of abet_entries
+"""
+The analytics views used to run `pd.read_sql_query` on every request and
+rebuild a DataFrame from row tuples.  `EntryColumns` keeps the table as
+NumPy arrays instead – int32 codes for course / slo / pi / blooms_level /
+semester, float64 for the four scores, object arrays for the free text –
+and the views slice it with boolean masks.
+
+`sync(conn, version)` brings the copy up to date before each read:
+
+  * same `version` as last time (the snapshot time of an immutable
+    snapshot) → nothing to do, no query at all;
+  * otherwise one `COUNT(*), MAX(id)` query; new ids are tailed with
+    `WHERE id > last` and appended;
+  * if the count still differs, rows were deleted (an upsert replaced them
+    or the dedupe ran) and the ids that are gone are masked out.
+
+Every sync publishes a new immutable `Columns` generation, so readers on
+other threads never see a half-appended table.
+
+`archived`, if given, is called only when a sync is due and returns
+archive.archived(conn) – the closed-terms version and the source of the
+archived rows.  Those rows are read, with their
+ids, only on the first sync and when the version changes (a term was
+closed); every other sync queries the live table alone and counts the
+archived ids from memory.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL = ("course", "slo", "pi", "blooms_level", "semester")
+NUMERIC = ("expert", "practitioner", "apprentice", "novice")
+
+
+class Columns:
+    """One immutable generation of the table."""
+
+    def __init__(self, columns, ids, data, cats):
+        self.columns = columns          # table column order, "id" first
+        self.ids = ids                  # int64, ascending
+        self.data = data                # column → array (codes for CATEGORICAL)
+        self.cats = cats                # column → object array of category values
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, **equals) -> np.ndarray:
+        """Boolean row mask for column == value on categorical columns."""
+        m = np.ones(len(self.ids), dtype=bool)
+        for col, value in equals.items():
+            hit = np.flatnonzero(self.cats[col] == value)
+            m &= (self.data[col] == hit[0]) if len(hit) else False
+        return m
+
+    def stamp(self, mask) -> tuple:
+        """(COUNT(*), MAX(id)) of the masked rows – the figure-cache stamp."""
+        n = int(mask.sum())
+        return n, (int(self.ids[mask][-1]) if n else None)
+
+    def column(self, col, mask=None):
+        arr = self.ids if col == "id" else self.data[col]
+        if mask is not None:
+            arr = arr[mask]
+        return self.cats[col][arr] if col in self.cats else arr
+
+    def frame(self, mask=None, columns=None) -> pd.DataFrame:
+        """DataFrame of the masked rows, like SELECT <columns> … WHERE <mask>."""
+        return pd.DataFrame({c: self.column(c, mask) for c in columns or self.columns})
+
+    def attain_sums(self, mask) -> pd.DataFrame:
+        """
+        Per (course, semester) of the masked rows: n, Σ(E+P) and Σ(E+P)² –
+        the sufficient statistics `analysis.wls_from_sums` needs.
+        """
+        course, sem = self.data["course"][mask], self.data["semester"][mask]
+        attain = self.data["expert"][mask] + self.data["practitioner"][mask]
+        attain = np.nan_to_num(attain)                 # SUM() skips NULLs
+        key = course.astype(np.int64) * len(self.cats["semester"]) + sem
+        groups, inv = np.unique(key, return_inverse=True)
+        return pd.DataFrame({
+            "course": self.cats["course"][groups // len(self.cats["semester"])],
+            "semester": self.cats["semester"][groups % len(self.cats["semester"])],
+            "n": np.bincount(inv, minlength=len(groups)),
+            "attain_sum": np.bincount(inv, attain, minlength=len(groups)),
+            "attain_sq": np.bincount(inv, attain * attain, minlength=len(groups)),
+        })
+
+
+class EntryColumns:
+    def __init__(self, table: str = "abet_entries"):
+        self.table = table
+        self._lock = threading.Lock()
+        self._view = None
+        self._version = None
+        self._index = {c: {} for c in CATEGORICAL}   # value → code
+        self._archive_version = None
+        self._archive_ids = np.empty(0, dtype=np.int64)
+
+    def sync(self, conn, version=None, archived=None) -> Columns:
+        view = self._view
+        if view is not None and version is not None and version == self._version:
+            return view
+        with self._lock:
+            if self._view is not None and version is not None and version == self._version:
+                return self._view
+            self._view = self._sync(conn, archived() if archived else ((), lambda: None))
+            self._version = version
+            return self._view
+
+    # ------------------------------------------------------------------ #
+    def _sync(self, conn, archived) -> Columns:
+        arch_version, arch_source = archived
+        view = self._view
+        if view is None or arch_version != self._archive_version:   # first, or a term closed
+            arch = arch_source()
+            src = self.table if arch is None else \
+                f"(SELECT * FROM {self.table} UNION ALL SELECT * FROM {arch})"
+            view = self._append(None, conn.execute(f"SELECT * FROM {src} ORDER BY id"))
+            self._archive_ids = np.fromiter(
+                (r[0] for r in conn.execute(f"SELECT id FROM {arch}")), dtype=np.int64) \
+                if arch is not None else np.empty(0, dtype=np.int64)
+            self._archive_version = arch_version
+            return view
+
+        # archived rows never change: only the live table is queried
+        count, max_id = conn.execute(
+            f"SELECT COUNT(*), MAX(id) FROM {self.table}").fetchone()
+        last = int(view.ids[-1]) if len(view) else 0
+        if max_id is not None and max_id > last:
+            view = self._append(view, conn.execute(
+                f"SELECT * FROM {self.table} WHERE id > ? ORDER BY id", (last,)))
+        if len(view) != count + len(self._archive_ids):   # rows were deleted
+            live = np.fromiter((r[0] for r in conn.execute(f"SELECT id FROM {self.table}")),
+                               dtype=np.int64, count=count)
+            keep = np.isin(view.ids, np.concatenate([live, self._archive_ids]),
+                           assume_unique=True)
+            view = Columns(view.columns, view.ids[keep],
+                           {c: a[keep] for c, a in view.data.items()}, view.cats)
+        return view
+
+    def _append(self, view, cur) -> Columns:
+        columns = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+        if view is not None and not rows:
+            return view
+        cols = list(zip(*rows)) if rows else [()] * len(columns)
+        new = dict(zip(columns, cols))
+
+        data = {}
+        for c in columns:
+            if c == "id":
+                continue
+            if c in CATEGORICAL:
+                index = self._index[c]
+                arr = np.fromiter((index.setdefault(v, len(index)) for v in new[c]),
+                                  dtype=np.int32, count=len(rows))
+            elif c in NUMERIC:
+                arr = np.array(new[c], dtype=float) if rows else np.empty(0)
+            else:
+                arr = np.empty(len(rows), dtype=object)
+                arr[:] = new[c]
+            data[c] = arr if view is None else np.concatenate([view.data[c], arr])
+
+        ids = np.array(new["id"], dtype=np.int64)
+        if view is not None:
+            ids = np.concatenate([view.ids, ids])
+        cats = {}
+        for c, index in self._index.items():
+            cats[c] = np.empty(len(index), dtype=object)
+            cats[c][:] = list(index)
+        return Columns(columns, ids, data, cats)
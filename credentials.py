@@ -0,0 +1,222 @@
+# credentials.py  – hashed logins + login throttling
+"""
+Passwords are stored as salted scrypt hashes in the `users` table of the
+portal database; nothing in the source tree holds a plaintext password.
+
+    python credentials.py set "Robert Freeman"     # set / reset a password
+    python credentials.py list
+
+Cost: ABET_HASH_COST is log2 of scrypt's N (default 14 → ~16 MiB and a few
+tens of ms per check; `python bench.py login` prints the latency per cost).
+Each hash records its own parameters, so raising the cost does not break
+existing hashes – they are re-hashed at the new cost on the next good login.
+
+LoginThrottle counts failed logins per (user name, client address) and per
+client address in a sliding window and refuses further attempts (429 +
+Retry-After) until the window has moved on – before any hashing is done.
+The login page lists the user names, so a count per name alone would let
+anyone lock every account out; the per-address cap is the global guard.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from werkzeug.wrappers import Response
+
+HASH_COST = int(os.environ.get("ABET_HASH_COST", "14"))
+_R, _P, _SALT, _DKLEN = 8, 1, 16, 32
+
+# initial password hashes, inserted by migrate.py where the name is missing;
+# the live ones are in the users table – change them with `set NAME`
+SEED_USERS = {
+    "MECE Admin"       : "scrypt$14$8$1$dxPfzA-0hFEUhXHlXKkssw==$iO-iVN_K5z1exNCy9eIaHOJ3JIr5jXhD68HR2KhLDTY=",
+    "Lawrence Cano"    : "scrypt$14$8$1$fBkQOO6GLtX0x9TujHsXfg==$HqGECIP_CitibIvNIXqP3s2GghogIYvv0CTAw1TLJ0U=",
+    "Yingchen Yang"    : "scrypt$14$8$1$6i_HviKOQTZOXzSoEglKVQ==$SSy8mdltICIZzdeF6tJW1OUjYPyFO-rD5SuFX0BisD8=",
+    "Eleazar Marquez"  : "scrypt$14$8$1$QVQ5-NRWR06zKo_yLLQY6g==$8wMXCT36Bup5LWcXB_LRsLYMUiV_sDkJgkMSo8rpgyQ=",
+    "Misael Martinez"  : "scrypt$14$8$1$uswQ4XlRP1DljICovG125w==$kQMreGnvA6QB65-6DwNu7gbTPJHtFwG8ulg5SmEbr74=",
+    "Robert Jones"     : "scrypt$14$8$1$gAM9WCPHermPcw0dw4BkIg==$6JQfdByQOub7dKMnWq2gra9bxYpJxzStADNLd_qe1QQ=",
+    "Jose Sanchez"     : "scrypt$14$8$1$KDOuZeIh1heIfBNF7p5B8Q==$Tl8Hz-o9BlCKTvgCf7X5YGCJoq1uViY5cvnkyGSgsbA=",
+    "Nadim Zgheib"     : "scrypt$14$8$1$eQSq0N6nWqZMmFo747E9MA==$UGJj_FWOAAI7oXkNfDlGhoGRknKyzkdeCHPAHtPqF2I=",
+    "Constantine T"    : "scrypt$14$8$1$nXK5kGtzj64tkuTMb__i3Q==$uaDyhFInYy97vByGpgYT6ONNLZTBtyrI3HJqJdlxmC4=",
+    "Robert Freeman"   : "scrypt$14$8$1$q2V0vkkdvI5W3x4C9zQWpw==$fDz-3edGOBcrJN2x3ploLzqljjvJEuSXRNUOJr9jTaU=",
+    "Isaac Choutapalli": "scrypt$14$8$1$1AwC-RPpdAn-P0ZEo3wTZQ==$G_zrfyy2WeV_vvzYR0S_YO2A87LwDF5j9XRnJtaurb4=",
+    "Caruntu D"        : "scrypt$14$8$1$VQIblAGtlkqnwdEacfu4YA==$DhgMJll3KvtMJe9WMVt1cjPxb78fA0hbJEFfxPVTbK4=",
+    "Javier Ortega"    : "scrypt$14$8$1$HgC7dohLm0NcAFNiQQM4yQ==$bS3mdFwgnKDqaGfJRar163R1HXH2KutMd1QbyfpYY8Y=",
+    "Noe Vargas"       : "scrypt$14$8$1$d6T7esYllhOvFqJi8fSpIQ==$nyfzoCxAoT9gJbAEWA9aT188oVmbIh9SYp6jsOB_YWs=",
+    "Kamal Sarkar"     : "scrypt$14$8$1$KuntWGsCF2NSjhhm-XKBag==$FuEbW47j63GNTsl4f8oVVgz2s_9anJUtsZwbFv3OIok=",
+    "Mataz Alcoutlabi" : "scrypt$14$8$1$o0Ol9nt6rsVwdduGtbwIaA==$i8ajcKPSKx-G24S0XzU9H9uOs1IyTcu7KXxIFAWgXF4=",
+    "Super User"       : "scrypt$14$8$1$Ms6oKzeaq2sqSnJG1QdaDw==$QYMjAgwSCIckVDbN1-C8JDq6hX1Jz140M30jyEUj-Zk=",
+}
+
+USERS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        name     TEXT PRIMARY KEY,
+        pw_hash  TEXT NOT NULL
+    );
+"""
+
+
+# --------------------------------------------------------------------------- #
+# hashing
+# --------------------------------------------------------------------------- #
+def _scrypt(password: str, salt: bytes, cost: int, r: int, p: int) -> bytes:
+    n = 1 << cost
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n, dklen=_DKLEN)
+
+
+def hash_password(password: str, cost: int = HASH_COST) -> str:
+    """'scrypt$<log2 N>$<r>$<p>$<salt>$<key>', salt and key urlsafe-base64."""
+    salt = secrets.token_bytes(_SALT)
+    key = _scrypt(password, salt, cost, _R, _P)
+    b64 = lambda b: base64.urlsafe_b64encode(b).decode()
+    return f"scrypt${cost}${_R}${_P}${b64(salt)}${b64(key)}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Constant-time check of `password` against a hash_password() string."""
+    _, cost, r, p, salt, key = stored.split("$")
+    got = _scrypt(password, base64.urlsafe_b64decode(salt), int(cost), int(r), int(p))
+    return hmac.compare_digest(got, base64.urlsafe_b64decode(key))
+
+
+def needs_rehash(stored: str, cost: int = HASH_COST) -> bool:
+    return stored.split("$")[1:4] != [str(cost), str(_R), str(_P)]
+
+
+# --------------------------------------------------------------------------- #
+# store
+# --------------------------------------------------------------------------- #
+class CredentialStore:
+    """
+    `users` table in the portal database.  Unknown user names are checked
+    against a dummy hash of the current cost, so a miss costs as much as a
+    wrong password and response time does not reveal which names exist.
+    """
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self._dummy = hash_password(secrets.token_urlsafe(16))
+
+    def names(self) -> list:
+        with sqlite3.connect(self.db_name) as conn:
+            return [r[0] for r in conn.execute("SELECT name FROM users ORDER BY name")]
+
+    def set_password(self, name: str, password: str) -> None:
+        with sqlite3.connect(self.db_name) as conn:
+            conn.execute("INSERT OR REPLACE INTO users (name, pw_hash) VALUES (?,?)",
+                         (name, hash_password(password)))
+
+    def check(self, name: str, password: str) -> bool:
+        with sqlite3.connect(self.db_name) as conn:
+            row = conn.execute("SELECT pw_hash FROM users WHERE name = ?",
+                               (name,)).fetchone()
+        ok = verify_password(password, row[0] if row else self._dummy) and row is not None
+        if ok and needs_rehash(row[0]):
+            self.set_password(name, password)
+        return ok
+
+
+def seed_users(conn, seed=SEED_USERS) -> None:
+    """Insert the seed hashes of users that are not in the table yet."""
+    have = {r[0] for r in conn.execute("SELECT name FROM users")}
+    missing = [(k, v) for k, v in seed.items() if k not in have]
+    if missing:                           # no write lock on a normal start
+        conn.executemany("INSERT OR IGNORE INTO users (name, pw_hash) VALUES (?,?)",
+                         missing)
+
+
+# --------------------------------------------------------------------------- #
+# throttling
+# --------------------------------------------------------------------------- #
+class LoginThrottle:
+    """
+    Sliding-window failure counter per key ("user:<name>|<addr>", "ip:<addr>").
+    Per process: with W workers an attacker gets at most W × limit tries
+    per window, which is still hopeless against scrypt.
+    """
+
+    def __init__(self, user_limit: int = 5, ip_limit: int = 50,
+                 window: float = 15 * 60, max_keys: int = 100_000):
+        self.limits = {"user": user_limit, "ip": ip_limit}
+        self.window = window
+        self.max_keys = max_keys
+        self._fails = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def user_key(user: str, ip: str) -> str:
+        """The per-user count's key: a name tried from one address."""
+        return f"{user}|{ip}"
+
+    def retry_after(self, kind: str, value: str) -> float:
+        """Seconds until `kind:value` may try again; 0 = allowed now."""
+        q = self._fails.get(f"{kind}:{value}")
+        if not q or len(q) < self.limits[kind]:
+            return 0.0
+        return max(q[-self.limits[kind]] + self.window - time.time(), 0.0)
+
+    def failed(self, **keys) -> None:
+        """Record one failed attempt, e.g. failed(user=user_key(name, addr), ip=addr)."""
+        now = time.time()
+        with self._lock:
+            if len(self._fails) > self.max_keys:
+                self._sweep(now)
+            for kind, value in keys.items():
+                q = self._fails.setdefault(f"{kind}:{value}", deque(maxlen=self.limits[kind]))
+                q.append(now)
+
+    def succeeded(self, user_key: str) -> None:
+        with self._lock:
+            self._fails.pop(f"user:{user_key}", None)
+
+    def _sweep(self, now):
+        self._fails = {k: q for k, q in self._fails.items()
+                       if q and q[-1] + self.window > now}
+
+
+class ThrottleMiddleware:
+    """Refuse POST /login from an address that is over its failure limit."""
+
+    def __init__(self, app, throttle: LoginThrottle, path: str = "/login"):
+        self.app = app
+        self.throttle = throttle
+        self.path = path
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") == "POST" and environ.get("PATH_INFO") == self.path:
+            wait = self.throttle.retry_after("ip", environ.get("REMOTE_ADDR", ""))
+            if wait:
+                return too_many(wait)(environ, start_response)
+        return self.app(environ, start_response)
+
+
+def too_many(wait: float):
+    return Response("Too many failed logins – try again later.\n", status=429,
+                    headers={"Retry-After": str(int(wait) + 1)}, mimetype="text/plain")
+
+
+if __name__ == "__main__":
+    import getpass
+    import sys
+    import migrate
+    from ABET_Data_Rev1 import DB_NAME
+
+    migrate.run()
+    store = CredentialStore(DB_NAME)
+    if sys.argv[1:2] == ["set"] and len(sys.argv) == 3:
+        pw = getpass.getpass(f"new password for {sys.argv[2]}: ")
+        if pw != getpass.getpass("again: "):
+            sys.exit("passwords differ")
+        store.set_password(sys.argv[2], pw)
+    elif sys.argv[1:] == ["list"]:
+        print("\n".join(store.names()))
+    else:
+        sys.exit(__doc__)
@@ -0,0 +1,210 @@
+# fitting.py  – trend fits under a wall-clock budget, in a child process
+"""
+`smf.mixedlm(...).fit()` has no time limit of its own; a pathological
+course can keep a worker busy until gunicorn kills it, taking every other
+request in that worker down with it.  `FitService` runs the mixed model in
+one long-lived child process (spawned on first use, reused afterwards) and
+waits at most `budget` seconds for each fit:
+
+  * degenerate data never leaves the process – `analysis.fit_trend` would
+    go straight to WLS anyway;
+  * on overrun the child is terminated (it holds no locks or connections,
+    so that is safe) and a fresh one is spawned in the background, so the
+    next fit does not pay for the statsmodels import;
+  * fits are serialised, but a caller waits at most `budget` for the
+    previous one to finish – a view's wait is bounded by about twice the
+    budget however many threads fit at once – and gets the fallback below
+    if the service stays busy;
+  * the view then gets the last fit that finished for the same key
+    (course, slo), or the closed-form WLS line if there is none – the
+    `reason` says which;
+  * every fit is logged with its duration and the optimizer diagnostics
+    (converged, log-likelihood, random-intercept variance).
+
+Spawning the child (importing statsmodels) is not charged to the budget.
+One child per process; with render processes each one has its own.
+
+Environment: ABET_FIT_BUDGET (s, 5; 0 = fit in-process without a limit).
+"""
+
+import copy
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import analysis
+
+log = logging.getLogger(__name__)
+
+STARTUP_TIMEOUT = 60.0       # s for the child to import statsmodels
+LAST_FITS = 256              # keys whose last good fit is remembered
+
+
+def _serve(conn):
+    """Child process: fit every DataFrame received until the pipe closes."""
+    conn.send("ready")
+    while True:
+        try:
+            df, kwargs = conn.recv()
+        except EOFError:                  # parent gone
+            return
+        try:
+            conn.send(("ok", analysis.fit_trend(df, **kwargs)))
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+
+
+class FitService:
+    def __init__(self, budget: float = 5.0):
+        self.budget = budget
+        self._lock = threading.Lock()        # the child: one fit at a time
+        self._meta = threading.Lock()        # counts, _last
+        self._proc = None
+        self._conn = None
+        self._spawned = 0
+        self._last = OrderedDict()        # key → last TrendFit that finished
+        self.counts = dict(fits=0, over_budget=0, busy=0, served_previous=0, served_wls=0,
+                           errors=0, restarts=0)
+        self._seconds = dict(last_seconds=0.0, max_seconds=0.0)
+
+    # ------------------------------------------------------------------ #
+    def fit(self, df, key=None, groups: str = "sem_short",
+            x: str = "semester_idx", y: str = "attain") -> analysis.TrendFit:
+        """analysis.fit_trend(df) within the budget; `key` picks the fallback."""
+        kwargs = dict(groups=groups, x=x, y=y)
+        if not self.budget or analysis.degenerate_reason(df, groups):
+            return analysis.fit_trend(df, **kwargs)
+
+        if not self._lock.acquire(timeout=self.budget):
+            with self._meta:
+                self.counts["busy"] += 1
+            log.warning("fit %s: service busy for %g s", key, self.budget)
+            return self._fallback(df, key, f"fit service busy over the {self.budget:g} s budget",
+                                  kwargs)
+        try:
+            t0 = None
+            try:
+                if self._proc is None or not self._proc.is_alive():
+                    self._start()
+                t0 = time.perf_counter()
+                status, result = self._call(df[[groups, x, y]], kwargs)
+            except (EOFError, OSError) as exc:    # child died mid-fit
+                self._stop()
+                status, result = "error", f"fit process died: {exc}"
+        finally:
+            self._lock.release()
+        seconds = time.perf_counter() - t0 if t0 else 0.0
+        with self._meta:
+            self.counts["fits"] += 1
+            self._seconds["last_seconds"] = seconds
+            self._seconds["max_seconds"] = max(self._seconds["max_seconds"], seconds)
+
+        if status == "ok":
+            log.info("fit %s: %s in %.1f ms, %s", key, result.estimator,
+                     seconds * 1e3, result.diagnostics or result.reason)
+            if key is not None:
+                with self._meta:
+                    self._last[key] = result
+                    self._last.move_to_end(key)
+                    while len(self._last) > LAST_FITS:
+                        self._last.popitem(last=False)
+            return result
+
+        if status == "timeout":
+            with self._meta:
+                self.counts["over_budget"] += 1
+            reason = f"mixedlm over the {self.budget:g} s budget"
+            log.warning("fit %s: cancelled after %.1f s", key, seconds)
+            threading.Thread(target=self._respawn, name="abet-fit-respawn",
+                             daemon=True).start()
+        else:
+            with self._meta:
+                self.counts["errors"] += 1
+            reason = f"mixedlm failed: {result}"
+            log.warning("fit %s: %s", key, result)
+        return self._fallback(df, key, reason, kwargs)
+
+    def _fallback(self, df, key, reason, kwargs) -> analysis.TrendFit:
+        """The last fit that finished for `key`, else the WLS line."""
+        with self._meta:
+            previous = self._last.get(key) if key is not None else None
+            self.counts["served_previous" if previous is not None else "served_wls"] += 1
+        if previous is not None:
+            previous = copy.copy(previous)
+            previous.reason = f"{reason}, previous fit"
+            return previous
+        return analysis.fit_wls(df, reason=reason, **kwargs)
+
+    def _respawn(self):
+        """Start the next child off the request path (after an overrun)."""
+        with self._lock:
+            if self._proc is None or not self._proc.is_alive():
+                try:
+                    self._start()
+                except (EOFError, OSError) as exc:
+                    log.warning("fit process respawn failed: %s", exc)
+
+    def _call(self, df, kwargs):
+        """→ ("ok", TrendFit) | ("error", message) | ("timeout", None)."""
+        self._conn.send((df, kwargs))
+        if not self._conn.poll(self.budget):
+            self._stop()
+            return "timeout", None
+        return self._conn.recv()
+
+    def _start(self):
+        self._stop()
+        if self._spawned:
+            with self._meta:
+                self.counts["restarts"] += 1
+        self._spawned += 1
+        ctx = multiprocessing.get_context("spawn")    # no forked Flask state
+        self._conn, child = ctx.Pipe()
+        proc = ctx.Process(target=_serve, args=(child,), name="abet-fit", daemon=True)
+        try:
+            proc.start()
+        except BaseException:
+            self._conn.close()
+            self._conn = None
+            raise
+        finally:
+            child.close()
+        self._proc = proc
+        if not self._conn.poll(STARTUP_TIMEOUT) or self._conn.recv() != "ready":
+            self._stop()
+            raise OSError("fit process did not start")
+
+    def _stop(self):
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.join(1)
+            if self._proc.is_alive():
+                self._proc.kill()
+                self._proc.join()
+        if self._conn is not None:
+            self._conn.close()
+        self._proc = self._conn = None
+
+    def stats(self) -> dict:
+        with self._meta:
+            return {"budget": self.budget, "child_pid": self._proc and self._proc.pid,
+                    **self.counts,
+                    **{k: round(v, 3) for k, v in self._seconds.items()}}
+
+
+_service = None
+
+
+def service() -> FitService:
+    """This process's FitService, configured by ABET_FIT_BUDGET."""
+    global _service
+    if _service is None:
+        _service = FitService(float(os.environ.get("ABET_FIT_BUDGET", "5")))
+    return _service
+
+
+def fit_trend(df, key=None) -> analysis.TrendFit:
+    return service().fit(df, key)
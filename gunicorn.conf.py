@@ -0,0 +1,14 @@
+# gunicorn.conf.py  – picked up by `gunicorn main:app` from this directory
+"""
+Schema setup runs here, in the master, once per deploy – before any worker
+is forked – so worker start-up does no DDL and N workers never race on
+CREATE TABLE (see migrate.py).
+"""
+
+
+def on_starting(server):
+    import migrate
+
+    for path, (old, new) in migrate.run().items():
+        if new > old:
+            server.log.info("migrated %s: schema v%d → v%d", path, old, new)
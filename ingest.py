@@ -0,0 +1,247 @@
+# ingest.py  – bulk CSV / XLSX import into abet_entries
+"""
+Run:
+    python ingest.py past_semesters.csv               # import, print report
+    python ingest.py past_semesters.xlsx --dry-run    # validate only
+    python ingest.py data.csv --rejects rejects.csv   # also write the rejects
+
+The admin page posts the same files to /admin/import.
+
+The file is read CHUNK_ROWS rows at a time.  Each chunk is validated with
+whole-column pandas operations and its good rows are inserted in one
+transaction.  Memory stays bounded by the chunk, not the file.  Checks are
+the same as the data-entry form's: every field filled in, course in
+COURSE_MAP, SLO/PI pair in PI_MAP, a known Bloom level, a "Spring YYYY" or
+"Fall YYYY" semester (as on the form; there is no Summer term), the
+semester not closed (archive.py), and E + P + A + N = 100 (± 0.01).
+Headers are matched case-insensitively, course_name is optional (taken
+from COURSE_MAP), and "PI-1" with a plain hyphen is accepted for the
+catalogue's "PI‑1".  A row whose natural key
+(ABET_Data_Rev1.NATURAL_KEY) is already stored replaces it, as on /submit.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import archive
+from ABET_Data_Rev1 import BLOOM_LEVELS, COURSE_MAP, DB_NAME, PI_MAP
+
+CHUNK_ROWS = 5000
+MAX_REJECT_DETAILS = 1000       # rejects kept with row number + reason
+
+TEXT_COLS = ["course", "slo", "pi", "assessment_tool", "explanation",
+             "semester", "blooms_level", "observations"]
+SCORE_COLS = ["expert", "practitioner", "apprentice", "novice"]
+INSERT_COLS = ["course", "course_name", "slo", "pi", "assessment_tool", "explanation",
+               "semester", "blooms_level", *SCORE_COLS, "observations"]
+
+# same upsert as /submit: a row whose natural key exists replaces it
+INSERT_SQL = (f"INSERT OR REPLACE INTO abet_entries ({', '.join(INSERT_COLS)}) "
+              f"VALUES ({','.join('?' * len(INSERT_COLS))})")
+
+_SLO_PI = {f"{slo}|{pi}" for slo, pis in PI_MAP.items() for pi in pis}
+_SEMESTER_RE = r"^(?:Spring|Fall) \d{4}$"       # the form's terms; short_sem has no Summer code
+
+
+class ImportReport:
+    """Outcome of one import: counts, the first rejects, and wall time."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.replaced = 0           # of `inserted`, rows that superseded a stored one
+        self.rejected = 0
+        self.rejects = []           # [(file row, reason)], first MAX_REJECT_DETAILS
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {"rows": self.rows, "inserted": self.inserted,
+                "replaced": self.replaced, "rejected": self.rejected, "seconds": round(self.seconds, 2),
+                "rejects": [{"row": r, "reason": why} for r, why in self.rejects]}
+
+    def __repr__(self):
+        return (f"ImportReport(rows={self.rows}, inserted={self.inserted}, "
+                f"replaced={self.replaced}, rejected={self.rejected}, "
+                f"{self.seconds:.2f} s)")
+
+
+# --------------------------------------------------------------------------- #
+# readers – yield DataFrames of strings, CHUNK_ROWS at a time
+# --------------------------------------------------------------------------- #
+def _norm_header(cols):
+    return [str(c).strip().lower().replace(" ", "_") for c in cols]
+
+
+def read_csv_chunks(src, chunk_rows: int = CHUNK_ROWS):
+    reader = pd.read_csv(src, dtype=str, keep_default_na=False,
+                         chunksize=chunk_rows, encoding="utf-8-sig")
+    for chunk in reader:
+        chunk.columns = _norm_header(chunk.columns)
+        yield chunk
+
+
+def read_xlsx_chunks(src, chunk_rows: int = CHUNK_ROWS):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:                       # pip install openpyxl
+        raise ValueError("XLSX import needs openpyxl") from exc
+    wb = load_workbook(src, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = _norm_header(next(rows, ()))
+        buf = []
+        for row in rows:
+            buf.append(["" if v is None else str(v) for v in row])
+            if len(buf) == chunk_rows:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
+
+def read_chunks(src, filename: str, chunk_rows: int = CHUNK_ROWS):
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return read_xlsx_chunks(src, chunk_rows)
+    if filename.lower().endswith((".csv", ".txt")):
+        return read_csv_chunks(src, chunk_rows)
+    raise ValueError(f"unsupported file type: {filename} (CSV or XLSX)")
+
+
+# --------------------------------------------------------------------------- #
+# validation
+# --------------------------------------------------------------------------- #
+def validate_chunk(df: pd.DataFrame, closed=()):
+    """
+    → (rows to insert as a DataFrame in INSERT_COLS order, reason per row).
+    `reason` is "" for good rows; a bad row gets its first failed check.
+    `closed` are archived semesters (archive.py), which take no new rows.
+    """
+    missing = [c for c in TEXT_COLS + SCORE_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+
+    text = df[TEXT_COLS + SCORE_COLS].apply(lambda s: s.str.strip())
+    text["course"] = text["course"].str.replace("\u00A0", " ")
+    text["pi"] = text["pi"].str.replace(r"^PI-", "PI\u2011", regex=True)
+    text["blooms_level"] = text["blooms_level"].str.capitalize()
+    scores = text[SCORE_COLS].apply(pd.to_numeric, errors="coerce")
+    total = scores.sum(axis=1)
+
+    # checks in priority order – the first failing one is reported
+    empty = text.eq("")
+    checks = [
+        (empty.any(axis=1),
+         "missing " + empty.idxmax(axis=1)),
+        (~text["course"].isin(COURSE_MAP.keys()),
+         "unknown course " + text["course"]),
+        (~text["slo"].isin(PI_MAP.keys()),
+         "unknown SLO " + text["slo"]),
+        (~(text["slo"] + "|" + text["pi"]).isin(_SLO_PI),
+         "PI not in " + text["slo"] + ": " + text["pi"]),
+        (~text["blooms_level"].isin(BLOOM_LEVELS),
+         "unknown Bloom level " + text["blooms_level"]),
+        (~text["semester"].str.match(_SEMESTER_RE),
+         "bad semester " + text["semester"]),
+        (text["semester"].isin(closed),
+         "semester closed " + text["semester"]),
+        (scores.isna().any(axis=1) | (scores < 0).any(axis=1),
+         "E/P/A/N must be non-negative numbers"),
+        ((total - 100).abs() > 0.01,
+         "E+P+A+N = " + total.round(2).astype(str)),
+    ]
+    reason = pd.Series("", index=df.index)
+    for bad, why in reversed(checks):
+        reason = reason.mask(bad, why)
+
+    good = reason.eq("")
+    out = text.loc[good, TEXT_COLS].copy()
+    out[SCORE_COLS] = scores.loc[good]
+    name = df["course_name"].str.strip() if "course_name" in df.columns else None
+    out["course_name"] = out["course"].map(COURSE_MAP)
+    if name is not None:
+        out["course_name"] = name[good].where(name[good].ne(""), out["course_name"])
+    return out[INSERT_COLS], reason
+
+
+# --------------------------------------------------------------------------- #
+# import
+# --------------------------------------------------------------------------- #
+def import_chunks(chunks, db_name: str = DB_NAME, dry_run: bool = False,
+                  rejects_out=None) -> ImportReport:
+    """
+    Validate and insert chunk by chunk, one transaction per chunk.  Rejected
+    rows are written to `rejects_out` (a text file) with their reasons.
+    """
+    report = ImportReport()
+    t0 = time.perf_counter()
+    first_row = 2                                   # row 1 is the header
+    with sqlite3.connect(db_name) as conn:
+        conn.execute("PRAGMA recursive_triggers = ON")   # REPLACE updates the search index
+        closed = archive.closed_terms(conn)
+        for chunk in chunks:
+            good, reason = validate_chunk(chunk, closed)
+            rownum = np.arange(first_row, first_row + len(chunk))
+            bad = reason.ne("").to_numpy()
+
+            report.rows += len(chunk)
+            report.rejected += int(bad.sum())
+            room = MAX_REJECT_DETAILS - len(report.rejects)
+            if room > 0:
+                report.rejects += list(zip(rownum[bad][:room].tolist(),
+                                           reason[bad][:room].tolist()))
+            if rejects_out is not None and bad.any():
+                chunk[bad].assign(row=rownum[bad], reason=reason[bad]).to_csv(
+                    rejects_out, header=rejects_out.tell() == 0, index=False)
+
+            if not dry_run and len(good):
+                conn.execute("BEGIN IMMEDIATE")
+                before = conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()[0]
+                conn.executemany(INSERT_SQL, good.itertuples(index=False, name=None))
+                added = conn.execute("SELECT COUNT(*) FROM abet_entries").fetchone()[0] - before
+                conn.commit()
+                report.inserted += len(good)
+                report.replaced += len(good) - added
+            first_row += len(chunk)
+    report.seconds = time.perf_counter() - t0
+    return report
+
+
+def import_file(path: str, **kw) -> ImportReport:
+    with open(path, "rb") as f:
+        return import_chunks(read_chunks(f, path), **kw)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Bulk-import ABET rows from CSV / XLSX.")
+    ap.add_argument("file")
+    ap.add_argument("--db", default=DB_NAME)
+    ap.add_argument("--dry-run", action="store_true", help="validate only")
+    ap.add_argument("--rejects", help="write rejected rows + reasons to this CSV")
+    args = ap.parse_args()
+
+    if not args.dry_run:
+        import migrate
+        migrate.migrate_db(args.db, migrate.PORTAL_STEPS)
+    out = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else None
+    try:
+        rep = import_file(args.file, db_name=args.db, dry_run=args.dry_run,
+                          rejects_out=out)
+    except ValueError as exc:
+        sys.exit(f"{os.path.basename(args.file)}: {exc}")
+    finally:
+        if out is not None:
+            out.close()
+    print(rep)
+    for row, why in rep.rejects[:20]:
+        print(f"  row {row}: {why}")
+    if rep.rejected > 20:
+        print(f"  … {rep.rejected - 20} more")
@@ -8,24 +8,33 @@ Open http://127.0.0.1:5000/login
 
 from flask import (
     Flask, render_template_string, request,
-    redirect, url_for, session
+    redirect, url_for, session, jsonify, g
 )
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from werkzeug.middleware.proxy_fix import ProxyFix
 import importlib
-import statsmodels.formula.api as smf
-abet_mod = importlib.import_module("ABET_Data_Rev1")   # or Rev2
-abet_app = abet_mod.app
-DB_NAME = abet_mod.DB_NAME
-import sqlite3
+import analysis
+import plots
 import os
 from werkzeug.serving import run_simple
-from mpl_toolkits.axes_grid1.inset_locator import inset_axes
-from scipy.stats import norm
-from matplotlib import colors
-
-import matplotlib.pyplot as plt
-
-
+import render
+import sessions
+import credentials
+import compression
+import ingest
+import snapshot
+import columnar
+import sharedcache
+import singleflight
+import warmup
+import admission
+import fitting
+import archive
+import search
+import program
+
+
+from contextlib import closing
 from functools import wraps
 from urllib.parse import quote_plus
 
@@ -40,32 +49,14 @@ def login_required(view):
 # ------------------------------------------------------------------ #
 # parameters
 # ------------------------------------------------------------------ #
-USERS = {
-    "MECE Admin"      : "admin230",
-    "Lawrence Cano"     : "HHP1",
-    "Yingchen Yang" : "2FVM",
-    "Eleazar Marquez" : "MBRH",
-    "Misael Martinez" : "AUBY",
-    "Robert Jones"    : "BABR",
-    "Jose Sanchez"    : "TY3I",
-    "Nadim Zgheib"    : "1R6N",
-    "Constantine T"   : "65YJ",
-    "Robert Freeman"  : "XB7U",
-    "Isaac Choutapalli"     : "4EMV",
-    "Caruntu D"       : "PUHL",
-    "Javier Ortega"   : "A3Q0",
-    "Noe Vargas"      : "GWSW",
-    "Kamal Sarkar"    : "1YEQ",
-    "Mataz Alcoutlabi": "7ICU",
-    "Super User": "LAMR",
-}
 SECRET_KEY = "CHANGE-ME"
 
 # ------------------------------------------------------------------ #
 # import the existing ABET app
 # ------------------------------------------------------------------ #
-abet_mod = importlib.import_module("ABET_Data_Rev1")   # same directory
+abet_mod = importlib.import_module("ABET_Data_Rev1")   # same directory (or Rev2)
 abet_app = abet_mod.app                                # Flask instance in that file
+DB_NAME = abet_mod.DB_NAME
 abet_app.config.update(
     SECRET_KEY=SECRET_KEY,               # share the key
     SESSION_COOKIE_SECURE=True,          # keep the same cookie policy
@@ -394,6 +385,12 @@ footer.copyright{
   .btn:hover{box-shadow:0 8px 18px rgba(0,0,0,.16)}
   .btn:active{transform:translateY(3px)}
   .btn:disabled{opacity:.5;cursor:not-allowed}
+
+  /* program-level trends table -------------------------------------- */
+  .prog{width:100%;border-collapse:collapse;font-size:.9rem}
+  .prog th,.prog td{padding:.45rem .5rem;border-bottom:1px solid #e0e0e0;text-align:right}
+  .prog th:first-child,.prog td:first-child{text-align:left}
+  .prog th{background:#003638;color:#fff;font-weight:600}
   
   </style>
 </head><body>
@@ -463,8 +460,34 @@ footer.copyright{
         <option>SLO1</option><option>SLO2</option><option>SLO3</option>
         <option>SLO4</option><option>SLO5</option><option>SLO6</option><option>SLO7</option>
       </select>
-      <button id='analyzeSloBtn' class='btn' disabled>Analyze SLO</button>
+      <button id='analyzeSloBtn' class='btn' onclick='analyzeSlo()' disabled>Analyze SLO</button>
+    </div>
+  </section>
+
+  <!-- 4 ░░░ Program-Level Trends ░░░ -->
+  <section class='section'>
+    <h2 class='section-hdr'>Program‑Level Trends</h2>
+    <p style='margin:0 0 .8rem;font-size:.9rem;color:#555'>
+      Per SLO, all courses: attainment per semester with crossed random effects for
+      course and semester.  Fitted in the background after submissions.</p>
+    <table id='programTbl' class='prog'>
+      <thead><tr><th>SLO</th><th>Slope (pts / semester)</th><th>95 % CI</th><th>p</th>
+        <th>Courses</th><th>Semesters</th><th>Rows</th>
+        <th>SD course</th><th>SD semester</th><th>SD residual</th></tr></thead>
+      <tbody></tbody>
+    </table>
+    <div id='programNote' style='margin-top:.6rem;font-size:.8rem;color:#555'>Loading…</div>
+  </section>
+
+  <!-- 5 ░░░ Bulk Import ░░░ -->
+  <section class='section'>
+    <h2 class='section-hdr'>Bulk Import (CSV / XLSX)</h2>
+    <div class='row'>
+      <input id='importFile' type='file' accept='.csv,.xlsx'>
+      <label><input id='importDry' type='checkbox'> validate only</label>
+      <button id='importBtn' class='btn' onclick='bulkImport()'>Import</button>
     </div>
+    <pre id='importReport' style='white-space:pre-wrap;margin:1rem 0 0'></pre>
   </section>
 
 </div>
@@ -497,10 +520,70 @@ function openSloChooser(){
 function analyze(){
   const course = document.getElementById('courseSel').value;
   const slo    = document.getElementById('sloSel').value;
-  window.open(`/analyze_course?course=${encodeURIComponent(course)}&slo=${encodeURIComponent(slo)}`,
+  const view   = {{ chart_view|tojson }} === 'client' ? '/analysis_view' : '/analyze_course';
+  window.open(`${view}?course=${encodeURIComponent(course)}&slo=${encodeURIComponent(slo)}`,
               '_blank','width=1100,height=800,resizable=yes');
 }
 
+// ─── SLO-level: every course for the SLO in one figure ──────────
+function analyzeSlo(){
+  const slo = document.getElementById('sloOnlySel').value;
+  window.open(`/analyze_slo?slo=${encodeURIComponent(slo)}`,
+              '_blank','width=1300,height=900,resizable=yes');
+}
+
+// ─── bulk import: same checks as the data-entry form ────────────
+function bulkImport(){
+  const file = document.getElementById('importFile').files[0];
+  const out  = document.getElementById('importReport');
+  if(!file){ alert('Choose a CSV or XLSX file first.'); return; }
+  const fd = new FormData();
+  fd.append('file', file);
+  fd.append('dry_run', document.getElementById('importDry').checked ? '1' : '0');
+  out.textContent = 'Importing…';
+  fetch('/admin/import', {method:'POST', body:fd})
+    .then(r=>r.json())
+    .then(js=>{
+      if(js.error){ out.textContent = js.error; return; }
+      const lines = js.rejects.map(r=>`  row ${r.row}: ${r.reason}`);
+      if(js.rejected > js.rejects.length) lines.push(`  … ${js.rejected - js.rejects.length} more`);
+      out.textContent = `${js.rows} rows read, ${js.inserted} inserted `
+                      + `(${js.replaced} replacing stored rows), `
+                      + `${js.rejected} rejected (${js.seconds} s)\n` + lines.join('\n');
+    })
+    .catch(()=>{ out.textContent = 'Import failed.'; });
+}
+
+// ─── program-level trends: cached fits, never fitted on load ────
+function loadProgram(){
+  const body = document.querySelector('#programTbl tbody');
+  const note = document.getElementById('programNote');
+  const num  = (v, d=2) => v === null || v === undefined ? '–' : (+v).toFixed(d);
+  fetch('/admin/program')
+    .then(r=>r.json())
+    .then(js=>{
+      if(js.error){ note.textContent = js.error; return; }
+      body.innerHTML = '';
+      js.slos.forEach(f=>{
+        const tr = document.createElement('tr');
+        const sd = f.sd || {};
+        [f.slo, (f.slope >= 0 ? '+' : '') + num(f.slope),
+         f.ci ? `${num(f.ci[0])} … ${num(f.ci[1])}` : '–',
+         num(f.pvalue, 3), f.courses,
+         f.semesters.length ? `${f.semesters[0]}–${f.semesters[f.semesters.length-1]}` : '–',
+         f.rows, num(sd.course), num(sd.semester), num(sd.residual)]
+          .forEach(v=>{ const td = document.createElement('td'); td.textContent = v; tr.append(td); });
+        if(f.reason) tr.title = `${f.label}: ${f.reason}`;
+        body.append(tr);
+      });
+      note.textContent = `Fitted on ${js.stamp[0]} rows, `
+                       + new Date(js.computed_at * 1000).toLocaleString()
+                       + (js.current ? '' : ' · newer rows exist – refit pending');
+    })
+    .catch(()=>{ note.textContent = 'Program trends unavailable.'; });
+}
+loadProgram();
+
 // ─── enable Analyze SLO btn when dropdown chosen ────────────────
 document.getElementById('sloOnlySel').addEventListener('change',e=>{
   document.getElementById('analyzeSloBtn').disabled = !e.target.value;
@@ -527,6 +610,7 @@ caption{margin:2.5rem auto 1.2rem;font-size:1.6rem;font-weight:700;color:#003638
 </style>
 </head><body>
 <caption>ABET Data (entries: {{ rows|length }})</caption>
+<p style="text-align:center;color:#555;font-size:.85rem">{{ as_of }}</p>
 <table>
   <thead>
     <tr>{% for col in columns %}<th>{{ col }}</th>{% endfor %}</tr>
@@ -540,6 +624,147 @@ caption{margin:2.5rem auto 1.2rem;font-size:1.6rem;font-weight:700;color:#003638
 </body></html>
 """
 
+# client-side chart view: the four analyze_course panels drawn as SVG in
+# the browser from /api/analysis – no server-side rendering per viewer
+CHART_HTML = """
+<!DOCTYPE html><html><head>
+<meta charset="utf-8"><title>{{ course }} {{ slo }}</title>
+<link href="https://fonts.googleapis.com/css2?family=Poppins:wght@400;600&display=swap" rel="stylesheet">
+<style>
+*{box-sizing:border-box;font-family:Poppins,sans-serif}
+body{margin:0;background:#f7f9fc;color:#252525}
+main{max-width:900px;margin:1.5rem auto;padding:0 1rem}
+section{background:#fff;border-radius:12px;box-shadow:0 4px 10px rgba(0,0,0,.08);
+        padding:.8rem 1rem;margin-bottom:1.2rem}
+h2{margin:.2rem 0 .4rem;font-size:1rem;color:#003638}
+svg text{font-size:11px;fill:#333}
+.grid{stroke:#e0e0e0}  .target{stroke:red;stroke-dasharray:5 4}
+.met{fill:#2e8b57}     .missed{fill:#c0392b}
+.box{fill:#8DB9CA;fill-opacity:.75;stroke:#333}  .median{stroke:firebrick;stroke-width:2}
+.whisker{stroke:#333}  .flier{fill:none;stroke:#333}
+.band{fill:#1f77b4;fill-opacity:.18}  .fit{stroke:#1f77b4;stroke-width:2.2;fill:none}
+.note{font-style:italic}
+#meta{color:#555;font-size:.8rem;text-align:center}
+</style>
+</head><body><main>
+<div id="charts"></div>
+<p id="meta"></p>
+<p style="text-align:center;font-size:.85rem">
+  <a href="{{ base }}&profile=pdf" target="_blank">PDF</a> ·
+  <a href="{{ base }}&profile=svg" target="_blank">SVG</a> ·
+  <a href="{{ base }}&profile=print" target="_blank">300 dpi PNG</a>
+</p>
+</main>
+<script>
+const COURSE = {{ course|tojson }}, SLO = {{ slo|tojson }};
+const NS = 'http://www.w3.org/2000/svg';
+const W = 860, H = 300, L = 46, R = 10, T = 14, B = 46;
+
+function el(tag, attrs, parent, text){
+  const e = document.createElementNS(NS, tag);
+  for(const k in attrs) e.setAttribute(k, attrs[k]);
+  if(text !== undefined) e.textContent = text;
+  if(parent) parent.appendChild(e);
+  return e;
+}
+const fmt = (v, d=1) => v === null ? '–' : v.toFixed(d);
+
+// one panel: % axis 0–110, categorical x, the target line
+function panel(title, cats, target){
+  const sec = document.createElement('section');
+  const h = document.createElement('h2'); h.textContent = title; sec.appendChild(h);
+  const svg = el('svg', {viewBox: `0 0 ${W} ${H}`, width: '100%'}, sec);
+  document.getElementById('charts').appendChild(sec);
+
+  const y = v => T + (H - T - B) * (1 - Math.min(Math.max(v, 0), 110) / 110);
+  const step = (W - L - R) / Math.max(cats.length, 1), x = i => L + step * (i + .5);
+  for(let v = 0; v <= 100; v += 20){
+    el('line', {x1: L, x2: W - R, y1: y(v), y2: y(v), class: 'grid'}, svg);
+    el('text', {x: L - 6, y: y(v) + 4, 'text-anchor': 'end'}, svg, v);
+  }
+  cats.forEach((c, i) => {
+    const t = el('text', {x: x(i), y: H - B + 16, 'text-anchor': 'middle'}, svg);
+    String(c).split('\\n').forEach((line, j) =>
+      el('tspan', {x: x(i), dy: j ? '1.2em' : 0}, t, line));
+  });
+  el('line', {x1: L, x2: W - R, y1: y(target), y2: y(target), class: 'target'}, svg);
+  return {svg, x, y, step};
+}
+
+function note(p, lines){
+  const t = el('text', {x: L + 8, y: T + 14, class: 'note'}, p.svg);
+  lines.filter(Boolean).forEach((line, j) => el('tspan', {x: L + 8, dy: j ? '1.3em' : 0}, t, line));
+}
+
+// grouped bars: means[category][series], green if it meets the target
+function bars(title, cats, series, means, target){
+  const p = panel(title, cats, target), bw = p.step * .8 / Math.max(series.length, 1);
+  cats.forEach((c, i) => series.forEach((s, j) => {
+    const v = means[i][j];
+    if(v === null) return;
+    const r = el('rect', {x: p.x(i) - p.step * .4 + j * bw, y: p.y(v), width: bw,
+                          height: p.y(0) - p.y(v), class: v >= target ? 'met' : 'missed',
+                          'fill-opacity': .5 + .45 * j / Math.max(series.length - 1, 1)}, p.svg);
+    el('title', {}, r, `${String(c).replace('\\n', ' ')} · ${s}: ${fmt(v)} %`);
+  }));
+}
+
+function boxes(b, target){
+  const p = panel('Bloom-level attainment', b.boxes.map(s => `${s.label}\\nn = ${s.n}`), target);
+  const w = p.step * .5;
+  b.boxes.forEach((s, i) => {
+    const cx = p.x(i);
+    el('line', {x1: cx, x2: cx, y1: p.y(s.whislo), y2: p.y(s.whishi), class: 'whisker'}, p.svg);
+    [s.whislo, s.whishi].forEach(v =>
+      el('line', {x1: cx - w / 4, x2: cx + w / 4, y1: p.y(v), y2: p.y(v), class: 'whisker'}, p.svg));
+    const r = el('rect', {x: cx - w / 2, y: p.y(s.q3), width: w,
+                          height: p.y(s.q1) - p.y(s.q3), class: 'box'}, p.svg);
+    el('title', {}, r, `${s.label}: n = ${s.n}, median ${fmt(s.med)}, ` +
+                       `IQR ${fmt(s.q1)}–${fmt(s.q3)}, mean ${fmt(s.mean)}, sd ${fmt(s.sd)}`);
+    el('line', {x1: cx - w / 2, x2: cx + w / 2, y1: p.y(s.med), y2: p.y(s.med), class: 'median'}, p.svg);
+    s.fliers.forEach(f => el('circle', {cx, cy: p.y(f), r: 3, class: 'flier'}, p.svg));
+  });
+  note(p, [b.kruskal_p !== null && `Kruskal-Wallis p = ${fmt(b.kruskal_p, 3)}`,
+           b.cliffs_delta !== null &&
+             `Cliff's Δ (Analyze vs others) = ${b.cliffs_delta >= 0 ? '+' : ''}${fmt(b.cliffs_delta, 2)}`]);
+}
+
+function trend(t, target){
+  const p = panel(`${COURSE} – ${SLO}: ${t.label} trend`, t.semesters, target);
+  if(!t.low.includes(null) && !t.high.includes(null)){
+    const pts = t.high.map((v, k) => `${p.x(k)},${p.y(v)}`)
+                 .concat(t.low.map((v, k) => `${p.x(k)},${p.y(v)}`).reverse());
+    el('polygon', {points: pts.join(' '), class: 'band'}, p.svg);
+  }
+  el('polyline', {points: t.fit.map((v, k) => `${p.x(k)},${p.y(v)}`).join(' '), class: 'fit'}, p.svg);
+  const umax = Math.max(1e-9, ...t.random_effects.map(u => Math.abs(u || 0)));
+  t.observed.forEach((v, k) => {
+    const u = t.random_effects[k] || 0;
+    const c = el('circle', {cx: p.x(k), cy: p.y(v), r: 7, stroke: '#333',
+                            fill: u >= 0 ? '#2e8b57' : '#c0392b',
+                            'fill-opacity': .25 + .75 * Math.abs(u) / umax}, p.svg);
+    el('title', {}, c, `${t.semesters[k]}: ${fmt(v)} % (model ${fmt(t.fit[k])} %)`);
+  });
+  note(p, [`β₁ = ${t.slope >= 0 ? '+' : ''}${fmt(t.slope, 2)}`, `p = ${fmt(t.pvalue, 3)}`]);
+}
+
+fetch(`/api/analysis?course=${encodeURIComponent(COURSE)}&slo=${encodeURIComponent(SLO)}`)
+  .then(async r => {
+    const d = await r.json();
+    if(!r.ok) throw new Error(d.error || r.statusText);
+    const s = d.by_semester, pb = d.by_pi_bloom;
+    bars(`${COURSE} – ${SLO} (by Semester)`, s.semesters, s.pis, s.means, d.target);
+    bars(`${COURSE} – ${SLO} (by PI and Bloom)`, pb.combos.map(c => c.replace(' (', '\\n(')),
+         pb.semesters, pb.means, d.target);
+    boxes(d.bloom, d.target);
+    trend(d.trend, d.target);
+    document.getElementById('meta').textContent = r.headers.get('X-Data-As-Of') || '';
+  })
+  .catch(e => { alert(e.message); window.close(); });
+</script>
+</body></html>
+"""
+
 # ------------------------------------------------------------------ #
 # parent Flask app – handles login / logout
 # ------------------------------------------------------------------ #
@@ -548,12 +773,37 @@ parent.config["SECRET_KEY"] = SECRET_KEY
 parent.config["SESSION_COOKIE_SECURE"] = True
 parent.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 
+# sessions live server-side (sessions.py); both apps read the one session
+# object AuthMiddleware loads per request.  "memory" is for single-process
+# dev servers only – workers would not see each other's logins.
+SESSION_DB = os.environ.get("ABET_SESSION_DB", "abet_sessions.db")
+if os.environ.get("ABET_SESSION_STORE", "sqlite") == "memory":
+    session_store = sessions.MemoryStore()
+else:
+    session_store = sessions.SqliteStore(SESSION_DB)
+parent.session_interface = abet_app.session_interface = \
+    sessions.ServerSessionInterface(session_store)
+
+credential_store = credentials.CredentialStore(DB_NAME)
+login_throttle = credentials.LoginThrottle(
+    user_limit=int(os.environ.get("ABET_LOGIN_USER_LIMIT", "5")),
+    ip_limit=int(os.environ.get("ABET_LOGIN_IP_LIMIT", "50")),
+)
+
 @parent.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         user = request.form.get("user", "")
         pw   = request.form.get("password", "")
-        if USERS.get(user) == pw:
+        ip   = request.remote_addr or ""
+        key  = login_throttle.user_key(user, ip)   # per name *and* address
+        wait = login_throttle.retry_after("user", key)
+        if wait:
+            return credentials.too_many(wait)
+        if credential_store.check(user, pw):
+            login_throttle.succeeded(key)
+            session.clear()                    # nothing from before the login is kept,
+            session.rotate()                   # not even the id (session fixation)
             session["user"] = user
 
             # ───── redirect faculty straight to the mounted app ─────
@@ -564,6 +814,7 @@ def login():
             # admin keeps the existing portal
             return redirect(url_for("admin_portal"))
 
+        login_throttle.failed(user=key, ip=ip)
         return render_template_string(LOGIN_HTML, error="Invalid credentials")
 
     return render_template_string(LOGIN_HTML, error=None)
@@ -571,6 +822,7 @@ def login():
 @parent.route("/logout")
 def logout():
     session.clear()
+    session.rotate()
     return redirect("/login")
 
 @parent.route("/")
@@ -578,19 +830,29 @@ def root():
     return redirect("/login")
 
 # ------------------------------------------------------------------ #
-# protect every /abet* URL
-# ------------------------------------------------------------------ #
-@parent.before_request
-def guard():
-    if request.path.startswith("/abet") and "user" not in session:
-        return redirect(url_for("login"))
-
-# ------------------------------------------------------------------ #
-# mount the original ABET app at /abet
+# mount the original ABET app at /abet; AuthMiddleware resolves the
+# session once and protects every /abet* URL
 # ------------------------------------------------------------------ #
-application = DispatcherMiddleware(parent.wsgi_app, {
-    "/abet": abet_app   # all of your existing routes/assets now live under /abet
-})
+application = sessions.AuthMiddleware(
+    DispatcherMiddleware(parent.wsgi_app, {
+        "/abet": abet_app   # all of your existing routes/assets now live under /abet
+    }),
+    session_store, cookie_name=parent.config["SESSION_COOKIE_NAME"],
+)
+# failed-login limit per address is checked before the session lookup;
+# behind N reverse proxies set ABET_PROXY_HOPS=N so REMOTE_ADDR is the client
+application = credentials.ThrottleMiddleware(application, login_throttle)
+# analysis computations are admitted through a small gate (admission.py);
+# the write requests (/abet/submit, /abet/save_draft, /admin/import) go first
+analysis_gate = admission.Gate(
+    limit=int(os.environ.get("ABET_ANALYSIS_LIMIT", "2")),
+    queue=int(os.environ.get("ABET_ANALYSIS_QUEUE", "4")),
+    max_wait=float(os.environ.get("ABET_ANALYSIS_MAX_WAIT", "10")))
+application = admission.PriorityMiddleware(application, analysis_gate)
+application = compression.CompressionMiddleware(application)   # br / gzip text bodies
+PROXY_HOPS = int(os.environ.get("ABET_PROXY_HOPS", "0"))
+if PROXY_HOPS:
+    application = ProxyFix(application, x_for=PROXY_HOPS)
 
 @parent.route("/abet", endpoint="abet")
 @login_required
@@ -612,7 +874,28 @@ def abet_root():
 def admin_portal():
     if session.get("user") != "MECE Admin":
         return redirect(url_for("abet"))   # non-admin users go to /abet
-    return render_template_string(ADMIN_HTML)
+    return render_template_string(ADMIN_HTML, chart_view=CHART_VIEW)
+
+# "client": the Analyze button opens the browser-drawn chart view
+# (/analysis_view) and matplotlib only runs for PDF/SVG/print exports
+CHART_VIEW = os.environ.get("ABET_CHART_VIEW", "server")
+
+@parent.route("/admin/import", methods=["POST"])
+@login_required
+def admin_import():
+    """Bulk CSV/XLSX upload → ingest.py; answers with the import report."""
+    if session.get("user") != "MECE Admin":
+        return redirect(url_for("abet"))
+
+    f = request.files.get("file")
+    if f is None or not f.filename:
+        return jsonify({"error": "no file uploaded"}), 400
+    try:
+        report = ingest.import_chunks(ingest.read_chunks(f.stream, f.filename),
+                                      dry_run=request.form.get("dry_run") == "1")
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(report.as_dict())
 
 @parent.route("/download")
 @login_required
@@ -621,455 +904,453 @@ def download():
         return redirect(url_for("abet"))
 
     course = request.args.get("course")        # may be None
-    with sqlite3.connect(DB_NAME) as conn:
-        if course:
-            df = pd.read_sql_query(
-                "SELECT * FROM abet_entries WHERE course = ?",
-                conn, params=(course.replace("\u00A0"," "),)
-            )
-        else:
-            df = pd.read_sql_query("SELECT * FROM abet_entries", conn)
+    table, as_of = entry_table()
+    df = table.frame(table.mask(course=course.replace("\u00A0", " ")) if course else None)
 
     return render_template_string(
         DATA_HTML,
         columns=df.columns,
-        rows=df.to_dict(orient="records")
+        rows=df.to_dict(orient="records"),
+        as_of=snapshot.freshness(as_of),
     )
 # ------------------------------------------------------------------ #
 # run
 # ------------------------------------------------------------------ #
 
-from io import BytesIO
-import base64, pandas as pd, matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing, threading
+from flask import Response
+import base64, json
+
+# Figure rendering is CPU-bound and pyplot is not thread-safe.  Under a
+# threaded server (asgi.py, experimental) renders go to a pool of worker processes;
+# 0 = render inline, which is what the one-request-per-worker gunicorn
+# sync setup wants.
+RENDER_PROCESSES = int(os.environ.get("ABET_RENDER_PROCESSES", "0"))
+RENDER_NICE = int(os.environ.get("ABET_RENDER_NICE", "10"))   # pool workers yield CPU to requests
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def render_pool():
+    """The render process pool, started (and its workers warmed) on first use."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),  # no forked Flask state
+                initializer=render.lower_priority, initargs=(RENDER_NICE,))
+            # importing matplotlib/statsmodels takes seconds – pay it up front
+            for f in [_render_pool.submit(render.warm_up) for _ in range(RENDER_PROCESSES)]:
+                f.result()
+    return _render_pool
+
+_inline_render_lock = threading.Lock()    # request vs. warm-up thread
+
+def run_render(fn, *args):
+    """Call a render.* function inline or in the render process pool."""
+    if RENDER_PROCESSES <= 0:
+        with _inline_render_lock:
+            return fn(*args)
+    return render_pool().submit(fn, *args).result()
+
+# analysis views and /download read a backup-API snapshot of the database
+# (snapshot.py) at most ABET_SNAPSHOT_MAX_AGE seconds old, never the live file
+analytics = snapshot.Snapshot(
+    DB_NAME, mode=os.environ.get("ABET_SNAPSHOT", "file"),
+    max_age=float(os.environ.get("ABET_SNAPSHOT_MAX_AGE", "60")))
+SNAPSHOT_REFRESH = float(os.environ.get("ABET_SNAPSHOT_REFRESH", "0"))
+if SNAPSHOT_REFRESH > 0:
+    analytics.start_refresher(SNAPSHOT_REFRESH)
+
+# …and through a columnar copy of abet_entries (columnar.py), tailed from
+# the snapshot, so each view is a NumPy mask instead of SQL + DataFrame build
+entries = columnar.EntryColumns()
+
+def entry_table():
+    """→ (current columnar.Columns of open and archived terms, snapshot time)."""
+    conn, as_of = analytics.connect()
+    with closing(conn):
+        return entries.sync(conn, version=as_of, archived=lambda: archive.archived(conn)), as_of
+
+# rendered figures keyed on (course, slo, profile, data stamp) – LRU; the
+# per-course Bloom summaries live here too, under ("bloom", course, slo, stamp)
+FIGURE_CACHE_SIZE = 64
+_figure_cache = OrderedDict()
+
+_figure_lock = threading.Lock()
+_figure_stats = {"hits": 0, "misses": 0}
+
+def cached_figure(key):
+    with _figure_lock:
+        hit = _figure_cache.get(key)
+        if hit is not None:
+            _figure_cache.move_to_end(key)
+        _figure_stats["misses" if hit is None else "hits"] += 1
+        return hit
+
+def store_figure(key, value):
+    with _figure_lock:
+        _figure_cache[key] = value
+        _figure_cache.move_to_end(key)
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+
+# concurrent misses on one key – across threads and gunicorn workers – run
+# the computation once (singleflight.py); waiters past the timeout go alone
+flights = singleflight.SingleFlight(
+    os.environ.get("ABET_FLIGHT_DB", "abet_flights.db"),
+    timeout=float(os.environ.get("ABET_FLIGHT_TIMEOUT", "30")))
+
+# behind the per-process LRU: the on-disk cache every worker shares and
+# that survives restarts (sharedcache.py); load_records uses it as well
+result_cache = sharedcache.from_env()
+abet_mod.records_cache = result_cache
+
+def shared_figure(key, compute, stale_ok=False):
+    """
+    Per-process LRU, then the shared cache, else compute() – once per key
+    across workers – and store in both.  With `stale_ok`, an
+    admission.Overloaded from compute() is answered with the newest entry
+    for the same key minus its data stamp, if there is one (g.stale is set).
+    """
+    hit = cached_figure(key)
+    if hit is None:
+        disk_key = json.dumps(key)
+        hit = result_cache.get(disk_key)
+        if hit is None:
+            try:
+                hit = flights.do(key, compute)
+            except admission.Overloaded:
+                hit = stale_figure(key) if stale_ok else None
+                if hit is None:
+                    raise
+                g.stale = True
+                return hit
+            result_cache.put(disk_key, hit)
+            result_cache.put(json.dumps(["latest", *key[:-1]]), disk_key)
+        store_figure(key, hit)
+    return hit
+
+def stale_figure(key):
+    """Newest stored result for `key` under any data stamp, or None."""
+    disk_key = result_cache.get(json.dumps(["latest", *key[:-1]]))
+    hit = result_cache.get(disk_key) if disk_key else None
+    if hit is not None:
+        analysis_gate.count("stale_served")
+    return hit
+
+def gated(compute):
+    """compute() through the analysis gate (may raise admission.Overloaded)."""
+    return lambda: analysis_gate.run(compute)
+
+@parent.errorhandler(admission.Overloaded)
+def analysis_busy(exc):
+    return admission.busy(exc.retry_after)
+
+@parent.route("/search")
+@login_required
+def search_entries():
+    """
+    Ranked full-text search of the observations and explanations, open and
+    archived terms (search.py), optionally narrowed to a course, SLO and
+    semester.  Reads the analytics snapshot, like the analysis views.
+    """
+    course, slo = course_args()
+    semester = request.args.get("semester", "").strip()
+    limit = request.args.get("limit", 50, type=int)
+    conn, as_of = analytics.connect()
+    with closing(conn):
+        archive.attach(conn)
+        try:
+            found = search.search(conn, request.args.get("q", ""), course=course,
+                                  slo=slo, semester=semester, limit=limit)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+    resp = jsonify(found)
+    resp.headers["X-Data-As-Of"] = snapshot.freshness(as_of)
+    return resp
+
+def course_rows(table, rows, course, slo, stamp):
+    """
+    → (raw rows of one course/SLO, their Bloom summary).  The summary depends
+    on the data only, so every profile and the JSON API share one per stamp.
+    """
+    df = table.frame(rows, ["pi", "semester", "blooms_level", "expert",
+                            "practitioner", "apprentice", "novice"])
+    return df, bloom_stats(table, rows, course, slo, stamp)
+
+def bloom_stats(table, rows, course, slo, stamp):
+    """The Bloom summary of one course/SLO, stored under its data stamp."""
+    def compute():
+        attain = table.column("expert", rows) + table.column("practitioner", rows)
+        return analysis.bloom_summary(attain, table.column("blooms_level", rows))
+    return shared_figure(("bloom", course, slo, stamp), compute)
+
+def precompute_blooms(table):
+    """
+    Bloom summaries of every course/SLO in `table` into the shared cache, so
+    no view – in any worker, after a restart too – computes one on request.
+    Stamp-keyed: only pairs whose rows changed are computed again.
+    """
+    pairs = set(zip(table.data["course"].tolist(), table.data["slo"].tolist()))
+    for c, s in sorted(pairs):
+        course, slo = table.cats["course"][c], table.cats["slo"][s]
+        rows = table.mask(course=course, slo=slo)
+        bloom_stats(table, rows, course, slo, table.stamp(rows))
+
+def course_args():
+    """(course, slo) query arguments, NBSP-normalised like the form sends them."""
+    return (request.args.get("course", "").replace("\u00A0", " ").strip(),
+            request.args.get("slo", "").strip())
 
 @parent.route("/analyze_course")
 @login_required
 def analyze_course():
-    """Return either an alert (if no rows) or an HTML page with a bar‑plot."""
-    course = (request.args.get("course", "")  # existing line
-              .replace("\u00A0", " ")  # NBSP → normal space
-              .strip())
-    slo = request.args.get("slo", "").strip()
+    """
+    Return either an alert (if no rows) or an HTML page with the analysis
+    figure.  `profile` picks the output (see plots.PROFILES); `pdf` is sent
+    as the document itself, everything else is embedded in the page.
+    """
+    course, slo = course_args()
+    profile = request.args.get("profile", plots.DEFAULT_PROFILE).strip().lower()
     if not course or not slo:
-        return "<script>alert('Missing course/SLO');window.close();</script>"
-
-
-    with sqlite3.connect(DB_NAME) as conn:
-        q = """
-                SELECT pi,
-                       semester,
-                       blooms_level,          
-                       expert,
-                       practitioner,
-                       apprentice,
-                       novice
-                  FROM abet_entries
-                 WHERE course=? AND slo=?
-            """
-        df = pd.read_sql_query(q, conn, params=(course, slo))
-
-    if df.empty:
+        return "<script>alert('Missing course/SLO');window.close();</script>"
+    if profile not in plots.PROFILES:
+        return "<script>alert('Unknown output profile');window.close();</script>"
+
+    table, as_of = entry_table()
+    # rows are appended or replaced under a fresh id (ABET_Data_Rev1.UPSERT_SQL),
+    # never edited in place, so (count, max id) identifies the data
+    rows = table.mask(course=course, slo=slo)
+    stamp = table.stamp(rows)
+    if not stamp[0]:
         return "<script>alert('This course does not have this SLO data');window.close();</script>"
 
-    def short_sem(sem: str) -> str:
-        try:
-            season, yr = sem.split()
-            return ("F" if season.lower().startswith("f") else "Sp") + yr[-2:]
-        except ValueError:
-            return sem
-
-    df["sem_short"] = df["semester"].apply(short_sem)
+    def compute():
+        df, bloom = course_rows(table, rows, course, slo, stamp)
+        return run_render(render.render_course, df, course, slo, profile, bloom)
 
-    df["semester_idx"] = (
-            df["sem_short"]
-            .rank(method="dense")  # 1,2,3… in chronological order
-            .astype(int) - 1
-    )
-
-    #   combine Expert + Practitioner as a single attainment metric
-    df['attain'] = df['expert'] + df['practitioner']
+    data, mimetype = shared_figure((course, slo, profile, stamp), gated(compute),
+                                   stale_ok=True)
 
-    df["pi"] = df["pi"].astype(str).str.strip()  # NEW ↓ normalise text
-    pis = sorted(df["pi"].unique())  # NEW ↓ dynamic PI list
-    n_pi = len(pis)  # NEW ↓ use everywhere
+    base = f"/analyze_course?course={quote_plus(course)}&slo={quote_plus(slo)}"
+    return figure_page(f"{course} {slo}", data, mimetype, base, as_of, max_width="38%")
 
-    # ── NEW: normalise Bloom text and build a PI-Bloom combo label ─────────
-    df["blooms_level"] = df["blooms_level"].astype(str).str.strip()
 
-    # helper: "PI-1: Able to …"  →  "PI-1"
-    def short_pi(txt: str) -> str:
-        return txt.split(":")[0].strip()
+@parent.route("/api/analysis")
+@login_required
+def api_analysis():
+    """
+    The aggregated series of one course/SLO as JSON – PI means per semester,
+    PI×Bloom means, Bloom box stats, the trend line with its band – which
+    the chart view draws in the browser.  Serialised once per data stamp,
+    so a repeat view is one cache lookup (or a 304).
+    """
+    course, slo = course_args()
+    if not course or not slo:
+        return jsonify({"error": "Missing course/SLO"}), 400
 
-    # composite label stored in the dataframe
-    df["pi_bl"] = df["pi"].apply(short_pi) + " (" + df["blooms_level"] + ")"
+    table, as_of = entry_table()
+    rows = table.mask(course=course, slo=slo)
+    stamp = table.stamp(rows)
+    if not stamp[0]:
+        return jsonify({"error": "This course does not have this SLO data"}), 404
 
-    model = smf.mixedlm(
-        "attain ~ semester_idx",  # fixed slope = improvement / term
-        data=df,
-        groups="sem_short"  # one random intercept per semester
-    ).fit(method="lbfgs")
+    def compute():
+        df, bloom = course_rows(table, rows, course, slo, stamp)
+        return run_render(render.render_course_json, df, course, slo, bloom)
 
-    print(model.summary())  # slope β₁ & its p-value
+    body = shared_figure(("json", course, slo, stamp), gated(compute), stale_ok=True)
 
-    # ---- build the ordered list of rows for pivot-2 ----------------------
-    combo_order = []
-    for pi_full in pis:  # pis still has the *long* strings
-        pi_tag = short_pi(pi_full)  # ← convert once here
-        seen = set()
-        for lvl in df.loc[df.pi == pi_full, "blooms_level"]:
-            if lvl not in seen:
-                combo_order.append(f"{pi_tag} ({lvl})")  # ← short tag
-                seen.add(lvl)
-    n_combo = len(combo_order)
+    resp = Response(body, mimetype="application/json",
+                    headers={"X-Data-As-Of": snapshot.freshness(as_of)})
+    if g.get("stale"):                    # not for this stamp – no validator
+        resp.headers["Warning"] = '110 - "Response is Stale"'
+        return resp
+    resp.set_etag(f"{stamp[0]}-{stamp[1]}")
+    return resp.make_conditional(request)
 
-    # ───────────────────────  TWO‑PLOT LAYOUT  ──────────────────────────
-    import numpy as np, matplotlib.patches as mpatches
-    from matplotlib import ticker
+@parent.route("/analysis_view")
+@login_required
+def analysis_view():
+    """Client-side chart view of /api/analysis; exports still use analyze_course."""
+    course, slo = course_args()
+    if not course or not slo:
+        return "<script>alert('Missing course/SLO');window.close();</script>"
+    return render_template_string(
+        CHART_HTML, course=course, slo=slo,
+        base=f"/analyze_course?course={quote_plus(course)}&slo={quote_plus(slo)}")
 
-    # --------------------- helpers for semester -------------------------
-    def short_sem(sem: str) -> str:
-        try:
-            season, yr = sem.split()
-            tag = "F" if season.lower().startswith("f") else "Sp"
-            return f"{tag}{yr[-2:]}"
-        except ValueError:
-            return sem
-
-    def sem_key(sem: str) -> int:  # chronological sort key
-        if sem.startswith("F"):
-            return int("20" + sem[1:]) * 2 + 1
-        elif sem.startswith("Sp"):
-            return int("20" + sem[2:]) * 2
-        return 10 ** 9
-
-    df["sem_short"] = df["semester"].apply(short_sem)
-    sem_order = sorted(df["sem_short"].unique(), key=sem_key)  # e.g. ['F20','Sp21','F21', …]
-    sem_to_idx = {s: i for i, s in enumerate(sem_order)}
-
-    df["semester_idx"] = df["sem_short"].map(sem_to_idx)
-
-    bloom_for_pi = (
-        df.groupby("pi")["blooms_level"]
-        .agg(lambda s: s.mode().iat[0] if not s.mode().empty else "")
-    )
 
-    # ─── 3.  fit mixed-effects model  (NEW)  ────────────────────────────
-    lmm = smf.mixedlm(
-        'attain ~ semester_idx',  # fixed slope
-        data=df,
-        groups='sem_short'  # random intercept per semester
-    ).fit(method='lbfgs')
-    u = pd.Series({k: v.values[0] for k, v in lmm.random_effects.items()}) \
-        .sort_index()
-
-    # ─── 4.  build g = tidy table for plotting  (NEW)  ──────────────────
-    g = (df.groupby(['sem_short', 'semester_idx'])
-         .agg(mean_attain=('attain', 'mean'))
-         .reset_index())
-
-    g = g.sort_values('semester_idx')  # ensure ascending x
-   # pred = lmm.get_prediction(g, exog=dict(semester_idx=g.semester_idx))
-   # g['fit'] = pred.predicted_mean
-   # g[['low', 'high']] = pred.conf_int()
-
-    g['fit'] = lmm.predict(exog=dict(semester_idx=g.semester_idx))
-
-    # design matrix for the fixed effects (Intercept and semester_idx)
-    X = pd.DataFrame({
-        'Intercept': 1.0,
-        'semester_idx': g.semester_idx
-    })
+def figure_page(title, data, mimetype, base, as_of, max_width):
+    """
+    Wrap rendered figure bytes: PDFs go out as-is, images get a page with
+    the snapshot's freshness under the chart.
+    """
+    fresh = snapshot.freshness(as_of)
+    if mimetype == "application/pdf":
+        return Response(data, mimetype=mimetype, headers={
+            "Content-Disposition": f'inline; filename="{title}.pdf"',
+            "X-Data-As-Of": fresh})
+
+    img64 = base64.b64encode(data).decode()
+    note = " · server busy – showing an earlier chart" if g.get("stale") else ""
+    return f"""
+    <!doctype html>
+    <html>
+    <head><title>{title}</title></head>
 
-    # covariance matrix of the two fixed-effect estimates
-    V = lmm.cov_params().loc[['Intercept', 'semester_idx'],
-    ['Intercept', 'semester_idx']]
-
-    # standard error for each fitted point
-    se = np.sqrt((X @ V * X).sum(axis=1))
-
-    from scipy.stats import t
-    crit = t.ppf(0.975, df=lmm.df_resid)  # 95 % two-sided
-
-    g['low'] = g['fit'] - crit * se
-    g['high'] = g['fit'] + crit * se
-
-    # -----------------  PIVOT #1 : rows = semester ----------------------
-    pivot1 = (df.groupby(["sem_short", "pi"])["attain"]
-              .mean()
-              .unstack(fill_value=0)
-              .reindex(columns=pis, fill_value=0)
-              .sort_index(key=lambda idx: idx.map(sem_key)))
-
-    semesters = pivot1.index.tolist()
-    pis = pivot1.columns.tolist()
-    n_sem, n_pi = len(semesters), len(pis)
-
-    # -----------------  PIVOT #2 : rows = PI ----------------------------
-    # -----------------  PIVOT #2 : rows = PI + Bloom ------------------------
-    pivot2 = (df.groupby(["pi_bl", "sem_short"])["attain"]
-              .mean()
-              .unstack(fill_value=0)
-              .reindex(index=combo_order, fill_value=0)  # every combo row
-              .reindex(columns=semesters, fill_value=0))  # every semester
-
-    # colour palettes – distinct-but-subtle shades per PI
-    greens = plt.cm.Greens(np.linspace(0.45, 0.85, n_pi))
-    reds = plt.cm.Reds(np.linspace(0.45, 0.85, n_pi))
-
-    # -------------------  figure & axes ---------------------------------
-    plt.close("all")
-    fig, (ax1, ax2, ax3, ax4) = plt.subplots(
-        nrows=4,
-        figsize=(8.5, 16),  # a bit more total height
-        dpi=150,
-        gridspec_kw=dict(
-            hspace=0.8,
-            height_ratios=[1, 1, 1.25, 1.6]  # ax4 is 35 % taller
-        )
-    )
-    fig.subplots_adjust(right=0.85)
-
-    # ===============  PLOT 1 : grouped by semester  =====================
-    x1 = np.arange(n_sem)
-    bar_w1 = 0.8 / n_pi
-    legend_handles = []
-
-    for i, pi in enumerate(pis):
-        vals = pivot1[pi].values
-        pos = x1 - 0.4 + (i + 0.5) * bar_w1
-        colours = [greens[i] if v >= 70 else reds[i] for v in vals]
-
-        bars = ax1.bar(pos, vals, width=bar_w1, color=colours,
-                       edgecolor="#333", linewidth=.5)
-        ax1.bar_label(bars, fmt="%.0f", padding=2, fontsize=9, color="#222")
-
-        legend_handles.append(mpatches.Patch(color=greens[i], label=pi))
-
-    ax1.set_ylim(0, 110)
-    ax1.set_xticks(x1)
-    ax1.set_xticklabels(semesters, fontsize=10)
-    ax1.set_ylabel("% Expert + Practitioner", fontsize=10)
-    ax1.set_title(f"{course} – {slo} (by Semester)", fontsize=11, weight="bold")
-    ax1.tick_params(axis="y", labelsize=10)
-    ax1.yaxis.set_major_locator(ticker.MultipleLocator(20))
-    ax1.yaxis.set_minor_locator(ticker.NullLocator())
-    ax1.yaxis.grid(True, linestyle="--", alpha=.35)
-    ax1.spines[["right", "top"]].set_visible(False)
-    ax1.set_axisbelow(True)
-
-  #  ax1.legend(legend_handles, pis, title="PI", frameon=False,
-  #             bbox_to_anchor=(1.01, 1), loc="upper left",
-   #            fontsize=6, title_fontsize=7)
-
-    # ===============  PLOT 2 : grouped by PI + Bloom  ======================
-    x2 = np.arange(n_combo)
-    bar_w2 = 0.8 / n_sem
-
-    for j, sem in enumerate(semesters):
-        vals = pivot2[sem].values
-        pos = x2 - 0.4 + (j + 0.5) * bar_w2
-
-        # colour choice still depends only on *which PI* the bar belongs to
-        # make a reverse map   "PI-1" → index 0, 1, 2 …
-        pi_index = {short_pi(p): i for i, p in enumerate(pis)}
-
-        pi_tag_for_combo = [c.split(" (")[0] for c in combo_order]
-
-        colours = [greens[pi_index[tag]] if v >= 70 else reds[pi_index[tag]]
-                   for tag, v in zip(pi_tag_for_combo, vals)]
-
-        bars = ax2.bar(pos, vals, width=bar_w2, color=colours,
-                       edgecolor="#333", linewidth=.5)
-
-        # numeric labels
-        for x, y in zip(pos, vals):
-            ax2.text(x, y + 1.2, f"{y:.0f}", ha="center",
-                     va="bottom", fontsize=9, color="#222")
-
-    # axis cosmetics
-    ax2.set_ylim(0, 95)
-    ax2.set_xticks(x2)
-    ax2.set_xticklabels([lbl.replace(" (", "\n(") for lbl in combo_order],
-                        fontsize=9)  # two-line labels
-    ax2.set_ylabel("% Expert + Practitioner", fontsize=10)
-    ax2.set_title(f"{course} – {slo} (by PI and Bloom)", fontsize=11,
-                  weight="bold", pad=14)
-    ax2.tick_params(axis="y", labelsize=10)
-    ax2.yaxis.set_major_locator(ticker.MultipleLocator(20))
-    ax2.yaxis.set_minor_locator(ticker.NullLocator())
-    ax2.yaxis.grid(True, linestyle="--", alpha=.35)
-    ax2.spines[["right", "top"]].set_visible(False)
-    ax2.set_axisbelow(True)
-
-    # ===============  PLOT 3 : Bloom‑level difficulty  ==================
-    import scipy.stats as ss
-
-    # --- gather data ---
-    order = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
-    df["blooms_level"] = pd.Categorical(df["blooms_level"], categories=order, ordered=True)
-    grouped = [g["attain"].values for _, g in df.groupby("blooms_level") if len(g)]
-
-    # --- Kruskal‑Wallis across all Bloom levels ---
-    kw_p = ss.kruskal(*grouped).pvalue if len(grouped) > 1 else None
-
-    # --- Cliff’s Δ (rank‑biserial) : Analyze vs all others ---
-    analyze = df[df.blooms_level == "Analyze"]["attain"].values
-    others = df[df.blooms_level != "Analyze"]["attain"].values
-    if len(analyze) and len(others):
-        U = ss.mannwhitneyu(analyze, others, alternative="two-sided").statistic
-        delta = (2 * U) / (len(analyze) * len(others)) - 1  # <-- correct sign
-    else:
-        delta = None
-
-    # --- draw a box‑plot ---
-    ax3.boxplot(
-        grouped,
-        tick_labels=[lvl for lvl in order  # ← rename keyword
-                     if lvl in df.blooms_level.unique()],
-        patch_artist=True,
-        boxprops=dict(facecolor="#8DB9CA", alpha=.75),
-        medianprops=dict(color="firebrick", lw=1)
-    )
+    <body style="margin:0;display:flex;flex-direction:column;justify-content:center;
+                 align-items:center;min-height:100vh;background:#f7f9fc;font-family:sans-serif">
 
-    ax3.axhline(70, ls="--", color="red", lw=.8)
-    ax3.set_ylabel("% E + P", fontsize=10)
-    ax3.set_title("Bloom‑level attainment", fontsize=11, pad=6, weight="bold")
-    ax3.tick_params(axis="x", labelsize=10)
-    ax3.tick_params(axis="y", labelsize=10)
-    ax3.set_ylim(0, 105)
-    ax3.spines[["right", "top"]].set_visible(False)
-
-
-
-    # --- annotate p‑value and effect size ---
-    txt = ""
-    if kw_p is not None:
-        txt += f"Kruskal‑Wallis p = {kw_p:.3f}\n"
-    if delta is not None:
-        txt += f"Cliff's Δ (Analyze vs others) = {delta:+.2f}"
-    ax3.text(0.02, 0.06, txt, transform=ax3.transAxes,  # 6 % above bottom
-             ha="left", va="bottom",
-             fontsize=9, fontstyle="italic",
-             bbox=dict(boxstyle="round,pad=0.3",
-                       fc="#f5f5f5", ec="none", alpha=.85))
-
-    # ── inset: normal curve visualising the p‑value ─────────────────────
-    # only if we actually computed kw_p earlier
-    anchor_x, anchor_y = 0.34, 0.34  # 0‑1 fraction of ax3 (x‑ and y‑position)
-
-    # ------------------------------------------------------------
-    # AFTER drawing the box‑plot & text annotation on ax3:
-    # ------------------------------------------------------------
-    if False and kw_p is not None:
-        inset = inset_axes(
-            ax3,
-            width=1.3, height=1,  # 30 % of ax3 (not a string)
-            bbox_to_anchor=(0.5, 0.3),  # x0, y0 in ax3 fraction units
-            bbox_transform=ax3.transAxes,
-            loc="center", borderpad=0
-        )
-
-        # --- bell curve drawing ---
-        x = np.linspace(-4, 4, 800)
-        inset.plot(x, norm.pdf(x), lw=1, color="black")
-
-        crit = norm.ppf(0.975)  # ±1.96
-        inset.fill_between(x, 0, norm.pdf(x), where=(x <= -crit) | (x >= crit),
-                           color="red", alpha=.25)
-        inset.fill_between(x, 0, norm.pdf(x), where=(x > -crit) & (x < crit),
-                           color="green", alpha=.25)
-
-        inset.axvline(norm.ppf(1 - kw_p / 2), color="blue", lw=1.4)
-        inset.set_xticks([]);
-        inset.set_yticks([])
-        inset.set_xlim(-4, 4);
-        inset.set_ylim(0, 0.45)
-        inset.set_title(f"p = {kw_p:.3f}", fontsize=8, pad=2)
-
-    # ------------------------------------------------------------
-    # Run tight_layout AFTER the inset so it isn't clipped
-    # ------------------------------------------------------------
-   # fig.tight_layout(rect=[0, 0, 1, 1])  # leave 20 % for legend
-
-    divnorm = colors.TwoSlopeNorm(vcenter=0, vmin=u.min(), vmax=u.max())
-    cmap = plt.cm.RdYlGn
-
-    # inside the loop that scatters the dots on ax4  (replace the old line)
-    colours = [cmap(divnorm(u[s]))
-               for s in g.semester_idx.map(lambda i: sem_order[i])]
-
-    ax4.scatter(g.semester_idx, g.mean_attain,
-                s=80, c=colours, edgecolor="#333", label='Observed')
-    ax4.plot(g.semester_idx, g.fit, lw=2.2, label='Model trend')
-    ax4.fill_between(g.semester_idx, g.low, g.high, alpha=.18)
-    ax4.axhline(70, ls='--', color='red', lw=.9, label='ABET 70 % target')
-
-    ax4.set_xticks(range(len(sem_order)))
-    ax4.set_xticklabels(sem_order, rotation=0, fontsize=9)
-    ax4.set_ylabel('% Expert + Practitioner', fontsize=10)
-    ax4.set_title(f'{course} – {slo}: mixed-effects trend',
-                  fontsize=11, weight='bold')
-    # ------------------- annotate β₁ and p-value ----------------------------
-    slope = lmm.params['semester_idx']  # β₁
-    pval = lmm.pvalues['semester_idx']  # two-sided p
-
-    label = (
-        f"$\\beta_1$ = {slope:+.2f}\n"  # newline now works
-        f"$p$ = {pval:.3f}"
-    )
+      <!-- analysis figure -->
+      <img src="data:{mimetype};base64,{img64}"
+           style="max-width:{max_width};height:auto;
+                  box-shadow:0 4px 18px rgba(0,0,0,.15);border-radius:8px">
 
-    ax4.text(0.02, 0.94, label,
-             transform=ax4.transAxes,
-             ha='left', va='top', fontsize=9,
-             bbox=dict(boxstyle='round,pad=0.3',
-                       fc='#f5f5f5', ec='none', alpha=0.85))
-    ax4.legend(
-        fontsize=8,
-        loc='lower right',  # always bottom-right of the axes
-        frameon=False  # optional – removes the legend box border
-    )
-    ax4.spines[['right', 'top']].set_visible(False)
+      <div style="margin-top:.6rem;font-size:.8rem;color:#555">{fresh}{note}</div>
 
-    fig.tight_layout()
+      <!-- export links for the accreditation documents -->
+      <div style="margin-top:.8rem;font-size:.85rem">
+        <a href="{base}&profile=pdf" target="_blank">PDF</a> ·
+        <a href="{base}&profile=svg" target="_blank">SVG</a> ·
+        <a href="{base}&profile=print" target="_blank">300 dpi PNG</a>
+      </div>
 
-    # ----------------  export figure to base‑64  -------------------------
-    buf = BytesIO()
-    fig.savefig(buf, format="png")  # ← saves the right figure
-    img64 = base64.b64encode(buf.getvalue()).decode()
+    </body>
+    </html>
+    """
 
-    # ───────────────────────────  END PLOT  ------------------------------
 
-    html_main = f"""
-    <!doctype html><html><head><title>{course} {slo}</title></head>
-    <body style="margin:0;display:flex;justify-content:center;align-items:center;height:100vh;background:#f7f9fc">
-      <img src="data:image/png;base64,{img64}"
-           style="max-width:38%;height:auto;box-shadow:0 4px 18px rgba(0,0,0,.15);border-radius:8px">
-    </body></html>
+@parent.route("/analyze_slo")
+@login_required
+def analyze_slo():
+    """
+    Every course for one SLO in a single small-multiples figure – one
+    grouped pass over the columnar table and one render instead of an
+    analyze_course window per course.
     """
+    if session.get("user") != "MECE Admin":
+        return redirect(url_for("abet"))
+    slo = request.args.get("slo", "").strip()
+    profile = request.args.get("profile", plots.DEFAULT_PROFILE).strip().lower()
+    if not slo:
+        return "<script>alert('Missing SLO');window.close();</script>"
+    if profile not in plots.PROFILES:
+        return "<script>alert('Unknown output profile');window.close();</script>"
 
-    # open 2nd window via JS, then replace current document with html_main
-    return f"""
-    <!doctype html>
-    <html>
-    <head><title>{course} {slo}</title></head>
+    table, as_of = entry_table()
+    rows = table.mask(slo=slo)
+    stamp = table.stamp(rows)
+    if not stamp[0]:
+        return "<script>alert('No course has data for this SLO');window.close();</script>"
 
-    <body style="margin:0;display:flex;justify-content:center;align-items:center;
-                 height:100vh;background:#f7f9fc">
+    data, mimetype = shared_figure(
+        ("slo", slo, profile, stamp),
+        gated(lambda: run_render(render.render_slo, table.attain_sums(rows), slo, profile)),
+        stale_ok=True)
 
-      <!-- main 5-panel figure -->
-      <img src="data:image/png;base64,{img64}"
-           style="max-width:38%;height:auto;
-                  box-shadow:0 4px 18px rgba(0,0,0,.15);border-radius:8px">
+    return figure_page(f"{slo} by course", data, mimetype,
+                       f"/analyze_slo?slo={quote_plus(slo)}", as_of, max_width="90%")
 
-      <!-- when this page finishes loading, pop the control chart -->
 
-    </body>
-    </html>
+# ------------------------------------------------------------------ #
+# warm-up: after a /submit commits, re-render the affected analyses in
+# the background so the admin's first view is a cache hit
+# ------------------------------------------------------------------ #
+def warm_analyses(keys):
+    """
+    WarmupQueue job: fresh snapshot once, then every (course, slo) in `keys`;
+    → the keys warmed (one failing key does not stop the others).
+    """
+    analytics.update()                    # the submit is newer than any snapshot
+    table, _ = entry_table()
+    profile = plots.DEFAULT_PROFILE
+    run = lambda *args: analysis_gate.run(lambda: run_render(*args), timeout=None)
+    warmed = []
+    for course, slo in keys:
+        rows = table.mask(course=course, slo=slo)
+        stamp = table.stamp(rows)
+        if not stamp[0]:
+            warmed.append((course, slo))  # nothing to draw
+            continue
+        try:
+            df, bloom = course_rows(table, rows, course, slo, stamp)
+            shared_figure((course, slo, profile, stamp), lambda: run(
+                render.render_course, df.copy(), course, slo, profile, bloom))
+            if CHART_VIEW == "client":
+                shared_figure(("json", course, slo, stamp), lambda: run(
+                    render.render_course_json, df.copy(), course, slo, bloom))
+        except Exception:
+            parent.logger.exception("warm-up of %s %s failed", course, slo)
+            continue
+        warmed.append((course, slo))
+    for slo in sorted({slo for _, slo in keys}):
+        rows = table.mask(slo=slo)
+        stamp = table.stamp(rows)
+        if stamp[0]:
+            try:
+                shared_figure(("slo", slo, profile, stamp), lambda: run(
+                    render.render_slo, table.attain_sums(rows), slo, profile))
+            except Exception:
+                parent.logger.exception("warm-up of %s by course failed", slo)
+    try:
+        precompute_blooms(table)
+    except Exception:
+        parent.logger.exception("Bloom summaries failed")
+    # the program-level model covers every SLO: refitted once per batch
+    # (and once across workers), read by /admin/program
+    stamp = table.stamp(table.mask())
+    try:
+        flights.do(["program", *stamp], lambda: analysis_gate.run(
+            lambda: program.refresh(result_cache, table)["stamp"], timeout=None))
+    except Exception:
+        parent.logger.exception("program-level refit failed")
+    return warmed
+
+# ABET_WARMUP=0 turns it off; ABET_WARMUP_DEBOUNCE (s) groups a burst of saves
+warmups = warmup.WarmupQueue(
+    warm_analyses, debounce=float(os.environ.get("ABET_WARMUP_DEBOUNCE", "2")))
+if os.environ.get("ABET_WARMUP", "1") != "0":
+    abet_mod.after_submit.append(warmups.submit)
+
+@parent.route("/admin/program")
+@login_required
+def admin_program():
     """
+    The cached program-level SLO trends (program.py) – never fitted here;
+    `current` is false when rows newer than the fit exist.
+    """
+    if session.get("user") != "MECE Admin":
+        return redirect(url_for("abet"))
+    report = program.latest(result_cache)
+    if report is None:
+        return jsonify({"error": "not computed yet – it runs after the next "
+                                 "submission, or `python program.py`"}), 404
+    table, as_of = entry_table()
+    resp = jsonify({**report, "current": report["stamp"] == list(table.stamp(table.mask()))})
+    resp.headers["X-Data-As-Of"] = snapshot.freshness(as_of)
+    return resp
+
+@parent.route("/admin/metrics")
+@login_required
+def admin_metrics():
+    """Warm-up queue, admission gate and cache counters, as JSON."""
+    if session.get("user") != "MECE Admin":
+        return redirect(url_for("abet"))
+    return jsonify({"warmup": warmups.stats(), "admission": analysis_gate.stats(),
+                    "fits": fitting.service().stats(),     # inline renders only
+                    "flights": flights.stats(),
+                    "shared_cache": result_cache.stats(),
+                    "figure_cache": {"entries": len(_figure_cache),
+                                     "capacity": FIGURE_CACHE_SIZE, **_figure_stats}})
+
 
 if __name__ == "__main__":
+    import migrate
+    migrate.run()                         # gunicorn does this in gunicorn.conf.py
     run_simple("0.0.0.0", 5000, application, use_reloader=True, use_debugger=True)
 
 # expose the correct app for Render deployment
@@ -0,0 +1,116 @@
+# migrate.py  – schema setup and upgrades, once per deploy
+"""
+Importing the app does no database I/O.  Every SQLite file the portal uses
+is created and upgraded here instead, before the workers start:
+
+    gunicorn main:app      gunicorn.conf.py runs `run()` in the master,
+                           once, before it forks the workers
+    uvicorn asgi:app       asgi.py runs it before importing main
+    python main.py         dev server: runs it first
+    python migrate.py      by hand / as a release step
+
+Each database has an ordered list of steps; `PRAGMA user_version` records
+how many have been applied.  An up-to-date file costs one read.  Otherwise
+`migrate_db` runs the missing steps inside one BEGIN EXCLUSIVE transaction,
+so concurrent callers (several uvicorn workers, a CLI next to a running
+server) queue on SQLite's file lock and all but the first find nothing to
+do.  Add new steps at the end of a list;
+never edit an applied one.
+
+The seed users (credentials.SEED_USERS) are inserted on every run where
+their name is missing, as before.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import ABET_Data_Rev1 as abet
+import archive
+import credentials
+import search
+import sessions
+import sharedcache
+import singleflight
+
+LOCK_TIMEOUT = 60.0          # s to wait for another migrator
+
+
+# --------------------------------------------------------------------------- #
+# steps
+# --------------------------------------------------------------------------- #
+def _portal_v1(conn):
+    abet.init_db(conn)
+    conn.execute(credentials.USERS_SCHEMA)
+
+
+def _portal_v2(conn):
+    conn.execute(archive.CLOSED_TERMS_SCHEMA)
+
+
+def _portal_v3(conn):
+    search.create(conn)
+
+
+def _portal_v4(conn):
+    abet.require_natural_key(conn)
+
+
+PORTAL_STEPS = [_portal_v1, _portal_v2, _portal_v3, _portal_v4]
+SESSION_STEPS = [lambda conn: conn.execute(sessions.SqliteStore.SCHEMA)]
+FLIGHT_STEPS = [lambda conn: conn.execute(singleflight.SCHEMA)]
+CACHE_STEPS = [lambda conn: [conn.execute(sql) for sql in sharedcache.SCHEMA]]
+
+
+# --------------------------------------------------------------------------- #
+# runner
+# --------------------------------------------------------------------------- #
+def migrate_db(path: str, steps, wal: bool = False) -> tuple:
+    """Apply the steps past the file's user_version; → (old, new) version."""
+    with closing(sqlite3.connect(path, isolation_level=None,
+                                 timeout=LOCK_TIMEOUT)) as conn:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        if current >= len(steps):         # the usual case: a read, no write lock
+            return current, current
+        if wal:                           # persistent; a no-op once set
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN EXCLUSIVE")
+        try:
+            done = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step in steps[done:]:
+                step(conn)
+            if done < len(steps):
+                conn.execute(f"PRAGMA user_version = {len(steps)}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    return done, max(done, len(steps))
+
+
+def databases() -> list:
+    """[(path, steps, wal)] of the databases the configured app will open."""
+    dbs = [(abet.DB_NAME, PORTAL_STEPS, False)]
+    if os.environ.get("ABET_SESSION_STORE", "sqlite") != "memory":
+        dbs.append((os.environ.get("ABET_SESSION_DB", "abet_sessions.db"), SESSION_STEPS, True))
+    dbs.append((os.environ.get("ABET_FLIGHT_DB", "abet_flights.db"), FLIGHT_STEPS, True))
+    dbs.append((os.environ.get("ABET_CACHE_DB", "abet_cache.db"), CACHE_STEPS, True))
+    return dbs
+
+
+def run() -> dict:
+    """Migrate every database and seed the users; → path → (old, new) version."""
+    report = {path: migrate_db(path, steps, wal) for path, steps, wal in databases()}
+    with closing(sqlite3.connect(abet.DB_NAME, timeout=LOCK_TIMEOUT)) as conn:
+        with conn:
+            credentials.seed_users(conn)
+    return report
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    for path, (old, new) in run().items():
+        print(f"{path:>24}  schema v{old} → v{new}" if new > old else
+              f"{path:>24}  schema v{new}, up to date")
+    print(f"{(time.perf_counter() - t0) * 1e3:.0f} ms")
@@ -0,0 +1,267 @@
+# plots.py  – panel builders for the admin analysis figures
+"""
+Bar and box panels and figure export used by `analyze_course`.
+
+Colours come from NumPy masks over the whole value table and labels go
+through `ax.bar_label`, so each panel is one `bar` call plus one label
+container instead of a `bar` per series and an `ax.text` per bar.
+"""
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib import ticker
+from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+from scipy.stats import norm
+
+TARGET = 70          # ABET attainment target, % Expert + Practitioner
+
+# --------------------------------------------------------------------------- #
+# output profiles – the page shows the figure at max-width:38 %, so "screen"
+# only needs ~850 px across; "print" is for the accreditation documents.
+# Thumbnails skip the per-bar value labels: unreadable at that size, and
+# their text layout is most of the render time.
+# --------------------------------------------------------------------------- #
+PROFILES = {
+    "thumbnail": dict(bar_labels=False,
+                      savefig=dict(format="png", dpi=36, pil_kwargs={"compress_level": 1})),
+    "screen":    dict(bar_labels=True,
+                      savefig=dict(format="png", dpi=100, pil_kwargs={"compress_level": 6})),
+    "print":     dict(bar_labels=True,
+                      savefig=dict(format="png", dpi=300, pil_kwargs={"compress_level": 9})),
+    "svg":       dict(bar_labels=True,
+                      savefig=dict(format="svg", metadata={"Date": None})),
+    "pdf":       dict(bar_labels=True,
+                      savefig=dict(format="pdf", metadata={"CreationDate": None})),
+}
+DEFAULT_PROFILE = "screen"
+
+# normal-curve inset behind the Kruskal–Wallis p (off in the current layout);
+# the curve and its ±1.96 shading never change, so they are computed once
+P_INSET = False
+_NORM_X = np.linspace(-4, 4, 800)
+_NORM_PDF = norm.pdf(_NORM_X)
+_NORM_CRIT = norm.ppf(0.975)
+_NORM_TAILS = np.abs(_NORM_X) >= _NORM_CRIT
+
+MIMETYPES = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+
+def short_pi(txt: str) -> str:
+    """'PI-1: Able to …'  →  'PI-1'"""
+    return txt.split(":")[0].strip()
+
+
+def pi_palettes(n_pi: int):
+    """Distinct-but-subtle green (met) / red (missed) shades, one per PI."""
+    greens = plt.cm.Greens(np.linspace(0.45, 0.85, n_pi))
+    reds = plt.cm.Reds(np.linspace(0.45, 0.85, n_pi))
+    return greens, reds
+
+
+def target_colours(vals, pi_idx, greens, reds):
+    """RGBA row per bar: the PI's green if `vals` meets TARGET, else its red."""
+    vals = np.asarray(vals, dtype=float)
+    pi_idx = np.broadcast_to(pi_idx, vals.shape)
+    return np.where((vals >= TARGET)[:, None], greens[pi_idx], reds[pi_idx])
+
+
+def grouped_bars(x, table):
+    """
+    Flatten a (groups × series) value table into one bar call: returns the
+    bar positions, heights and series index, series side by side per group.
+    """
+    table = np.asarray(table, dtype=float)
+    n_grp, n_ser = table.shape
+    bar_w = 0.8 / max(n_ser, 1)
+    offs = -0.4 + (np.arange(n_ser) + 0.5) * bar_w
+    pos = (np.asarray(x, dtype=float)[:, None] + offs[None, :]).ravel()
+    return pos, table.ravel(), np.tile(np.arange(n_ser), n_grp)
+
+
+def combo_order(df: pd.DataFrame, pis) -> list:
+    """
+    'PI-n (Bloom)' row labels: PIs in `pis` order, Bloom levels in the order
+    they first appear for that PI – one drop_duplicates pass over `df`.
+    """
+    first = df[["pi", "blooms_level"]].drop_duplicates()
+    first = first[first["pi"].isin(pis)]
+    rank = pd.Series(range(len(pis)), index=pis)
+    first = first.iloc[np.argsort(rank[first["pi"]].to_numpy(), kind="stable")]
+    tags = first["pi"].map(short_pi)
+    return (tags + " (" + first["blooms_level"] + ")").tolist()
+
+
+def style_pct_axis(ax, ylim: float, ylabel: str = "% Expert + Practitioner",
+                   fontsize: float = 10):
+    """Shared y-axis cosmetics of the attainment bar panels."""
+    ax.set_ylim(0, ylim)
+    ax.set_ylabel(ylabel, fontsize=fontsize)
+    ax.tick_params(axis="y", labelsize=fontsize)
+    ax.yaxis.set_major_locator(ticker.MultipleLocator(20))
+    ax.yaxis.set_minor_locator(ticker.NullLocator())
+    ax.yaxis.grid(True, linestyle="--", alpha=.35)
+    ax.spines[["right", "top"]].set_visible(False)
+    ax.set_axisbelow(True)
+
+
+# --------------------------------------------------------------------------- #
+# panels
+# --------------------------------------------------------------------------- #
+def draw_semester_panel(ax, pivot1: pd.DataFrame, greens, reds, title: str,
+                        bar_labels: bool = True):
+    """PLOT 1 – rows = semester, one bar series per PI column."""
+    semesters, pis = pivot1.index.tolist(), pivot1.columns.tolist()
+    x = np.arange(len(semesters))
+    pos, vals, series = grouped_bars(x, pivot1.to_numpy())
+
+    bars = ax.bar(pos, vals, width=0.8 / max(len(pis), 1),
+                  color=target_colours(vals, series, greens, reds),
+                  edgecolor="#333", linewidth=.5)
+    if bar_labels:
+        ax.bar_label(bars, fmt="%.0f", padding=2, fontsize=9, color="#222")
+
+    style_pct_axis(ax, 110)
+    ax.set_xticks(x)
+    ax.set_xticklabels(semesters, fontsize=10)
+    ax.set_title(title, fontsize=11, weight="bold")
+
+
+def draw_pi_bloom_panel(ax, pivot2: pd.DataFrame, pis, greens, reds, title: str,
+                        bar_labels: bool = True):
+    """PLOT 2 – rows = 'PI-n (Bloom)', one bar series per semester column."""
+    combos, semesters = pivot2.index.tolist(), pivot2.columns.tolist()
+    x = np.arange(len(combos))
+    bar_w = 0.8 / max(len(semesters), 1)
+
+    # colour still depends only on *which PI* the bar belongs to
+    pi_index = {short_pi(p): i for i, p in enumerate(pis)}
+    combo_pi = np.array([pi_index[c.split(" (")[0]] for c in combos], dtype=int)
+
+    pos, vals, _ = grouped_bars(x, pivot2.to_numpy())
+    bars = ax.bar(pos, vals, width=bar_w,
+                  color=target_colours(vals, np.repeat(combo_pi, len(semesters)),
+                                       greens, reds),
+                  edgecolor="#333", linewidth=.5)
+    if bar_labels:
+        ax.bar_label(bars, fmt="%.0f", padding=3, fontsize=9, color="#222")
+
+    style_pct_axis(ax, 95)
+    ax.set_xticks(x)
+    ax.set_xticklabels([lbl.replace(" (", "\n(") for lbl in combos],
+                       fontsize=9)  # two-line labels
+    ax.set_title(title, fontsize=11, weight="bold", pad=14)
+
+
+def draw_bloom_panel(ax, bloom):
+    """
+    PLOT 3 – one box per Bloom level from precomputed `analysis.BloomSummary`
+    stats (ax.bxp, no raw rows), with the Kruskal–Wallis / Cliff's Δ note.
+    """
+    ax.bxp(bloom.boxes, patch_artist=True,
+           boxprops=dict(facecolor="#8DB9CA", alpha=.75),
+           medianprops=dict(color="firebrick", lw=1))
+
+    ax.axhline(TARGET, ls="--", color="red", lw=.8)
+    ax.set_ylabel("% E + P", fontsize=10)
+    ax.set_title("Bloom‑level attainment", fontsize=11, pad=6, weight="bold")
+    ax.tick_params(axis="x", labelsize=10)
+    ax.tick_params(axis="y", labelsize=10)
+    ax.set_ylim(0, 105)
+    ax.spines[["right", "top"]].set_visible(False)
+
+    txt = ""
+    if bloom.kruskal_p is not None:
+        txt += f"Kruskal‑Wallis p = {bloom.kruskal_p:.3f}\n"
+    if bloom.cliffs_delta is not None:
+        txt += f"Cliff's Δ (Analyze vs others) = {bloom.cliffs_delta:+.2f}"
+    ax.text(0.02, 0.06, txt, transform=ax.transAxes,     # 6 % above bottom
+            ha="left", va="bottom",
+            fontsize=9, fontstyle="italic",
+            bbox=dict(boxstyle="round,pad=0.3",
+                      fc="#f5f5f5", ec="none", alpha=.85))
+
+    if P_INSET and bloom.kruskal_p is not None:
+        draw_p_inset(ax, bloom.kruskal_p)
+
+
+def draw_p_inset(ax, p: float):
+    """Standard-normal curve with the two-sided 5 % tails and p's z marked."""
+    inset = inset_axes(ax, width=1.3, height=1,
+                       bbox_to_anchor=(0.5, 0.3), bbox_transform=ax.transAxes,
+                       loc="center", borderpad=0)
+    inset.plot(_NORM_X, _NORM_PDF, lw=1, color="black")
+    inset.fill_between(_NORM_X, 0, _NORM_PDF, where=_NORM_TAILS, color="red", alpha=.25)
+    inset.fill_between(_NORM_X, 0, _NORM_PDF, where=~_NORM_TAILS, color="green", alpha=.25)
+    inset.axvline(norm.ppf(1 - p / 2), color="blue", lw=1.4)
+    inset.set_xticks([])
+    inset.set_yticks([])
+    inset.set_xlim(-4, 4)
+    inset.set_ylim(0, 0.45)
+    inset.set_title(f"p = {p:.3f}", fontsize=8, pad=2)
+
+
+def slo_grid_figure(slo: str, sem_order, tiles, bar_labels: bool = True,
+                    ncols: int = 4):
+    """
+    Small multiples for one SLO: a tile per course with its semester means
+    and trend line.  `tiles` is a list of (course, means, fit) where `means`
+    is aligned with `sem_order` (NaN = no data) and `fit` is a TrendFit.
+    All tiles share both axes, so ticks and limits are set up only once.
+    """
+    n = max(len(tiles), 1)
+    nrows = -(-n // ncols)
+    fig, axes = plt.subplots(nrows, ncols, sharex=True, sharey=True,
+                             figsize=(3.0 * ncols, 2.4 * nrows + 0.6),
+                             dpi=150, squeeze=False)
+    x = np.arange(len(sem_order))
+    greens, reds = pi_palettes(1)
+
+    # shared axis setup: limits, locators and tick labels are set once and
+    # the sharex/sharey group carries them to every tile
+    head = axes[0, 0]
+    style_pct_axis(head, 110, ylabel="% E + P", fontsize=8)
+    head.set_xticks(x)
+    head.set_xticklabels(sem_order)
+
+    for ax, (course, means, fit) in zip(axes.flat, tiles):
+        have = ~np.isnan(means)
+        bars = ax.bar(x[have], means[have], width=0.7,
+                      color=target_colours(means[have], 0, greens, reds),
+                      edgecolor="#333", linewidth=.4)
+        if bar_labels:
+            ax.bar_label(bars, fmt="%.0f", padding=1, fontsize=6, color="#222")
+        xs = x[have][[0, -1]]
+        ax.plot(xs, fit.predict(xs), lw=1.6, color="#00736f")
+        ax.axhline(TARGET, ls="--", color="red", lw=.7)
+        ax.set_title(f"{course}   $\\beta_1$={fit.slope:+.1f}", fontsize=8,
+                     weight="bold", pad=3)
+        ax.set_ylabel("% E + P", fontsize=8)
+        ax.tick_params(axis="x", labelsize=7, labelrotation=90)
+        ax.tick_params(axis="y", labelsize=8)
+        ax.yaxis.grid(True, linestyle="--", alpha=.35)
+        ax.spines[["right", "top"]].set_visible(False)
+        ax.set_axisbelow(True)
+        ax.label_outer()
+
+    for ax in axes.flat[len(tiles):]:
+        ax.set_visible(False)
+    for ax in axes.flat[max(len(tiles) - ncols, 0):len(tiles)]:
+        ax.tick_params(axis="x", labelbottom=True)   # bottom tile of a column
+
+    fig.suptitle(f"{slo} – attainment by course", fontsize=11, weight="bold")
+    fig.tight_layout()
+    return fig
+
+
+# --------------------------------------------------------------------------- #
+# export
+# --------------------------------------------------------------------------- #
+def export_figure(fig, profile: str = DEFAULT_PROFILE):
+    """Serialise `fig` for an output profile → (bytes, mimetype)."""
+    opts = PROFILES[profile]["savefig"]
+    buf = BytesIO()
+    fig.savefig(buf, **opts)
+    return buf.getvalue(), MIMETYPES[opts["format"]]
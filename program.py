@@ -0,0 +1,127 @@
+# program.py  – department-level SLO trends, fitted offline
+"""
+The course views fit one `attain ~ semester_idx` model per course, so a
+program-wide trend for an SLO meant reading 16 separate fits.  Here each
+SLO gets one model over all of its courses – crossed random intercepts
+for course and semester (`analysis.fit_crossed`, sparse design) – giving
+the department-level slope with course and term differences pooled out.
+
+Nothing is fitted on a page load:
+
+  * `refresh()` fits every SLO of a columnar table and stores the report in
+    the shared cache (sharedcache.py) under CACHE_KEY, with the data stamp
+    it was fitted on; a report for the same stamp is not refitted;
+  * main.py's warm-up batch calls it after submissions (once per batch,
+    singleflight across workers), and `python program.py` does it by hand
+    or from cron;
+  * /admin/program only reads `latest()` and says whether newer rows exist.
+
+Environment: ABET_PROGRAM_TTL (s the report is kept, 30 days).
+
+    python program.py [--force]
+"""
+
+import os
+import time
+
+import numpy as np
+
+import analysis
+
+CACHE_KEY = "program"
+TTL = float(os.environ.get("ABET_PROGRAM_TTL", str(30 * 86400)))
+FACTORS = ("course", "sem_short")
+
+
+def slo_frame(table, slo):
+    """One SLO's rows, prepared like analyze_course: attain, sem_short, semester_idx."""
+    df = table.frame(table.mask(slo=slo), ["course", "semester", "expert", "practitioner"])
+    df["attain"] = df["expert"] + df["practitioner"]
+    df = df.dropna(subset=["attain"])
+    df["sem_short"] = df["semester"].map(analysis.short_sem)
+    sem_order = sorted(df["sem_short"].unique(), key=analysis.sem_key)
+    df["semester_idx"] = df["sem_short"].map({s: i for i, s in enumerate(sem_order)})
+    return df, sem_order
+
+
+def fit_slo(table, slo) -> dict:
+    """The program-level fit of one SLO as a JSON-ready dict."""
+    df, sem_order = slo_frame(table, slo)
+    fit = analysis.fit_crossed(df, factors=FACTORS)
+    se = float(np.sqrt(fit.cov[1, 1])) if np.isfinite(fit.cov[1, 1]) else None
+    crit = analysis.t_dist.ppf(0.975, fit.df_resid) if fit.df_resid > 0 else np.nan
+    out = {
+        "slo": slo, "estimator": fit.estimator, "label": fit.label, "reason": fit.reason,
+        "rows": len(df), "courses": int(df["course"].nunique()),
+        "semesters": sem_order,
+        "intercept": fit.intercept, "slope": fit.slope, "se": se,
+        "ci": [fit.slope - crit * se, fit.slope + crit * se]
+              if se is not None and np.isfinite(crit) else None,
+        "pvalue": None if np.isnan(fit.pvalue) else fit.pvalue,
+        "seconds": round(fit.seconds, 4),
+    }
+    if fit.estimator == "crossed":
+        d, re = fit.diagnostics, fit.random_effects
+        out["sd"] = {"course": d["course_var"] ** 0.5 if "course_var" in d else None,
+                     "semester": d["sem_short_var"] ** 0.5, "residual": d["resid_var"] ** 0.5}
+        out["course_effects"] = (re["course"].sort_values().to_dict()
+                                 if "course_var" in d else {})
+        out["semester_effects"] = {s: float(re["sem_short"][s]) for s in sem_order}
+    return out
+
+
+def fit_program(table) -> dict:
+    """Every SLO of `table` → the report /admin/program serves."""
+    t0 = time.perf_counter()
+    slos = sorted(s for s in table.cats["slo"] if table.mask(slo=s).any())
+    fits = [fit_slo(table, slo) for slo in slos]
+    return {"stamp": list(table.stamp(table.mask())),
+            "computed_at": time.time(),
+            "seconds": round(time.perf_counter() - t0, 3),
+            "slos": fits}
+
+
+# --------------------------------------------------------------------------- #
+# cache
+# --------------------------------------------------------------------------- #
+def latest(cache):
+    """The last stored report, or None."""
+    return cache.get(CACHE_KEY)
+
+
+def refresh(cache, table, force: bool = False) -> dict:
+    """Fit and store the report unless the stored one has the same stamp."""
+    stamp = list(table.stamp(table.mask()))
+    report = None if force else latest(cache)
+    if report is None or report["stamp"] != stamp:
+        report = fit_program(table)
+        cache.put(CACHE_KEY, report, ttl=TTL)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sqlite3
+    from contextlib import closing
+
+    import archive
+    import columnar
+    import migrate
+    import sharedcache
+    from ABET_Data_Rev1 import DB_NAME
+
+    ap = argparse.ArgumentParser(description="Fit and cache the program-level SLO trends.")
+    ap.add_argument("--force", action="store_true", help="refit even if the data is unchanged")
+    args = ap.parse_args()
+
+    migrate.run()
+    with closing(sqlite3.connect(DB_NAME)) as conn:
+        table = columnar.EntryColumns().sync(conn, archived=lambda: archive.archived(conn))
+    report = refresh(sharedcache.from_env(), table, force=args.force)
+    for f in report["slos"]:
+        p = "" if f["pvalue"] is None else f"  p={f['pvalue']:.3f}"
+        print(f"{f['slo']:>6}  {f['slope']:+6.2f} /semester{p}  {f['rows']:>6} rows "
+              f"{f['courses']:>3} courses {len(f['semesters']):>3} semesters  "
+              f"{f['label']}{'  (' + f['reason'] + ')' if f['reason'] else ''}")
+    print(f"{report['stamp'][0]} rows, fitted in {report['seconds'] * 1e3:.0f} ms "
+          f"at {time.strftime('%Y-%m-%d %H:%M', time.localtime(report['computed_at']))}")
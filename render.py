@@ -0,0 +1,283 @@
+# render.py  – figure construction for the admin analysis views
+"""
+Everything between "rows from SQLite" and "image bytes" for the analysis
+routes – or, for the client-side chart view, the JSON series the browser
+draws itself (`course_payload`).  Kept free of Flask and of the ABET app
+import so these functions can run in a separate worker process (see
+`main.run_render`).
+"""
+
+import json
+import logging
+import os
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib import colors
+
+import analysis
+import fitting
+import plots
+
+log = logging.getLogger(__name__)
+
+
+def warm_up():
+    """No-op run in each pool worker at start-up; the imports are the point."""
+    return plt.get_backend()
+
+
+def lower_priority(nice):
+    """Pool initializer: renders yield the CPU to request handling."""
+    try:
+        os.nice(nice)
+    except (AttributeError, OSError):     # not on this platform
+        pass
+
+
+def render_course(df, course, slo, profile, bloom=None):
+    """course_figure → export; returns (bytes, mimetype)."""
+    fig = course_figure(df, course, slo, bloom=bloom,
+                        bar_labels=plots.PROFILES[profile]["bar_labels"])
+    try:
+        return plots.export_figure(fig, profile)
+    finally:
+        plt.close(fig)
+
+
+def render_course_json(df, course, slo, bloom=None):
+    """course_series → course_payload as a JSON string (for /api/analysis)."""
+    return json.dumps(course_payload(course_series(df, course, slo, bloom), course, slo),
+                      ensure_ascii=False)
+
+
+def render_slo(agg, slo, profile):
+    """slo_figure → export; returns (bytes, mimetype)."""
+    fig = slo_figure(agg, slo, bar_labels=plots.PROFILES[profile]["bar_labels"])
+    try:
+        return plots.export_figure(fig, profile)
+    finally:
+        plt.close(fig)
+
+
+def slo_figure(agg, slo, bar_labels=True):
+    """
+    Small multiples from per-(course, semester) sums (`Columns.attain_sums`);
+    one WLS trend per course.
+    """
+    agg["sem_short"] = agg["semester"].map(analysis.short_sem)
+    agg = agg.groupby(["course", "sem_short"], as_index=False)[
+        ["n", "attain_sum", "attain_sq"]].sum()      # 'Fall 2021' == 'fall 2021'
+    sem_order = sorted(agg["sem_short"].unique(), key=analysis.sem_key)
+    agg["semester_idx"] = agg["sem_short"].map({s: i for i, s in enumerate(sem_order)})
+    agg["mean"] = agg["attain_sum"] / agg["n"]
+
+    means = (agg.pivot(index="course", columns="semester_idx", values="mean")
+                .reindex(columns=range(len(sem_order))))
+    tiles = []
+    for course, grp in agg.groupby("course"):
+        fit = analysis.wls_from_sums(grp["sem_short"].to_numpy(), grp["semester_idx"],
+                                     grp["n"], grp["attain_sum"], grp["attain_sq"])
+        tiles.append((course, means.loc[course].to_numpy(dtype=float), fit))
+
+    return plots.slo_grid_figure(slo, sem_order, tiles, bar_labels=bar_labels)
+
+
+def course_series(df, course, slo, bloom=None) -> dict:
+    """
+    The aggregated series behind the four course/SLO panels, from raw entry
+    rows: per-semester PI means, PI×Bloom means, Bloom summary and the
+    trend fit.  Shared by `course_figure` and `course_payload`.
+    """
+    short_sem, sem_key = analysis.short_sem, analysis.sem_key
+
+    #   combine Expert + Practitioner as a single attainment metric
+    df['attain'] = df['expert'] + df['practitioner']
+
+    df["pi"] = df["pi"].astype(str).str.strip()  # NEW ↓ normalise text
+    pis = sorted(df["pi"].unique())  # NEW ↓ dynamic PI list
+
+    # ── NEW: normalise Bloom text and build a PI-Bloom combo label ─────────
+    df["blooms_level"] = df["blooms_level"].astype(str).str.strip()
+
+    # composite label stored in the dataframe: "PI-1: Able to …" → "PI-1 (Apply)"
+    df["pi_bl"] = df["pi"].map(plots.short_pi) + " (" + df["blooms_level"] + ")"
+
+    # ---- build the ordered list of rows for pivot-2 ----------------------
+    combo_order = plots.combo_order(df, pis)
+
+    # ───────────────────────  TWO‑PLOT LAYOUT  ──────────────────────────
+
+    # --------------------- semester order -----------------------------
+    df["sem_short"] = df["semester"].apply(short_sem)
+    sem_order = sorted(df["sem_short"].unique(), key=sem_key)  # e.g. ['F20','Sp21','F21', …]
+    sem_to_idx = {s: i for i, s in enumerate(sem_order)}
+
+    df["semester_idx"] = df["sem_short"].map(sem_to_idx)
+
+    # ─── 3.  fit trend: mixed model, or WLS when that is degenerate ─────
+    trend = fitting.fit_trend(df, key=(course, slo))
+    log.debug("%s %s: %r", course, slo, trend)  # estimator used, slope β₁, fit time
+
+    # ─── 4.  build g = tidy table for plotting  (NEW)  ──────────────────
+    g = (df.groupby(['sem_short', 'semester_idx'])
+         .agg(mean_attain=('attain', 'mean'))
+         .reset_index())
+
+    g = g.sort_values('semester_idx')  # ensure ascending x
+    # fixed-effect line and its 95 % band (same for either estimator)
+    g['fit'] = trend.predict(g.semester_idx)
+    g['low'], g['high'] = trend.band(g.semester_idx)
+
+    # -----------------  PIVOT #1 : rows = semester ----------------------
+    pivot1 = (df.groupby(["sem_short", "pi"])["attain"]
+              .mean()
+              .unstack(fill_value=0)
+              .reindex(columns=pis, fill_value=0)
+              .sort_index(key=lambda idx: idx.map(sem_key)))
+
+    semesters = pivot1.index.tolist()
+    pis = pivot1.columns.tolist()
+
+    # -----------------  PIVOT #2 : rows = PI ----------------------------
+    # -----------------  PIVOT #2 : rows = PI + Bloom ------------------------
+    pivot2 = (df.groupby(["pi_bl", "sem_short"])["attain"]
+              .mean()
+              .unstack(fill_value=0)
+              .reindex(index=combo_order, fill_value=0)  # every combo row
+              .reindex(columns=semesters, fill_value=0))  # every semester
+
+    if bloom is None:
+        bloom = analysis.bloom_summary(df["attain"], df["blooms_level"])
+    return dict(pis=pis, sem_order=sem_order, pivot1=pivot1, pivot2=pivot2,
+                g=g, trend=trend, bloom=bloom)
+
+
+def _floats(values) -> list:
+    """JSON-safe floats: NaN / inf → None."""
+    arr = np.asarray(values, dtype=float)
+    return [float(v) if np.isfinite(v) else None for v in arr.ravel()]
+
+
+def course_payload(ser: dict, course: str, slo: str) -> dict:
+    """`course_series` as plain JSON for /api/analysis and the chart view."""
+    pivot1, pivot2, g, trend, bloom = (ser[k] for k in
+                                       ("pivot1", "pivot2", "g", "trend", "bloom"))
+    return {
+        "course": course,
+        "slo": slo,
+        "target": plots.TARGET,
+        "by_semester": {                         # panel 1: rows = semester
+            "semesters": pivot1.index.tolist(),
+            "pis": [plots.short_pi(p) for p in pivot1.columns],
+            "means": [_floats(row) for row in pivot1.to_numpy()],
+        },
+        "by_pi_bloom": {                         # panel 2: rows = "PI-n (Bloom)"
+            "combos": pivot2.index.tolist(),
+            "semesters": pivot2.columns.tolist(),
+            "means": [_floats(row) for row in pivot2.to_numpy()],
+        },
+        "bloom": {                               # panel 3
+            "boxes": [{**{k: v for k, v in b.items() if k != "fliers"},
+                       "sd": _floats([b["sd"]])[0],
+                       "fliers": _floats(b["fliers"])} for b in bloom.boxes],
+            "kruskal_p": bloom.kruskal_p,
+            "cliffs_delta": bloom.cliffs_delta,
+        },
+        "trend": {                               # panel 4
+            "estimator": trend.estimator,
+            "label": trend.label,
+            "slope": _floats([trend.slope])[0],
+            "pvalue": _floats([trend.pvalue])[0],
+            "semesters": g["sem_short"].tolist(),
+            "x": g["semester_idx"].astype(int).tolist(),
+            "observed": _floats(g["mean_attain"]),
+            "fit": _floats(g["fit"]),
+            "low": _floats(g["low"]),
+            "high": _floats(g["high"]),
+            "random_effects": _floats(trend.random_effects.reindex(g["sem_short"])),
+        },
+    }
+
+
+def course_figure(df, course, slo, bar_labels=True, bloom=None):
+    """
+    Build the four-panel course/SLO analysis figure from raw entry rows.
+    `bloom` is the rows' `analysis.bloom_summary`, computed here if not given.
+    """
+    ser = course_series(df, course, slo, bloom)
+    pis, sem_order, g, trend = ser["pis"], ser["sem_order"], ser["g"], ser["trend"]
+    pivot1, pivot2, bloom = ser["pivot1"], ser["pivot2"], ser["bloom"]
+    u = trend.random_effects
+
+    # colour palettes – distinct-but-subtle shades per PI
+    greens, reds = plots.pi_palettes(len(pis))
+
+    # -------------------  figure & axes ---------------------------------
+    plt.close("all")
+    fig, (ax1, ax2, ax3, ax4) = plt.subplots(
+        nrows=4,
+        figsize=(8.5, 16),  # a bit more total height
+        dpi=150,
+        gridspec_kw=dict(
+            hspace=0.8,
+            height_ratios=[1, 1, 1.25, 1.6]  # ax4 is 35 % taller
+        )
+    )
+    fig.subplots_adjust(right=0.85)
+
+    # ===============  PLOT 1 : grouped by semester  =====================
+    plots.draw_semester_panel(ax1, pivot1, greens, reds,
+                              f"{course} – {slo} (by Semester)", bar_labels)
+
+    # ===============  PLOT 2 : grouped by PI + Bloom  ======================
+    plots.draw_pi_bloom_panel(ax2, pivot2, pis, greens, reds,
+                              f"{course} – {slo} (by PI and Bloom)", bar_labels)
+
+    # ===============  PLOT 3 : Bloom‑level difficulty  ==================
+    plots.draw_bloom_panel(ax3, bloom)
+
+    u_lim = max(float(np.abs(u).max()), 1e-9)  # TwoSlopeNorm needs vmin < 0 < vmax
+    divnorm = colors.TwoSlopeNorm(vcenter=0, vmin=-u_lim, vmax=u_lim)
+    cmap = plt.cm.RdYlGn
+
+    # inside the loop that scatters the dots on ax4  (replace the old line)
+    colours = [cmap(divnorm(u[s]))
+               for s in g.semester_idx.map(lambda i: sem_order[i])]
+
+    ax4.scatter(g.semester_idx, g.mean_attain,
+                s=80, c=colours, edgecolor="#333", label='Observed')
+    ax4.plot(g.semester_idx, g.fit, lw=2.2, label='Model trend')
+    ax4.fill_between(g.semester_idx, g.low, g.high, alpha=.18)
+    ax4.axhline(70, ls='--', color='red', lw=.9, label='ABET 70 % target')
+
+    ax4.set_xticks(range(len(sem_order)))
+    ax4.set_xticklabels(sem_order, rotation=0, fontsize=9)
+    ax4.set_ylabel('% Expert + Practitioner', fontsize=10)
+    ax4.set_title(f'{course} – {slo}: {trend.label} trend',
+                  fontsize=11, weight='bold')
+    # ------------------- annotate β₁ and p-value ----------------------------
+    slope = trend.slope  # β₁
+    pval = trend.pvalue  # two-sided p
+
+    label = (
+        f"$\\beta_1$ = {slope:+.2f}\n"  # newline now works
+        f"$p$ = {pval:.3f}"
+    )
+
+    ax4.text(0.02, 0.94, label,
+             transform=ax4.transAxes,
+             ha='left', va='top', fontsize=9,
+             bbox=dict(boxstyle='round,pad=0.3',
+                       fc='#f5f5f5', ec='none', alpha=0.85))
+    ax4.legend(
+        fontsize=8,
+        loc='lower right',  # always bottom-right of the axes
+        frameon=False  # optional – removes the legend box border
+    )
+    ax4.spines[['right', 'top']].set_visible(False)
+
+    fig.tight_layout()
+    return fig
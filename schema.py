@@ -0,0 +1,278 @@
+# schema.py  – typed rows for the data-entry JSON routes
+"""
+/submit and /save_draft took `request.get_json(force=True)` on trust (a
+missing key was a 500, a bad number whatever SQLite made of it), and
+load_records built one dict per row for jsonify to sort and escape.  Each
+payload row is now a slot-backed struct declared once with typed fields:
+
+  * `decode(body, EntryRow)` parses the body and validates it a column
+    at a time while building the rows; SchemaError (→ 400) names a bad
+    value, e.g. "rows[12].expert: not a number: 'abc'";
+  * number fields take numbers or numeric strings (the form posts input
+    values as text) and must be finite and in range;
+  * `EntryRow.json_sql()` is the same field list as a SQLite json_object()
+    projection: load_records is serialised by SQLite from the stored rows,
+    with no Python object per row.
+
+Unknown keys are ignored.  `DraftRow` is the lenient twin for drafts:
+every field may be empty, and a draft is stored as posted once checked.
+"""
+
+import json
+import math
+import operator
+
+MAX_ROWS = 10000             # rows per request body
+MAX_TEXT = 20000             # characters per text field
+
+
+class SchemaError(ValueError):
+    """A request body that does not fit the row schema."""
+
+
+class Field:
+    """A converter: `field(value)` → the stored value, or ValueError."""
+
+    def fast(self, values):
+        """All of `values` converted in one pass, or None if any needs a look."""
+        return None
+
+    def column(self, values) -> list:
+        """Convert a whole column; SchemaError names the first bad row."""
+        out = self.fast(values)
+        if out is None:
+            out = []
+            for i, v in enumerate(values):
+                try:
+                    out.append(self(v))
+                except ValueError as exc:
+                    raise SchemaError(i, str(exc)) from None
+        return out
+
+
+class Text(Field):
+    def __init__(self, required: bool = True, max_len: int = MAX_TEXT, nbsp: bool = False):
+        self.required = required
+        self.max_len = max_len
+        self.nbsp = nbsp                    # NBSP → space (course codes)
+
+    def fast(self, values):
+        m, req = self.max_len, self.required
+        if any([type(v) is not str or len(v) > m or (req and (not v or v.isspace()))
+                for v in values]):
+            return None
+        return [v.replace("\u00A0", " ") for v in values] if self.nbsp else values
+
+    def __call__(self, v):
+        if v is None:
+            v = ""
+        elif type(v) is not str:
+            if type(v) in (int, float) and not self.required:
+                v = str(v)
+            else:
+                raise ValueError(f"not text: {v!r}")
+        if self.nbsp:
+            v = v.replace("\u00A0", " ")
+        if self.required and not v.strip():
+            raise ValueError("required")
+        if len(v) > self.max_len:
+            raise ValueError(f"longer than {self.max_len} characters")
+        return v
+
+
+class Number(Field):
+    def __init__(self, lo: float = -math.inf, hi: float = math.inf, required: bool = True):
+        self.lo = lo
+        self.hi = hi
+        self.required = required
+
+    def fast(self, values):
+        if not set(map(type, values)) <= {int, float, str}:   # None, bool, [..]
+            return None
+        try:
+            xs = list(map(float, values))
+        except ValueError:                                # "", "abc"
+            return None
+        # a NaN or ±inf makes the sum non-finite; an overflowing sum only
+        # sends the column to the per-value path
+        if xs and not (self.lo <= min(xs) and max(xs) <= self.hi and math.isfinite(sum(xs))):
+            return None
+        return xs
+
+    def __call__(self, v):
+        if type(v) is str:
+            v = v.strip()
+            if not v:
+                v = None
+        if v is None:
+            if self.required:
+                raise ValueError("required")
+            return None
+        if type(v) not in (int, float, str):
+            raise ValueError(f"not a number: {v!r}")
+        try:
+            x = float(v)
+        except ValueError:
+            raise ValueError(f"not a number: {v!r}") from None
+        if not math.isfinite(x):
+            raise ValueError(f"not a number: {v!r}")
+        if not self.lo <= x <= self.hi:
+            raise ValueError(f"{x:g} outside {self.lo:g}…{self.hi:g}")
+        return x
+
+
+# --------------------------------------------------------------------------- #
+# rows
+# --------------------------------------------------------------------------- #
+class Row:
+    """Base of the row structs: FIELDS maps name → converter, in column order."""
+
+    __slots__ = ()
+    FIELDS = {}
+
+    def __init_subclass__(cls):
+        # a plain positional __init__ and a C-level astuple, generated the
+        # way dataclasses / namedtuple do it (3–4× a setattr loop)
+        args = ", ".join(cls.__slots__)
+        ns = {}
+        exec(f"def __init__(self, {args}):\n" +
+             "".join(f"    self.{name} = {name}\n" for name in cls.__slots__), ns)
+        cls.__init__ = ns["__init__"]
+        cls._values = operator.attrgetter(*cls.__slots__)
+
+    @classmethod
+    def columns(cls, objs) -> list:
+        """
+        Validate decoded JSON objects a field at a time (one pass per column,
+        as ingest.py does) → the converted columns in FIELDS order;
+        SchemaError carries the "rows[i].field: …" of the first bad value.
+        """
+        if not all([type(obj) is dict for obj in objs]):
+            i = next(i for i, obj in enumerate(objs) if type(obj) is not dict)
+            raise SchemaError(f"rows[{i}]: not an object")
+        columns = []
+        for name, field in cls.FIELDS.items():
+            try:
+                values = list(map(operator.itemgetter(name), objs))
+            except KeyError:                            # a key left out → None
+                values = [obj.get(name) for obj in objs]
+            try:
+                columns.append(field.column(values))
+            except SchemaError as exc:
+                i, msg = exc.args
+                raise SchemaError(f"rows[{i}].{name}: {msg}") from None
+        cls.check(columns)
+        return columns
+
+    @classmethod
+    def from_objects(cls, objs) -> list:
+        """Validated row structs, one per object."""
+        return list(map(cls, *cls.columns(objs)))
+
+    @classmethod
+    def check(cls, columns) -> None:
+        """Checks across fields, on whole columns; raise SchemaError("rows[i]: …")."""
+
+    def astuple(self) -> tuple:
+        """The field values in column order."""
+        return self._values(self)
+
+    def asdict(self) -> dict:
+        return dict(zip(self.__slots__, self._values(self)))
+
+    @classmethod
+    def json_sql(cls, **extra) -> str:
+        """json_object(...) of the fields – column = field name – plus `extra`
+        key → SQL expression pairs, e.g. status="'submitted'"."""
+        pairs = ["'id', id"] + [f"'{name}', {name}" for name in cls.FIELDS]
+        pairs += [f"'{key}', {sql}" for key, sql in extra.items()]
+        return f"json_object({', '.join(pairs)})"
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.asdict().items())})"
+
+
+class EntryRow(Row):
+    """One submitted row, in ABET_Data_Rev1.UPSERT_SQL parameter order."""
+
+    FIELDS = {
+        "course": Text(nbsp=True),
+        "course_name": Text(required=False),
+        "slo": Text(),
+        "pi": Text(),
+        "assessment_tool": Text(),
+        "explanation": Text(),
+        "semester": Text(),
+        "blooms_level": Text(),
+        "expert": Number(0, 100),
+        "practitioner": Number(0, 100),
+        "apprentice": Number(0, 100),
+        "novice": Number(0, 100),
+        "observations": Text(),
+    }
+    __slots__ = tuple(FIELDS)
+
+    @classmethod
+    def check(cls, columns):
+        col = dict(zip(cls.FIELDS, columns))
+        totals = [e + p + a + n for e, p, a, n in zip(
+            col["expert"], col["practitioner"], col["apprentice"], col["novice"])]
+        if not all([abs(t - 100) <= 0.01 for t in totals]):
+            i = next(i for i, t in enumerate(totals) if abs(t - 100) > 0.01)
+            raise SchemaError(f"rows[{i}]: expert + practitioner + apprentice + novice "
+                              f"= {totals[i]:g}, not 100")
+
+
+class DraftRow(Row):
+    """A row of a saved draft – the form as it was, so anything may be empty."""
+
+    FIELDS = {name: (Number(required=False) if isinstance(conv, Number)
+                     else Text(required=False))
+              for name, conv in EntryRow.FIELDS.items()}
+    __slots__ = tuple(FIELDS)
+
+    @classmethod
+    def from_objects(cls, objs) -> list:
+        """
+        Drafts are checked like submitted rows but kept as posted – the form's
+        own strings – so no struct is built and nothing is re-formatted: the
+        result is the posted objects, rebuilt only if their keys differ
+        from FIELDS.
+        """
+        cls.columns(objs)
+        keys = cls.FIELDS.keys()
+        return [obj if obj.keys() == keys else {k: obj.get(k) for k in keys}
+                for obj in objs]
+
+
+# --------------------------------------------------------------------------- #
+# bodies
+# --------------------------------------------------------------------------- #
+def decode(body: bytes, row_type, **options) -> tuple:
+    """
+    {"rows": [...], option: value, ...} → ([row_type], {option: value}).
+    `options` maps each allowed top-level key to (default, allowed values).
+    """
+    try:
+        obj = json.loads(body)
+    except ValueError as exc:               # JSONDecodeError, UnicodeDecodeError
+        raise SchemaError(f"not JSON: {exc}") from None
+    if type(obj) is not dict:
+        raise SchemaError("body: not an object")
+    items = obj.get("rows", [])
+    if type(items) is not list:
+        raise SchemaError("rows: not a list")
+    if len(items) > MAX_ROWS:
+        raise SchemaError(f"rows: more than {MAX_ROWS}")
+    rows = row_type.from_objects(items)
+    values = {}
+    for key, (default, allowed) in options.items():
+        values[key] = obj.get(key, default)
+        if values[key] not in allowed:
+            raise SchemaError(f"{key}: {values[key]!r} not one of {', '.join(allowed)}")
+    return rows, values
+
+
+def encode(rows) -> str:
+    """JSON array of draft rows (DraftRow.from_objects; stored rows go through json_sql)."""
+    return json.dumps(rows, ensure_ascii=False)
@@ -0,0 +1,212 @@
+# search.py  – full-text search over observations and explanations
+"""
+`entries_fts` is an FTS5 index over the free-text columns of
+`abet_entries` (plus course, SLO and semester, so filters are index
+lookups too).  It stores no copy of the text – the entries table is its
+content table – and triggers keep it in step with every insert, update
+and delete:
+
+  * INSERT OR REPLACE removes the replaced row through the delete trigger
+    only with `PRAGMA recursive_triggers` on; /submit and ingest set it
+    (`python search.py rebuild` repairs an index written without it);
+  * closing a semester deletes its rows from the live table, so they
+    leave this index; archive.py indexes them in the archive file, and
+    `search()` queries every ATTACHed archive that has an index.
+
+Terms are ANDed, "quoted phrases", `lab*` prefixes and OR between terms
+work; anything else in the query is taken literally.  Results are ranked
+by bm25 over the two text columns, with HTML-safe <mark> snippets.
+Ranking has to score every match, so a query that matches more than
+RANK_MAX_MATCHES rows (a word in nearly every note) returns the newest
+matches instead – an early-exit scan – and says so (`ranked`).  A prefix
+that expands to thousands of distinct terms stays slow either way.
+
+    python search.py "lab equipment" [--course "MECE 3380"] [--slo SLO1] [--semester "Fall 2023"]
+    python search.py rebuild
+"""
+
+import html
+import re
+import sqlite3
+from contextlib import closing
+
+FTS_TABLE = "entries_fts"
+FILTER_COLUMNS = ("course", "slo", "semester")
+TEXT_COLUMNS = ("explanation", "observations")
+MAX_RESULTS = 200
+RANK_MAX_MATCHES = 20000     # more matches → newest first (bm25 scores every match)
+SNIPPET_TOKENS = 16
+
+_COLS = ", ".join(FILTER_COLUMNS + TEXT_COLUMNS)
+_NEW = ", ".join(f"new.{c}" for c in FILTER_COLUMNS + TEXT_COLUMNS)
+_OLD = ", ".join(f"old.{c}" for c in FILTER_COLUMNS + TEXT_COLUMNS)
+
+TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS abet_entries_fts_insert
+        AFTER INSERT ON abet_entries BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, {_COLS}) VALUES (new.id, {_NEW});
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS abet_entries_fts_delete
+        AFTER DELETE ON abet_entries BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {_COLS})
+            VALUES ('delete', old.id, {_OLD});
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS abet_entries_fts_update
+        AFTER UPDATE ON abet_entries BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {_COLS})
+            VALUES ('delete', old.id, {_OLD});
+            INSERT INTO {FTS_TABLE} (rowid, {_COLS}) VALUES (new.id, {_NEW});
+        END""",
+)
+
+
+def create(conn, db: str = "main", triggers: bool = True) -> None:
+    """Create (if missing) and fill the index of `db`.abet_entries."""
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {db}.{FTS_TABLE} USING fts5("
+                 f"{_COLS}, content='abet_entries', content_rowid='id', "
+                 f"tokenize='porter unicode61')")
+    if triggers:
+        for sql in TRIGGERS:
+            conn.execute(sql)
+    rebuild(conn, db)
+
+
+def rebuild(conn, db: str = "main") -> None:
+    """Re-read every row of the content table into the index."""
+    conn.execute(f"INSERT INTO {db}.{FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+# --------------------------------------------------------------------------- #
+# query
+# --------------------------------------------------------------------------- #
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def _quote(s: str) -> str:
+    return '"' + s.replace('"', '""') + '"'
+
+
+def match_expression(text: str, course=None, slo=None, semester=None) -> str:
+    """The FTS5 MATCH string for a search box query plus filters."""
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        if word == "OR":
+            if terms and terms[-1] != "OR":
+                terms.append("OR")
+            continue
+        prefix = not phrase and word.endswith("*")
+        s = phrase or word.rstrip("*")
+        if re.search(r"\w", s):             # punctuation alone is no token
+            terms.append(_quote(s) + ("*" if prefix else ""))
+    if terms and terms[-1] == "OR":
+        terms.pop()
+    if not terms:
+        raise ValueError("no search terms")
+    expr = "{%s} : (%s)" % (" ".join(TEXT_COLUMNS), " ".join(terms))
+    for col, value in zip(FILTER_COLUMNS, (course, slo, semester)):
+        if value:
+            expr += f" AND {col} : {_quote(value)}"
+    return expr
+
+
+def _highlight(fragment):
+    """snippet() with \\x02…\\x03 markers → escaped HTML with <mark>."""
+    if fragment is None:
+        return ""
+    return html.escape(fragment).replace("\x02", "<mark>").replace("\x03", "</mark>")
+
+
+def indexed_databases(conn) -> list:
+    """Schemas on `conn` (main, ATTACHed archives) that have the index."""
+    found = []
+    for _, name, _ in conn.execute("PRAGMA database_list").fetchall():
+        if conn.execute(f"SELECT 1 FROM {name}.sqlite_master WHERE name = ?",
+                        (FTS_TABLE,)).fetchone():
+            found.append(name)
+    return found
+
+
+def search(conn, text: str, course=None, slo=None, semester=None,
+           limit: int = 50) -> dict:
+    """
+    Entries matching `text` (ValueError if it has no terms) over main and
+    every ATTACHed archive with an index → {"matches", "ranked", "results"}:
+    the best `limit` by bm25, or the newest if more than RANK_MAX_MATCHES
+    match.  Rows of an archive count only for terms main lists as closed,
+    so a snapshot taken before a close does not return them twice.
+    """
+    match = match_expression(text, course, slo, semester)
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    sources, matches = [], 0
+    for db in indexed_databases(conn):
+        closed = ("" if db == "main" else
+                  " AND e.semester IN (SELECT semester FROM main.closed_terms)")
+        src = (f"{db}.{FTS_TABLE} JOIN {db}.abet_entries e "
+               f"ON e.id = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH ?{closed}")
+        count = (f"SELECT COUNT(*) FROM {src}" if closed else      # main: the index alone
+                 f"SELECT COUNT(*) FROM {db}.{FTS_TABLE} WHERE {FTS_TABLE} MATCH ?")
+        matches += conn.execute(count, (match,)).fetchone()[0]
+        sources.append(src)
+    ranked = matches <= RANK_MAX_MATCHES
+
+    weights = ", ".join(["0"] * len(FILTER_COLUMNS) + ["1"] * len(TEXT_COLUMNS))
+    snippets = ", ".join(
+        f"snippet({FTS_TABLE}, {i}, char(2), char(3), '…', {SNIPPET_TOKENS})"
+        for i in range(len(FILTER_COLUMNS), len(FILTER_COLUMNS) + len(TEXT_COLUMNS)))
+    order = "score" if ranked else f"{FTS_TABLE}.rowid DESC"   # ids grow with every submit
+    hits = []
+    for src in sources:
+        hits += conn.execute(f"""
+            SELECT bm25({FTS_TABLE}, {weights}) AS score, e.id, e.course, e.slo, e.pi,
+                   e.semester, e.blooms_level, e.assessment_tool, {snippets}
+              FROM {src} ORDER BY {order} LIMIT ?""", (match, limit)).fetchall()
+    hits.sort(key=(lambda r: r[0]) if ranked else (lambda r: -r[1]))
+    keys = ("score", "id", "course", "slo", "pi", "semester", "blooms_level",
+            "assessment_tool") + TEXT_COLUMNS
+    return {"matches": matches, "ranked": ranked,
+            "results": [dict(zip(keys, (round(-r[0], 3), *r[1:8], *map(_highlight, r[8:]))))
+                        for r in hits[:limit]]}
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    import archive
+    import migrate
+    from ABET_Data_Rev1 import DB_NAME
+
+    ap = argparse.ArgumentParser(description="Search observations / explanations.")
+    ap.add_argument("query", help='search text, or "rebuild" to re-index')
+    ap.add_argument("--course")
+    ap.add_argument("--slo")
+    ap.add_argument("--semester")
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    migrate.run()
+    if args.query == "rebuild":
+        t0 = time.perf_counter()
+        with closing(sqlite3.connect(DB_NAME)) as conn, conn:
+            rebuild(conn)
+            names = [r[0] for r in conn.execute("SELECT DISTINCT archive FROM closed_terms")]
+        for name in names:                 # archives closed before the index existed too
+            with closing(sqlite3.connect(os.path.join(archive.ARCHIVE_DIR, name))) as conn, conn:
+                create(conn, triggers=False)
+        print(f"rebuilt {DB_NAME} and {len(names)} archive(s) "
+              f"in {(time.perf_counter() - t0) * 1e3:.0f} ms")
+    else:
+        with closing(sqlite3.connect(DB_NAME)) as conn:
+            archive.attach(conn)
+            t0 = time.perf_counter()
+            found = search(conn, args.query, args.course, args.slo, args.semester, args.limit)
+            ms = (time.perf_counter() - t0) * 1e3
+        for h in found["results"]:
+            print(f"{h['score']:7.2f}  #{h['id']}  {h['course']} {h['slo']} {h['semester']}")
+            for col in TEXT_COLUMNS:
+                if "<mark>" in h[col]:
+                    text = h[col].replace("<mark>", "[").replace("</mark>", "]")
+                    print(f"         {col}: {html.unescape(text)}")
+        print(f"{len(found['results'])} of {found['matches']} match(es), "
+              f"{'best' if found['ranked'] else 'newest'} first, in {ms:.1f} ms")
@@ -0,0 +1,223 @@
+# sessions.py  – server-side sessions + the one auth check for both apps
+"""
+The browser only keeps a random session id; the session itself lives in a
+store – SQLite by default, so every gunicorn/uvicorn worker sees the same
+sessions, or process memory for a single-process dev server.
+
+`AuthMiddleware` sits in front of the DispatcherMiddleware.  It loads the
+session once per request and leaves it in the WSGI environ:
+
+    environ["abet.session"]   the ServerSession, which is Flask's `session`
+                              in both the parent and the ABET app
+    environ["abet.user"]      session["user"], or None
+
+and redirects anonymous requests for the protected mounts (/abet…) to the
+login page, so neither Flask app decodes a cookie or queries the store again.
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from werkzeug.http import parse_cookie
+from werkzeug.utils import redirect
+
+SESSION_TTL = int(os.environ.get("ABET_SESSION_TTL", str(8 * 3600)))  # s, sliding
+
+ENV_SESSION = "abet.session"
+ENV_USER = "abet.user"
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its id, expiry and whether it changed."""
+
+    def __init__(self, initial=None, sid=None, expires=0.0):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires = expires
+        self.modified = False
+        self.replaced = None                # id dropped by rotate(), deleted on save
+
+    def rotate(self):
+        """
+        Give the session a fresh id on the next save and delete the old one –
+        called on login and logout, so an id planted before login never
+        becomes an authenticated one (session fixation).
+        """
+        if self.sid is not None:
+            self.replaced = self.sid
+        self.sid = None
+        self.modified = True
+
+
+# --------------------------------------------------------------------------- #
+# stores – load(sid) → (data, expires) | None, save, delete
+# --------------------------------------------------------------------------- #
+class MemoryStore:
+    """Per-process dict; expired entries are swept once it grows past `max_entries`."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        hit = self._data.get(sid)
+        if hit is None or hit[1] < time.time():
+            return None
+        return dict(hit[0]), hit[1]
+
+    def save(self, sid, data, expires):
+        with self._lock:
+            self._data[sid] = (dict(data), expires)
+            if len(self._data) > self.max_entries:
+                self._evict()
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def _evict(self):
+        now = time.time()
+        live = {k: v for k, v in self._data.items() if v[1] >= now}
+        if len(live) > self.max_entries:          # still full: drop the oldest
+            keep = sorted(live, key=lambda k: live[k][1])[-self.max_entries:]
+            live = {k: live[k] for k in keep}
+        self._data = live
+
+
+class SqliteStore:
+    """
+    `sessions` table in its own database file, so session writes never wait
+    on the abet_entries write lock.  One connection per thread, kept open;
+    expired rows are purged every PURGE_EVERY writes.
+    """
+
+    PURGE_EVERY = 256
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            sid      TEXT PRIMARY KEY,
+            data     TEXT NOT NULL,
+            expires  REAL NOT NULL
+        );
+    """                               # created by migrate.py, in WAL mode
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, isolation_level=None)
+        return conn
+
+    def load(self, sid):
+        row = self._conn().execute(
+            "SELECT data, expires FROM sessions WHERE sid = ? AND expires >= ?",
+            (sid, time.time())).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def save(self, sid, data, expires):
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?,?,?)",
+                     (sid, json.dumps(dict(data)), expires))
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+    def delete(self, sid):
+        self._conn().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+def load_session(store, sid) -> ServerSession:
+    hit = store.load(sid) if sid else None
+    if hit is None:
+        return ServerSession()
+    data, expires = hit
+    return ServerSession(data, sid, expires)
+
+
+# --------------------------------------------------------------------------- #
+# Flask side
+# --------------------------------------------------------------------------- #
+class ServerSessionInterface(SessionInterface):
+    """
+    Hands Flask the session `AuthMiddleware` already loaded; only falls back
+    to reading the cookie itself when an app is served without the middleware.
+    Writes happen only when the session changed or is half-way to expiry;
+    a rotated session gets a new id and cookie and its old id is deleted.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sess = request.environ.get(ENV_SESSION)
+        if sess is None:
+            sess = load_session(self.store, request.cookies.get(self.get_cookie_name(app)))
+            request.environ[ENV_SESSION] = sess
+        return sess
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain, path = self.get_cookie_domain(app), self.get_cookie_path(app)
+
+        old, session.replaced = session.replaced, None
+        if old:                                   # rotated on login / logout
+            self.store.delete(old)
+
+        if not session:                           # logged out / never logged in
+            if session.modified and (session.sid or old):
+                if session.sid:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        if not session.modified and session.expires - now > SESSION_TTL / 2:
+            return
+
+        new = session.sid is None
+        if new:
+            session.sid = secrets.token_urlsafe(32)
+        session.expires = now + SESSION_TTL
+        self.store.save(session.sid, session, session.expires)
+        if new:
+            response.set_cookie(
+                name, session.sid, domain=domain, path=path,
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app))
+        response.vary.add("Cookie")
+
+
+# --------------------------------------------------------------------------- #
+# WSGI side
+# --------------------------------------------------------------------------- #
+class AuthMiddleware:
+    """Resolve the session once and turn anonymous /abet… requests to /login."""
+
+    def __init__(self, app, store, cookie_name: str = "session",
+                 protected=("/abet",), login_url: str = "/login"):
+        self.app = app
+        self.store = store
+        self.cookie_name = cookie_name
+        self.protected = tuple(protected)
+        self.login_url = login_url
+
+    def __call__(self, environ, start_response):
+        sess = load_session(self.store, parse_cookie(environ).get(self.cookie_name))
+        environ[ENV_SESSION] = sess
+        environ[ENV_USER] = user = sess.get("user")
+        if user is None and environ.get("PATH_INFO", "").startswith(self.protected):
+            return redirect(self.login_url)(environ, start_response)
+        return self.app(environ, start_response)
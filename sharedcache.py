@@ -0,0 +1,240 @@
+# sharedcache.py  – on-disk result cache shared by every worker on the host
+"""
+The in-process figure LRU in main.py is per gunicorn worker and empty
+after every restart.  `SharedCache` sits behind it: one SQLite file
+(WAL mode) that all workers read and write, holding rendered charts,
+/api/analysis payloads, Bloom summaries and load_records payloads.
+
+  * values are pickled; a write is one INSERT OR REPLACE, so readers see
+    the old entry or the new one, never a partial value;
+  * every entry has a TTL (keys carry a data stamp, so this only bounds
+    how long dead stamps occupy the disk);
+  * when the total size passes `max_bytes`, least-recently-used entries
+    are evicted down to 90 % of it (last use is recorded at most once a
+    minute per entry, so hits stay read-only);
+  * hit / miss / put / eviction counts are kept per process and added to
+    the `counters` table every few seconds, so the CLI sees all workers;
+  * every key is stored under the code version (`code_version()`, a hash
+    of the modules whose objects are cached, plus CACHE_VERSION), so a
+    deploy that changes TrendFit, a render payload or the row schema
+    never reads the old format; the first put of a process drops the rows
+    of other versions.  A value that does not unpickle counts as a miss
+    and is deleted.
+
+Environment: ABET_CACHE_DB (abet_cache.db), ABET_CACHE_TTL (s, 86400),
+ABET_CACHE_MAX_MB (256).
+
+    python sharedcache.py stats
+    python sharedcache.py list [TEXT]              # keys containing TEXT, e.g. "MECE 3380"
+    python sharedcache.py purge --expired
+    python sharedcache.py purge [TEXT]             # everything, or keys containing TEXT
+"""
+
+import atexit
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+TOUCH_EVERY = 60.0           # s between last_used updates of one entry
+FLUSH_EVERY = 5.0            # s between counter flushes
+CACHE_VERSION = 1            # bump for a payload change the code hash misses
+# modules whose classes / output formats end up in cached values
+CODE_FILES = ("analysis.py", "render.py", "plots.py", "program.py", "schema.py")
+
+SCHEMA = (                   # created by migrate.py, in WAL mode
+    """CREATE TABLE IF NOT EXISTS entries (
+           key        TEXT PRIMARY KEY,
+           value      BLOB NOT NULL,
+           size       INTEGER NOT NULL,
+           created    REAL NOT NULL,
+           expires    REAL NOT NULL,
+           last_used  REAL NOT NULL
+       )""",
+    "CREATE INDEX IF NOT EXISTS ix_entries_last_used ON entries (last_used)",
+    """CREATE TABLE IF NOT EXISTS counters (
+           name  TEXT PRIMARY KEY,
+           n     INTEGER NOT NULL
+       )""",
+)
+
+
+def code_version() -> str:
+    """CACHE_VERSION + a hash of CODE_FILES, e.g. '1-3f09a2c4b1d7'."""
+    h = hashlib.sha1()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in CODE_FILES:
+        try:
+            with open(os.path.join(here, name), "rb") as f:
+                h.update(f.read())
+        except FileNotFoundError:
+            pass
+    return f"{CACHE_VERSION}-{h.hexdigest()[:12]}"
+
+
+class SharedCache:
+    def __init__(self, path: str, ttl: float = 86400.0, max_bytes: int = 256 << 20,
+                 version: str = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.version = code_version() if version is None else version
+        self._prefix = self.version + "|"
+        self._swept = False               # other versions' rows dropped yet
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counts = dict(hits=0, misses=0, puts=0, evictions=0)
+        self._flushed = time.monotonic()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, isolation_level=None,
+                                                      timeout=10)
+        return conn
+
+    def _bump(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+            due = time.monotonic() - self._flushed >= FLUSH_EVERY
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Add this process's counts to the shared `counters` table."""
+        with self._lock:
+            counts, self._counts = self._counts, dict.fromkeys(self._counts, 0)
+            self._flushed = time.monotonic()
+        rows = [(k, v) for k, v in counts.items() if v]
+        if rows:
+            self._conn().executemany(
+                "INSERT INTO counters (name, n) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET n = n + excluded.n", rows)
+
+    # ------------------------------------------------------------------ #
+    def get(self, key: str):
+        """The cached value, or None if absent, expired or unreadable."""
+        now = time.time()
+        key = self._prefix + key
+        row = self._conn().execute(
+            "SELECT value, expires, last_used FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < now:
+            self._bump("misses")
+            return None
+        try:
+            value = pickle.loads(row[0])
+        except Exception:                 # a class renamed or changed under the same version
+            self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._bump("misses")
+            return None
+        if now - row[2] > TOUCH_EVERY:
+            self._conn().execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+        self._bump("hits")
+        return value
+
+    def put(self, key: str, value, ttl: float = None) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        key = self._prefix + key
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._swept:           # left behind by earlier deploys
+                conn.execute("DELETE FROM entries WHERE substr(key, 1, ?) != ?",
+                             (len(self._prefix), self._prefix))
+            conn.execute("INSERT OR REPLACE INTO entries "
+                         "(key, value, size, created, expires, last_used) VALUES (?,?,?,?,?,?)",
+                         (key, blob, len(blob), now, now + (ttl or self.ttl), now))
+            evicted = self._evict(conn, now)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._swept = True
+        self._bump("puts")
+        if evicted:
+            self._bump("evictions", evicted)
+
+    def _evict(self, conn, now) -> int:
+        n = conn.execute("DELETE FROM entries WHERE expires < ?", (now,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return n
+        drop, target = [], self.max_bytes * 0.9
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= target:
+                break
+            drop.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", drop)
+        return n + len(drop)
+
+    # ------------------------------------------------------------------ #
+    def purge(self, match: str = "", expired_only: bool = False) -> int:
+        """Delete entries whose key contains `match` (all or just expired), any version."""
+        sql = "DELETE FROM entries WHERE instr(key, ?) > 0"
+        args = [match]
+        if expired_only:
+            sql += " AND expires < ?"
+            args.append(time.time())
+        return self._conn().execute(sql, args).rowcount
+
+    def entries(self, match: str = ""):
+        """[(key, size, age s, ttl left s)] for keys containing `match`."""
+        now = time.time()
+        return [(k, size, now - created, expires - now) for k, size, created, expires
+                in self._conn().execute(
+                    "SELECT key, size, created, expires FROM entries "
+                    "WHERE instr(key, ?) > 0 ORDER BY key", (match,))]
+
+    def stats(self) -> dict:
+        """Entry count and size plus counters of every worker (flushed ones)."""
+        conn = self._conn()
+        n, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        counts = dict(conn.execute("SELECT name, n FROM counters"))
+        with self._lock:
+            for k, v in self._counts.items():           # this process, not yet flushed
+                counts[k] = counts.get(k, 0) + v
+        total = counts.get("hits", 0) + counts.get("misses", 0)
+        return {"version": self.version, "entries": n, "bytes": size, "max_bytes": self.max_bytes,
+                **counts, "hit_rate": round(counts.get("hits", 0) / total, 3) if total else None}
+
+
+def from_env() -> SharedCache:
+    """The cache configured by ABET_CACHE_*; counts are flushed at exit."""
+    cache = SharedCache(os.environ.get("ABET_CACHE_DB", "abet_cache.db"),
+                        ttl=float(os.environ.get("ABET_CACHE_TTL", "86400")),
+                        max_bytes=int(float(os.environ.get("ABET_CACHE_MAX_MB", "256")) * (1 << 20)))
+    atexit.register(cache.flush)
+    return cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Inspect / purge the shared result cache.")
+    ap.add_argument("--db", help="cache file (default: $ABET_CACHE_DB or abet_cache.db)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats")
+    p = sub.add_parser("list")
+    p.add_argument("match", nargs="?", default="")
+    p = sub.add_parser("purge")
+    p.add_argument("match", nargs="?", default="")
+    p.add_argument("--expired", action="store_true", help="only entries past their TTL")
+    args = ap.parse_args()
+
+    if args.db:
+        os.environ["ABET_CACHE_DB"] = args.db
+    import migrate
+    migrate.run()
+    cache = from_env()
+    if args.cmd == "stats":
+        for k, v in cache.stats().items():
+            print(f"{k:>12}  {v}")
+    elif args.cmd == "list":
+        for key, size, age, left in cache.entries(args.match):
+            print(f"{size:>9}  {age:>8.0f} s old  {max(left, 0):>8.0f} s left  {key}")
+    else:
+        print(f"purged {cache.purge(args.match, expired_only=args.expired)} entries")
@@ -0,0 +1,128 @@
+# singleflight.py  – one computation per analysis key across all workers
+"""
+When several reviewers open the same analysis at once, only the first
+request (the leader) runs query + fit + render; the others wait for its
+result instead of repeating the work.  Coordination is a `flights` table
+in a small SQLite file shared by every gunicorn worker on the host:
+
+    key      the analysis key (JSON of the figure-cache key, data stamp included)
+    owner    "<pid>:<thread id>:<nonce>" of the leader
+    started  when the leader took it
+    done     when the result was stored (NULL while in flight)
+    result   pickled result, kept RESULT_TTL seconds for late joiners
+
+A waiter polls the row until `done` is set.  Timeout policy:
+
+  * a waiter gives up after `timeout` seconds and computes the result
+    itself (no lock) – one hung fit cannot stall every waiter;
+  * an in-flight row older than `timeout` is stale (the leader hung or its
+    worker died) and the next request takes the flight over;
+  * a leader that raises deletes its row, so a waiter takes over at once.
+
+ABET_FLIGHT_DB (default abet_flights.db), ABET_FLIGHT_TIMEOUT (s, 30).
+"""
+
+import json
+import os
+import pickle
+import secrets
+import sqlite3
+import threading
+import time
+
+RESULT_TTL = 30.0            # seconds a finished result is served to joiners
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS flights (
+        key      TEXT PRIMARY KEY,
+        owner    TEXT NOT NULL,
+        started  REAL NOT NULL,
+        done     REAL,
+        result   BLOB
+    );
+"""                          # created by migrate.py, in WAL mode
+
+
+class SingleFlight:
+    def __init__(self, path: str, timeout: float = 30.0, poll: float = 0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll = poll
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counts = dict(led=0, joined=0, fallbacks=0, takeovers=0)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, isolation_level=None,
+                                                      timeout=10)
+        return conn
+
+    def _count(self, what):
+        with self._lock:
+            self.counts[what] += 1
+
+    # ------------------------------------------------------------------ #
+    def do(self, key, fn):
+        """
+        fn() once per `key` across processes; concurrent callers get the
+        leader's result.  `key` must be JSON-serialisable.
+        """
+        k = json.dumps(key)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            owner, result = self._join(k)
+            if owner is not None:                      # we lead
+                return self._lead(k, owner, fn)
+            if result is not None:                     # finished while we looked
+                self._count("joined")
+                return pickle.loads(result)
+            if time.monotonic() >= deadline:           # leader too slow: go alone
+                self._count("fallbacks")
+                return fn()
+            time.sleep(self.poll)
+
+    def _join(self, k):
+        """→ (our owner id if we now lead, finished result if there is one)."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT started, done, result FROM flights WHERE key = ?",
+                               (k,)).fetchone()
+            if row is not None:
+                started, done, result = row
+                if done is not None and now - done <= RESULT_TTL:
+                    return None, result
+                if done is None and now - started <= self.timeout:
+                    return None, None                  # in flight – wait
+                if done is None:
+                    self._count("takeovers")
+            owner = f"{os.getpid()}:{threading.get_ident()}:{secrets.token_hex(4)}"
+            conn.execute("INSERT OR REPLACE INTO flights (key, owner, started) VALUES (?,?,?)",
+                         (k, owner, now))
+            return owner, None
+        finally:
+            conn.execute("COMMIT")
+
+    def _lead(self, k, owner, fn):
+        self._count("led")
+        conn = self._conn()
+        try:
+            value = fn()
+        except BaseException:
+            conn.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (k, owner))
+            raise
+        now = time.time()
+        conn.execute("UPDATE flights SET done = ?, result = ? WHERE key = ? AND owner = ?",
+                     (now, pickle.dumps(value), k, owner))
+        conn.execute("DELETE FROM flights WHERE done < ?", (now - RESULT_TTL,))
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM flights WHERE done IS NULL").fetchone()
+        return {**counts, "in_flight": row[0]}
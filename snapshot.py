@@ -0,0 +1,143 @@
+# snapshot.py  – read-only analytics copy of the portal database
+"""
+The analysis views and /download read a snapshot of abet_data.db instead
+of the live file, so long pandas reads never hold locks that /submit and
+/save_draft are waiting for.
+
+The snapshot is taken with SQLite's online backup API and is never older
+than `max_age` seconds: the first read after that takes a fresh one.
+
+    file    (default) written next to the database and swapped in with
+            os.replace, so every worker process shares it and readers open
+            it immutable – no locking at all.  Its mtime is the snapshot time.
+    memory  one in-memory copy per process (shared-cache URI).
+    off     read the live database, as before.
+
+Environment: ABET_SNAPSHOT=file|memory|off, ABET_SNAPSHOT_MAX_AGE (s, 60),
+ABET_SNAPSHOT_REFRESH (s, 0 = only on demand) for a background refresher.
+
+    python snapshot.py          # take a file snapshot now (cron / batch jobs)
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+
+class Snapshot:
+    _ids = itertools.count()
+
+    def __init__(self, source: str, mode: str = "file", max_age: float = 60.0,
+                 path: str = None):
+        if mode not in ("file", "memory", "off"):
+            raise ValueError(f"unknown snapshot mode {mode!r}")
+        self.source = source
+        self.mode = mode
+        self.max_age = max_age
+        self.path = path or os.path.splitext(source)[0] + "_analytics.db"
+        self._lock = threading.Lock()
+        self._uri = None                  # memory mode: current generation
+        self._keeper = None               # … and the connection keeping it alive
+        self._taken = 0.0
+        self._name = f"abet_snapshot_{os.getpid()}_{next(self._ids)}"
+        self._gen = itertools.count()
+
+    # ------------------------------------------------------------------ #
+    def taken_at(self) -> float:
+        """Epoch seconds of the current snapshot (0 = none yet)."""
+        if self.mode == "file":
+            try:
+                return os.path.getmtime(self.path)
+            except OSError:
+                return 0.0
+        return self._taken
+
+    def refresh(self) -> float:
+        """Take a new snapshot now; returns its time."""
+        src = sqlite3.connect(self.source)
+        try:
+            if self.mode == "file":
+                tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                dst = sqlite3.connect(tmp)
+                try:
+                    src.backup(dst)
+                finally:
+                    dst.close()
+                os.replace(tmp, self.path)
+                return self.taken_at()
+
+            uri = f"file:{self._name}_{next(self._gen)}?mode=memory&cache=shared"
+            keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            src.backup(keeper)
+        finally:
+            src.close()
+        old, self._keeper, self._uri = self._keeper, keeper, uri
+        self._taken = time.time()
+        if old is not None:
+            old.close()               # readers still on it keep it alive
+        return self._taken
+
+    def update(self) -> float:
+        """
+        refresh(), serialised with the on-demand refresh in connect() – for
+        callers that know the database just changed.  No-op when mode="off".
+        """
+        if self.mode == "off":
+            return time.time()
+        with self._lock:
+            return self.refresh()
+
+    def connect(self):
+        """
+        → (read-only connection, snapshot time).  Takes a new snapshot first
+        if the current one is older than `max_age`.
+        """
+        if self.mode == "off":
+            return sqlite3.connect(self.source), time.time()
+
+        if time.time() - self.taken_at() > self.max_age:
+            with self._lock:
+                if time.time() - self.taken_at() > self.max_age:   # not done meanwhile
+                    self.refresh()
+
+        if self.mode == "file":
+            taken = self.taken_at()
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True)
+            return conn, taken
+        with self._lock:                  # refresh() must not drop this generation first
+            conn = sqlite3.connect(self._uri, uri=True)
+            taken = self._taken
+        conn.execute("PRAGMA query_only = ON")
+        return conn, taken
+
+    def start_refresher(self, interval: float) -> threading.Thread:
+        """Daemon thread re-taking the snapshot every `interval` seconds."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.update()
+                except sqlite3.Error:
+                    pass                  # next on-demand read retries
+        t = threading.Thread(target=loop, name="snapshot-refresh", daemon=True)
+        t.start()
+        return t
+
+
+def freshness(taken: float, now: float = None) -> str:
+    """'data as of 14:05:09 (42 s old)' for the chart captions."""
+    age = max((now or time.time()) - taken, 0)
+    when = time.strftime("%H:%M:%S", time.localtime(taken))
+    if age < 120:
+        return f"data as of {when} ({age:.0f} s old)"
+    return f"data as of {when} ({age / 60:.0f} min old)"
+
+
+if __name__ == "__main__":
+    from ABET_Data_Rev1 import DB_NAME
+
+    snap = Snapshot(DB_NAME)
+    t = snap.refresh()
+    print(f"{snap.path}: {freshness(t)}")
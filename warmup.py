@@ -0,0 +1,105 @@
+# warmup.py  – background recomputation of analyses after a submission
+"""
+`WarmupQueue` collects (course, slo) keys from committed submissions and
+hands them to a job function on one background thread, so the admin's
+first look at a freshly submitted course is a cache hit instead of a cold
+query + fit + render.
+
+  * dedupe    – a key already waiting is not queued twice;
+  * debounce  – the batch runs once no new key has arrived for `debounce`
+                seconds (a faculty member saving several SLOs back to back
+                is one batch), but never later than `max_delay` after the
+                oldest waiting key;
+  * metrics   – `stats()` gives queue depth, the age of the oldest waiting
+                key and the submit → warm lag of finished keys.
+
+The job receives the whole batch (sorted keys) so it can do per-batch work
+– refresh the analytics snapshot – once – and returns the keys it warmed
+(None: all of them); only those count as warmed and in the lag figures,
+the rest as errors.  Per process: the worker that
+handled the submit warms its own caches.
+"""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class WarmupQueue:
+    def __init__(self, job, debounce: float = 2.0, max_delay: float = 30.0):
+        self.job = job
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending = {}                # key → (first enqueued, last enqueued)
+        self._running = 0                 # keys in the batch being warmed
+        self._cv = threading.Condition()
+        self._thread = None
+        self._m = dict(batches=0, warmed=0, errors=0, deduped=0,
+                       last_lag=0.0, max_lag=0.0, last_batch_seconds=0.0)
+
+    # ------------------------------------------------------------------ #
+    def submit(self, keys) -> None:
+        """Queue `keys` for warming; starts the worker thread on first use."""
+        now = time.monotonic()
+        with self._cv:
+            for key in keys:
+                first, _ = self._pending.get(key, (now, now))
+                if key in self._pending:
+                    self._m["deduped"] += 1
+                self._pending[key] = (first, now)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="warmup",
+                                                daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._cv:
+            oldest = min((f for f, _ in self._pending.values()), default=now)
+            return {"depth": len(self._pending) + self._running,
+                    "waiting": len(self._pending),
+                    "running": self._running,
+                    "oldest_wait": round(now - oldest, 3),
+                    **{k: round(v, 3) if isinstance(v, float) else v
+                       for k, v in self._m.items()}}
+
+    # ------------------------------------------------------------------ #
+    def _next_batch(self) -> dict:
+        with self._cv:
+            while True:
+                if not self._pending:
+                    self._cv.wait()
+                    continue
+                now = time.monotonic()
+                due = min(max(last for _, last in self._pending.values()) + self.debounce,
+                          min(first for first, _ in self._pending.values()) + self.max_delay)
+                if due <= now:
+                    batch, self._pending = self._pending, {}
+                    self._running = len(batch)
+                    return batch
+                self._cv.wait(due - now)
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            t0 = time.monotonic()
+            try:
+                warmed = self.job(sorted(batch))
+                warmed = batch.keys() if warmed is None else set(warmed) & batch.keys()
+            except Exception:             # a failed warm-up only costs a cold view
+                log.exception("warm-up of %d analyses failed", len(batch))
+                warmed = ()
+            done = time.monotonic()
+            with self._cv:
+                lags = [done - batch[key][0] for key in warmed]
+                self._m["batches"] += 1
+                self._m["warmed"] += len(lags)
+                self._m["errors"] += len(batch) - len(lags)
+                if lags:
+                    self._m["last_lag"] = max(lags)
+                    self._m["max_lag"] = max(self._m["max_lag"], *lags)
+                self._m["last_batch_seconds"] = done - t0
+                self._running = 0